@@ -0,0 +1,43 @@
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+# Helpers shared by the benchmark scripts, which import this module as
+# `_common` when run as `python benchmarks/<script>.py`.
+
+
+def random_walk(rng: np.random.Generator, n: int) -> np.ndarray:
+    # Geometric random walk starting near 100 with 2% daily volatility.
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+
+
+def synthetic_series(n: int, seed: int = 0) -> pd.Series:
+    return pd.Series(random_walk(np.random.default_rng(seed), n))
+
+
+def synthetic_ohlcv(n: int, seed: int = 0) -> pd.DataFrame:
+    # The random walk as closes, with intrabar range, volume and a few flat
+    # stretches (suspensions, limit-locked days) that exercise the
+    # constant-window paths.
+    rng = np.random.default_rng(seed)
+    close = random_walk(rng, n)
+    for start in rng.integers(0, max(n - 10, 1), size=max(n // 500, 1)):
+        close[start:start + 5] = close[start]
+    open_ = np.concatenate(([close[0]], close[:-1])) * (1 + rng.normal(0, 0.003, n))
+    spread = np.abs(rng.normal(0, 0.01, n))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    volume = rng.lognormal(15, 0.5, n).round()
+    index = pd.bdate_range('2000-01-03', periods=n)
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}, index=index)
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
@@ -0,0 +1,81 @@
+import os
+import sys
+import argparse
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.feature_engineering.rolling_kernels import HAS_NUMBA, rolling_extreme, rolling_mad
+from _common import best_of, synthetic_series
+
+# Compares the rolling().apply lambdas CCI and Aroon used to run on with the
+# sliding-window kernels that replaced them, and checks the outputs agree.
+#
+#   python benchmarks/bench_cci_aroon.py [--sizes 120 1000 5000] [--repeat 5]
+
+CCI_PERIOD = 20
+AROON_PERIOD = 25
+
+
+def legacy(tp: pd.Series) -> List[pd.Series]:
+    period = AROON_PERIOD
+    return [
+        tp.rolling(window=CCI_PERIOD).apply(lambda x: np.abs(x - x.mean()).mean()),
+        tp.rolling(window=period + 1).apply(lambda x: (period - x.argmax()) / period * 100),
+        tp.rolling(window=period + 1).apply(lambda x: (period - x.argmin()) / period * 100)
+    ]
+
+
+def kernels(tp: pd.Series, backend: str) -> List[np.ndarray]:
+    values = tp.to_numpy()
+    period = AROON_PERIOD
+    _, high_pos = rolling_extreme(values, period + 1, is_max=True, backend=backend)
+    _, low_pos = rolling_extreme(values, period + 1, is_max=False, backend=backend)
+    return [
+        rolling_mad(values, CCI_PERIOD, backend=backend),
+        (period - high_pos) / period * 100,
+        (period - low_pos) / period * 100
+    ]
+
+
+def run(sizes: List[int], repeat: int) -> List[Dict]:
+    backends = ['numpy'] + (['numba'] if HAS_NUMBA else [])
+    results = []
+    for n in sizes:
+        tp = synthetic_series(n)
+        expected = legacy(tp)
+        row = {'bars': n, 'legacy_ms': best_of(lambda: legacy(tp), repeat) * 1000}
+        for backend in backends:
+            kernels(tp, backend)  # warm-up, includes numba compilation
+            actual = kernels(tp, backend)
+            identical = all(np.array_equal(e.to_numpy(), a, equal_nan=True) for e, a in zip(expected, actual))
+            row[f'{backend}_ms'] = best_of(lambda: kernels(tp, backend), repeat) * 1000
+            row[f'{backend}_speedup'] = row['legacy_ms'] / row[f'{backend}_ms']
+            row[f'{backend}_identical'] = identical
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CCI and Aroon kernel benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[120, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    backends = ['numpy'] + (['numba'] if HAS_NUMBA else [])
+    header = f"{'bars':>6} {'legacy ms':>10}" + ''.join(
+        f" {b + ' ms':>10} {'speedup':>8} {'same':>5}" for b in backends)
+    print(header)
+    for row in results:
+        line = f"{row['bars']:>6} {row['legacy_ms']:>10.2f}"
+        for b in backends:
+            line += f" {row[b + '_ms']:>10.3f} {row[b + '_speedup']:>7.0f}x {str(row[b + '_identical']):>5}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
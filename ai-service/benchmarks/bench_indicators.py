@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import platform
+import argparse
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.feature_engineering.rolling_kernels import HAS_NUMBA
+from services.feature_engineering.technical_indicators import TechnicalIndicators
+from services.feature_engineering.latest_indicators import latest_indicator_summary
+from services.feature_engineering.indicator_panel import compute_panel, panel_fields_from_histories
+from _common import best_of, synthetic_ohlcv
+
+# Times every TechnicalIndicators.add_* method and add_all_indicators on
+# synthetic OHLCV bars, records peak traced memory for each, and writes the
+# results as JSON so runs from different commits can be compared. Needs no
+# network access or market data.
+#
+#   python benchmarks/bench_indicators.py [--bars 120 1000 5000] [--symbols 1]
+#       [--repeat 5] [--precision float64] [--output results.json]
+#       [--compare baseline.json]
+
+METHODS = [
+    'add_moving_averages', 'add_macd', 'add_rsi', 'add_kdj', 'add_bollinger_bands',
+    'add_atr', 'add_adx', 'add_obv', 'add_vwap', 'add_cci', 'add_williams_r',
+    'add_mfi', 'add_roc', 'add_aroon', 'add_ichimoku', 'add_all_indicators'
+]
+
+
+def peak_memory(fn: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    fn()  # warm-up, includes numba compilation
+    return {'ms': best_of(fn, repeat) * 1000, 'peak_kb': peak_memory(fn) / 1024}
+
+
+def run_case(bars: int, symbols: int, repeat: int, precision: str) -> Dict:
+    indicators = TechnicalIndicators(precision=precision)
+    frames = [synthetic_ohlcv(bars, seed) for seed in range(symbols)]
+
+    def per_symbol(method: str) -> Callable[[], object]:
+        fn = getattr(indicators, method)
+        return lambda: [fn(df) for df in frames]
+
+    results = {method: measure(per_symbol(method), repeat) for method in METHODS}
+    results['latest_indicator_summary'] = measure(lambda: [latest_indicator_summary(df) for df in frames], repeat)
+    if symbols > 1:
+        fields = panel_fields_from_histories({f'S{i:05d}': df for i, df in enumerate(frames)})
+        results['compute_panel'] = measure(lambda: compute_panel(fields, indicators=indicators), repeat)
+
+    full = indicators.add_all_indicators(frames[0])
+    case = {
+        'bars': bars,
+        'symbols': symbols,
+        'frame_kb': int(full.memory_usage(index=True).sum()) / 1024,
+        'results': results
+    }
+    if precision != 'float64':
+        reference = TechnicalIndicators().add_all_indicators(frames[0])
+        check = indicators.check_precision(reference, full)
+        case['precision_check'] = {'ok': check['ok'], 'failures': check['failures'],
+                                   'max_rel_error': max(check['max_rel_error'].values(), default=0.0)}
+    return case
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'numba': HAS_NUMBA,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def compare(results: Dict, baseline: Dict) -> List[str]:
+    # Time ratio (current / baseline) for every case and method both runs have.
+    lines = []
+    previous = {(c['bars'], c['symbols']): c['results'] for c in baseline.get('cases', [])}
+    for case in results['cases']:
+        old = previous.get((case['bars'], case['symbols']))
+        if old is None:
+            continue
+        for method, current in case['results'].items():
+            if method in old and old[method]['ms'] > 0:
+                ratio = current['ms'] / old[method]['ms']
+                lines.append(f"{case['bars']:>6} {case['symbols']:>5} {method:<26} "
+                             f"{old[method]['ms']:>10.3f} {current['ms']:>10.3f} {ratio:>6.2f}x")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Technical indicator benchmark")
+    parser.add_argument('--bars', type=int, nargs='+', default=[120, 1000, 5000])
+    parser.add_argument('--symbols', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--precision', default='float64')
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare timings with")
+    args = parser.parse_args(argv)
+
+    results = {
+        'environment': environment(),
+        'config': {'symbols': args.symbols, 'repeat': args.repeat, 'precision': args.precision},
+        'cases': [run_case(bars, args.symbols, args.repeat, args.precision) for bars in args.bars]
+    }
+
+    for case in results['cases']:
+        print(f"\n{case['bars']} bars x {case['symbols']} symbols (frame {case['frame_kb']:.1f} KB)")
+        print(f"{'method':<26} {'ms':>10} {'peak KB':>10}")
+        for method, row in case['results'].items():
+            print(f"{method:<26} {row['ms']:>10.3f} {row['peak_kb']:>10.1f}")
+        if 'precision_check' in case:
+            print(f"precision check: {case['precision_check']}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            lines = compare(results, json.load(f))
+        print(f"\n{'bars':>6} {'syms':>5} {'method':<26} {'base ms':>10} {'ms':>10} {'ratio':>7}")
+        print('\n'.join(lines))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nresults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
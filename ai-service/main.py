@@ -1,22 +1,32 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
-import akshare as ak
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import asyncio
 import logging
 import os
 import json
+from functools import partial
 
-from services.stock_data import StockDataService
+from services.history_provider import HistoryProvider
+from services.stock_data import StockDataService, history_to_records
 from services.technical_analysis import TechnicalAnalysisService
 from services.news_service import NewsService
 from services.tongyi_service import TongyiAnalysisService
-from services.feature_engineering.technical_indicators import TechnicalIndicators
+from services.ai_analysis import AIAnalysisService
+from services.analysis_jobs import AnalysisJobStore
+from services.feature_engineering.technical_indicators import CHART_OUTPUTS, TechnicalIndicators
+from services.feature_engineering.latest_indicators import latest_indicator_summary
 from services.visualization.chart_builder import StockVisualizationEngine
+from services.singleflight import singleflight
+from services.indicator_cache import IndicatorCache
+from services.executor import WorkerPools
+from services import cpu_tasks
+from services.refresher import BackgroundRefresher
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,12 +48,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-stock_service = StockDataService()
-tech_service = TechnicalAnalysisService()
+history_provider = HistoryProvider()
+stock_service = StockDataService(history_provider=history_provider)
+tech_service = TechnicalAnalysisService(history_provider=history_provider)
 news_service = NewsService()
 tongyi_service = TongyiAnalysisService()
-tech_indicators = TechnicalIndicators()
+rule_service = AIAnalysisService()
+analysis_jobs = AnalysisJobStore()
+tech_indicators = TechnicalIndicators(precision=os.getenv('INDICATOR_PRECISION', 'float64'))
 viz_engine = StockVisualizationEngine()
+indicator_cache = IndicatorCache()
+pools = WorkerPools()
+refresher = BackgroundRefresher(stock_service, history_provider)
 
 
 class StockAnalysisRequest(BaseModel):
@@ -65,6 +81,43 @@ class ChatRequest(BaseModel):
     context: Optional[str] = None
 
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def build_historical_summary(history: pd.DataFrame) -> str:
+    return f"""
+        近30日涨跌幅: {(history['close'].iloc[-1] / history['close'].iloc[-30] - 1) * 100:.2f}%
+        近60日涨跌幅: {(history['close'].iloc[-1] / history['close'].iloc[-60] - 1) * 100:.2f}%
+        30日最高价: {history['high'].iloc[-30:].max():.2f}
+        30日最低价: {history['low'].iloc[-30:].min():.2f}
+        平均成交量: {history['volume'].iloc[-20:].mean():.0f}
+        """
+
+
+def parse_sections(sections: Optional[str]) -> Optional[List[str]]:
+    # Comma-separated analysis sections; requesting any selects the compact prompt.
+    if not sections:
+        return None
+    return [s.strip() for s in sections.split(",") if s.strip()]
+
+
+@app.on_event("startup")
+async def start_refresher():
+    if os.getenv('BACKGROUND_REFRESH', 'true').lower() == 'true':
+        refresher.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_pools():
+    refresher.stop()
+    analysis_jobs.shutdown()
+    pools.shutdown()
+
+
 @app.get("/health")
 async def health():
     return {
@@ -75,6 +128,20 @@ async def health():
     }
 
 
+@app.get("/api/metrics")
+async def get_metrics():
+    return {
+        "singleflight": singleflight.get_stats(),
+        "pools": pools.get_stats(),
+        "refresher": refresher.get_stats(),
+        "indicator_cache": indicator_cache.get_stats(),
+        "llm_cache": tongyi_service.cache.get_stats(),
+        "llm_usage": tongyi_service.usage.get_stats(),
+        "analysis_jobs": analysis_jobs.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 @app.get("/api/quotes/realtime")
 async def get_realtime_quotes(codes: str = ""):
     try:
@@ -82,98 +149,237 @@ async def get_realtime_quotes(codes: str = ""):
         if not code_list:
             code_list = ["600519", "000858", "000001", "600036", "601318"]
         
-        quotes = stock_service.get_realtime_quotes(code_list)
-        return {"data": quotes, "count": len(quotes)}
+        quotes = await pools.run_io(stock_service.get_realtime_quotes, code_list)
+        return {"data": quotes, "count": len(quotes), "snapshot": stock_service.get_snapshot_info()}
     except Exception as e:
         logger.error(f"Failed to get realtime quotes: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/analyze/stock/{code}")
-async def analyze_single_stock(code: str):
+async def analyze_single_stock(code: str, sections: Optional[str] = None, mode: str = "full"):
+    # mode=fast answers with the rule-based verdict and indicators at once and
+    # runs the Tongyi analysis as a background job, polled by its id.
     try:
-        quote = stock_service.get_stock_quote(code)
+        if mode == "fast":
+            return await fast_analysis(code, parse_sections(sections))
+        
+        quote, history, news_sentiment = await asyncio.gather(
+            pools.run_io(stock_service.get_stock_quote, code),
+            pools.run_io(stock_service.get_history, code, 120),
+            pools.run_io(news_service.get_stock_sentiment, code)
+        )
         if not quote:
             raise HTTPException(status_code=404, detail=f"Stock {code} not found")
         
-        history = stock_service.get_history(code, 120)
-        if not history:
+        if history.empty:
             raise HTTPException(status_code=404, detail=f"No history data for {code}")
         
-        df = pd.DataFrame(history)
-        df['date'] = pd.to_datetime(df['date'])
-        df.set_index('date', inplace=True)
-        
-        df = tech_indicators.add_all_indicators(df)
-        
-        tech_analysis = tech_service.analyze(code)
-        news_sentiment = news_service.get_stock_sentiment(code)
-        
-        indicators_summary = tech_indicators.get_indicator_summary(df)
+        indicators_summary = await indicator_cache.get_summary(
+            code, history, partial(pools.run_cpu, latest_indicator_summary, history)
+        )
         
-        historical_summary = f"""
-        近30日涨跌幅: {(df['close'].iloc[-1] / df['close'].iloc[-30] - 1) * 100:.2f}%
-        近60日涨跌幅: {(df['close'].iloc[-1] / df['close'].iloc[-60] - 1) * 100:.2f}%
-        30日最高价: {df['high'].iloc[-30:].max():.2f}
-        30日最低价: {df['low'].iloc[-30:].min():.2f}
-        平均成交量: {df['volume'].iloc[-20:].mean():.0f}
-        """
+        historical_summary = build_historical_summary(history)
         
-        result = tongyi_service.analyze_stock(
+        result = await pools.run_io(
+            tongyi_service.analyze_stock,
             code=code,
             name=quote.get('name', ''),
             current_price=quote.get('currentPrice', 0),
             tech_indicators=indicators_summary,
             news_sentiment=news_sentiment,
-            historical_summary=historical_summary
+            historical_summary=historical_summary,
+            sections=parse_sections(sections)
         )
         
         result['indicators'] = indicators_summary
         
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to analyze stock {code}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+NEUTRAL_SENTIMENT = {"sentiment": "中性", "score": 0.5, "news_count": 0}
+
+
+async def fast_analysis(code: str, sections: Optional[List[str]]) -> Dict:
+    # Only the quote (snapshot) and history (bar store) are awaited. News
+    # sentiment comes from the sentiment cache when a recent scrape exists and
+    # is neutral otherwise; the live scrape runs in the background job.
+    quote, history = await asyncio.gather(
+        pools.run_io(stock_service.get_stock_quote, code),
+        pools.run_io(stock_service.get_history, code, 120)
+    )
+    if not quote:
+        raise HTTPException(status_code=404, detail=f"Stock {code} not found")
+    
+    if history.empty:
+        raise HTTPException(status_code=404, detail=f"No history data for {code}")
+    
+    indicators_summary = await indicator_cache.get_summary(
+        code, history, partial(pools.run_cpu, latest_indicator_summary, history)
+    )
+    cached_sentiment = news_service.get_cached_stock_sentiment(code)
+    news_sentiment = cached_sentiment or NEUTRAL_SENTIMENT
+    technical = await pools.run_io(tech_service.analyze_history, history)
+    verdict = rule_service.get_recommendation(code, technical, news_sentiment)
+    
+    async def enrich():
+        sentiment = await pools.run_io(news_service.get_stock_sentiment, code)
+        result = await pools.run_io(
+            tongyi_service.analyze_stock,
+            code=code,
+            name=quote.get('name', ''),
+            current_price=quote.get('currentPrice', 0),
+            tech_indicators=indicators_summary,
+            news_sentiment=sentiment,
+            historical_summary=build_historical_summary(history),
+            sections=sections
+        )
+        result['indicators'] = indicators_summary
+        return result
+    
+    # Requests for the same bars and sections share one background analysis.
+    job_key = (code, history.index[-1], float(history['close'].iloc[-1]),
+               tuple(sorted(sections)) if sections is not None else None)
+    job = analysis_jobs.submit(job_key, enrich)
+    
+    return {
+        "code": code,
+        "name": quote.get('name', ''),
+        "currentPrice": quote.get('currentPrice', 0),
+        "recommendation": verdict['action'],
+        "confidence": verdict['confidence'],
+        "riskLevel": verdict['risk'],
+        "reasons": verdict['reasons'],
+        "score": verdict['score'],
+        "trendDirection": technical.get('trend'),
+        "technical": technical,
+        "indicators": indicators_summary,
+        "newsSentiment": news_sentiment,
+        "sentimentSource": "cache" if cached_sentiment is not None else "neutral",
+        "analysisTime": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "source": "rule_based",
+        "job": {
+            "id": job['id'],
+            "status": job['status'],
+            "poll": f"/api/analyze/jobs/{job['id']}"
+        }
+    }
+
+
+@app.get("/api/analyze/jobs/{job_id}")
+async def get_analysis_job(job_id: str, wait: float = 0):
+    # Long polling: with wait > 0 a pending job is awaited up to that many
+    # seconds (at most 30) before its state is returned.
+    job = await analysis_jobs.get(job_id, wait=min(max(wait, 0), 30))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Analysis job {job_id} not found or expired")
+    return job
+
+
+@app.get("/api/analyze/stock/{code}/stream")
+async def stream_single_stock_analysis(code: str, sections: Optional[str] = None):
+    # Server-sent events: the quote, indicator summary and news sentiment are
+    # sent as soon as each is ready, then the model's text as 'delta' events,
+    # then the parsed analysis as 'result' and a final 'done'.
+    history_task = asyncio.ensure_future(pools.run_io(stock_service.get_history, code, 120))
+    sentiment_task = asyncio.ensure_future(pools.run_io(news_service.get_stock_sentiment, code))
+    try:
+        quote = await pools.run_io(stock_service.get_stock_quote, code)
+    except Exception as e:
+        history_task.cancel()
+        sentiment_task.cancel()
+        logger.error(f"Failed to analyze stock {code}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not quote:
+        history_task.cancel()
+        sentiment_task.cancel()
+        raise HTTPException(status_code=404, detail=f"Stock {code} not found")
+    
+    async def events():
+        try:
+            yield sse_event("quote", quote)
+            
+            history = await history_task
+            if history.empty:
+                yield sse_event("error", {"detail": f"No history data for {code}"})
+                return
+            indicators_summary = await indicator_cache.get_summary(
+                code, history, partial(pools.run_cpu, latest_indicator_summary, history)
+            )
+            yield sse_event("indicators", indicators_summary)
+            
+            news_sentiment = await sentiment_task
+            yield sse_event("sentiment", news_sentiment)
+            
+            async for kind, payload in pools.iterate_io(
+                tongyi_service.stream_analyze_stock,
+                code=code,
+                name=quote.get('name', ''),
+                current_price=quote.get('currentPrice', 0),
+                tech_indicators=indicators_summary,
+                news_sentiment=news_sentiment,
+                historical_summary=build_historical_summary(history),
+                sections=parse_sections(sections)
+            ):
+                if kind == 'result':
+                    payload = {**payload, 'indicators': indicators_summary}
+                yield sse_event(kind, payload)
+            yield sse_event("done", {"timestamp": datetime.now().isoformat()})
+        except Exception as e:
+            logger.error(f"Failed to stream analysis of {code}: {e}")
+            yield sse_event("error", {"detail": str(e)})
+        finally:
+            history_task.cancel()
+            sentiment_task.cancel()
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @app.post("/api/analyze/stocks")
 async def analyze_multiple_stocks(request: StockAnalysisRequest):
     try:
-        results = []
-        for code in request.codes:
+        codes = list(dict.fromkeys(request.codes))
+        quotes = {q['code']: q for q in await pools.run_io(stock_service.get_realtime_quotes, codes)}
+        codes = [code for code in codes if code in quotes]
+        
+        histories, sentiments = await asyncio.gather(
+            pools.run_io(lambda: dict(stock_service.get_history_bulk(codes, 60))),
+            pools.run_io(lambda: dict(news_service.get_stock_sentiment_bulk(codes)))
+        )
+        codes = [code for code in codes if not histories[code].empty]
+        
+        summaries = await asyncio.gather(
+            *[indicator_cache.get_summary(
+                code, histories[code], partial(pools.run_cpu, latest_indicator_summary, histories[code])
+            ) for code in codes],
+            return_exceptions=True
+        )
+        
+        analysis_requests = []
+        for code, indicators_summary in zip(codes, summaries):
             try:
-                quote = stock_service.get_stock_quote(code)
-                if not quote:
-                    continue
-                
-                history = stock_service.get_history(code, 60)
-                if not history:
-                    continue
-                
-                df = pd.DataFrame(history)
-                df['date'] = pd.to_datetime(df['date'])
-                df.set_index('date', inplace=True)
-                
-                df = tech_indicators.add_all_indicators(df)
+                if isinstance(indicators_summary, Exception):
+                    raise indicators_summary
                 
-                tech_analysis = tech_service.analyze(code)
-                news_sentiment = news_service.get_stock_sentiment(code)
-                indicators_summary = tech_indicators.get_indicator_summary(df)
-                
-                result = tongyi_service.analyze_stock(
-                    code=code,
-                    name=quote.get('name', ''),
-                    current_price=quote.get('currentPrice', 0),
-                    tech_indicators=indicators_summary,
-                    news_sentiment=news_sentiment
-                )
-                
-                results.append(result)
+                analysis_requests.append({
+                    "code": code,
+                    "name": quotes[code].get('name', ''),
+                    "current_price": quotes[code].get('currentPrice', 0),
+                    "tech_indicators": indicators_summary,
+                    "news_sentiment": sentiments[code]
+                })
             except Exception as e:
                 logger.warning(f"Failed to analyze {code}: {e}")
                 continue
         
+        results = await tongyi_service.analyze_stock_batch(analysis_requests, run=pools.run_io)
+        
         results.sort(key=lambda x: x.get("confidence", 0), reverse=True)
         return results
     except Exception as e:
@@ -184,15 +390,14 @@ async def analyze_multiple_stocks(request: StockAnalysisRequest):
 @app.get("/api/features/technical/{code}")
 async def get_technical_features(code: str, days: int = 120):
     try:
-        history = stock_service.get_history(code, days)
-        if not history:
+        history = await pools.run_io(stock_service.get_history, code, days)
+        if history.empty:
             raise HTTPException(status_code=404, detail=f"No history data for {code}")
         
-        df = pd.DataFrame(history)
-        df['date'] = pd.to_datetime(df['date'])
-        df.set_index('date', inplace=True)
-        
-        df = tech_indicators.add_all_indicators(df)
+        df = await indicator_cache.get_frame(
+            code, history, None,
+            partial(pools.run_cpu, cpu_tasks.indicator_frame, history, None, tech_indicators.precision)
+        )
         
         return {
             "code": code,
@@ -207,18 +412,18 @@ async def get_technical_features(code: str, days: int = 120):
 @app.get("/api/visualization/chart/{code}")
 async def get_stock_chart(code: str, days: int = 120):
     try:
-        history = stock_service.get_history(code, days)
-        if not history:
+        history = await pools.run_io(stock_service.get_history, code, days)
+        if history.empty:
             raise HTTPException(status_code=404, detail=f"No history data for {code}")
         
-        df = pd.DataFrame(history)
-        df['date'] = pd.to_datetime(df['date'])
-        df.set_index('date', inplace=True)
-        
-        df = tech_indicators.add_all_indicators(df)
+        df = await indicator_cache.get_frame(
+            code, history, CHART_OUTPUTS,
+            partial(pools.run_cpu, cpu_tasks.indicator_frame, history, CHART_OUTPUTS, tech_indicators.precision)
+        )
         
-        chart_data = viz_engine.create_candlestick_chart(
-            df, 
+        chart_data = await pools.run_cpu(
+            cpu_tasks.candlestick_chart,
+            df,
             title=f"{code} Stock Chart",
             show_volume=True,
             show_ma=True,
@@ -235,22 +440,26 @@ async def get_stock_chart(code: str, days: int = 120):
 @app.get("/api/visualization/dashboard/{code}")
 async def get_analysis_dashboard(code: str):
     try:
-        history = stock_service.get_history(code, 120)
-        if not history:
+        history = await pools.run_io(stock_service.get_history, code, 120)
+        if history.empty:
             raise HTTPException(status_code=404, detail=f"No history data for {code}")
         
-        df = pd.DataFrame(history)
-        df['date'] = pd.to_datetime(df['date'])
-        df.set_index('date', inplace=True)
-        
-        df = tech_indicators.add_all_indicators(df)
+        outputs = CHART_OUTPUTS + ['OBV']
+        df = await indicator_cache.get_frame(
+            code, history, outputs,
+            partial(pools.run_cpu, cpu_tasks.indicator_frame, history, outputs, tech_indicators.precision)
+        )
         
+        price_chart, volume_chart = await asyncio.gather(
+            pools.run_cpu(cpu_tasks.candlestick_chart, df, title=f"{code} Price"),
+            pools.run_cpu(cpu_tasks.volume_analysis_chart, df, title=f"{code} Volume")
+        )
         charts = {
-            'Price Chart': viz_engine.create_candlestick_chart(df, title=f"{code} Price"),
-            'Volume Analysis': viz_engine.create_volume_analysis_chart(df, title=f"{code} Volume")
+            'Price Chart': price_chart,
+            'Volume Analysis': volume_chart
         }
         
-        html = viz_engine.create_dashboard_html(charts, title=f"{code} Analysis Dashboard")
+        html = await pools.run_io(viz_engine.create_dashboard_html, charts, title=f"{code} Analysis Dashboard")
         
         return HTMLResponse(content=html)
     except Exception as e:
@@ -261,7 +470,7 @@ async def get_analysis_dashboard(code: str):
 @app.post("/api/chat")
 async def chat_with_ai(request: ChatRequest):
     try:
-        response = tongyi_service.chat(request.question, request.context)
+        response = await pools.run_io(tongyi_service.chat, request.question, request.context)
         return {
             "question": request.question,
             "answer": response,
@@ -272,10 +481,24 @@ async def chat_with_ai(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/chat/stream")
+async def stream_chat_with_ai(request: ChatRequest):
+    async def events():
+        try:
+            async for text in pools.iterate_io(tongyi_service.stream_chat, request.question, request.context):
+                yield sse_event("delta", text)
+            yield sse_event("done", {"question": request.question, "timestamp": datetime.now().isoformat()})
+        except Exception as e:
+            logger.error(f"Chat stream failed: {e}")
+            yield sse_event("error", {"detail": str(e)})
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @app.get("/api/news/hot")
 async def get_hot_news(limit: int = 10):
     try:
-        news = news_service.get_hot_news(limit)
+        news = await pools.run_io(news_service.get_hot_news, limit)
         return news
     except Exception as e:
         logger.error(f"Failed to get hot news: {e}")
@@ -285,7 +508,7 @@ async def get_hot_news(limit: int = 10):
 @app.get("/api/news/analyze")
 async def analyze_news(title: str):
     try:
-        result = tongyi_service.analyze_news_impact(title)
+        result = await pools.run_io(tongyi_service.analyze_news_impact, title)
         return result
     except Exception as e:
         logger.error(f"Failed to analyze news: {e}")
@@ -304,7 +527,7 @@ async def screen_stocks(request: StockScreenRequest):
             "industry": request.industry,
             "limit": request.limit
         }
-        results = stock_service.screen_stocks(conditions)
+        results = await pools.run_io(stock_service.screen_stocks, conditions)
         return results
     except Exception as e:
         logger.error(f"Failed to screen stocks: {e}")
@@ -314,7 +537,7 @@ async def screen_stocks(request: StockScreenRequest):
 @app.get("/api/stock/{code}/history")
 async def get_stock_history(code: str, days: int = 30):
     try:
-        history = stock_service.get_history(code, days)
+        history = await pools.run_io(lambda: history_to_records(stock_service.get_history(code, days)))
         return {"data": history, "count": len(history)}
     except Exception as e:
         logger.error(f"Failed to get history for {code}: {e}")
@@ -324,7 +547,7 @@ async def get_stock_history(code: str, days: int = 30):
 @app.get("/api/market/summary")
 async def get_market_summary():
     try:
-        hot_stocks = stock_service.get_hot_stocks(10)
+        hot_stocks = await pools.run_io(stock_service.get_hot_stocks, 10)
         
         market_data = {
             "hot_stocks_count": len(hot_stocks),
@@ -333,7 +556,7 @@ async def get_market_summary():
             "avg_turnover": np.mean([s.get('turnover', 0) for s in hot_stocks]) if hot_stocks else 0
         }
         
-        summary = tongyi_service.generate_market_summary(market_data)
+        summary = await pools.run_io(tongyi_service.generate_market_summary, market_data)
         
         return {
             "summary": summary,
@@ -346,5 +569,11 @@ async def get_market_summary():
 
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Serve through uvicorn's module entry point so this file is imported as
+    # `main` rather than run as __main__: spawned CPU workers re-execute a
+    # __main__ script, and this one builds every service at import.
+    import sys
+    os.execv(sys.executable, [
+        sys.executable, "-m", "uvicorn", "main:app", "--app-dir", os.path.dirname(os.path.abspath(__file__)),
+        "--host", "0.0.0.0", "--port", "8000"
+    ])
@@ -0,0 +1,106 @@
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisJobStore:
+    # Background LLM analyses addressed by job id. Submitting a key that
+    # already has a pending job returns that job, so repeated dashboard loads
+    # share one LLM call. Finished jobs are kept for `ttl` seconds for clients
+    # to poll. Used from the event loop only.
+
+    def __init__(self, ttl: float = 600, max_jobs: int = 1000):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending: Dict[Hashable, str] = {}
+        self._events: Dict[str, asyncio.Event] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._stats = {'submitted': 0, 'shared': 0, 'completed': 0, 'failed': 0, 'expired': 0}
+
+    def submit(self, key: Hashable, run: Callable[[], Awaitable[Any]]) -> Dict[str, Any]:
+        self._expire()
+        job_id = self._pending.get(key)
+        if job_id is not None:
+            self._stats['shared'] += 1
+            return self._view(job_id)
+
+        job_id = uuid.uuid4().hex
+        self._jobs[job_id] = {
+            'id': job_id,
+            'status': 'pending',
+            'result': None,
+            'error': None,
+            'created_at': time.time(),
+            'finished_at': None
+        }
+        self._pending[key] = job_id
+        self._events[job_id] = asyncio.Event()
+        self._tasks[job_id] = asyncio.ensure_future(self._run(job_id, key, run))
+        self._stats['submitted'] += 1
+        return self._view(job_id)
+
+    async def _run(self, job_id: str, key: Hashable, run: Callable[[], Awaitable[Any]]):
+        job = self._jobs[job_id]
+        try:
+            job['result'] = await run()
+            job['status'] = 'done'
+            self._stats['completed'] += 1
+        except Exception as e:
+            logger.error(f"Analysis job {job_id} failed: {e}")
+            job['status'] = 'failed'
+            job['error'] = str(e)
+            self._stats['failed'] += 1
+        finally:
+            job['finished_at'] = time.time()
+            if self._pending.get(key) == job_id:
+                del self._pending[key]
+            self._tasks.pop(job_id, None)
+            self._events.pop(job_id).set()
+
+    async def get(self, job_id: str, wait: float = 0) -> Optional[Dict[str, Any]]:
+        # With wait > 0 a pending job is awaited for up to that many seconds
+        # (long polling) before its current state is returned.
+        self._expire()
+        if job_id not in self._jobs:
+            return None
+        event = self._events.get(job_id)
+        if event is not None and wait > 0:
+            try:
+                await asyncio.wait_for(event.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+        return self._view(job_id)
+
+    def _view(self, job_id: str) -> Dict[str, Any]:
+        job = self._jobs[job_id]
+        return {**job, 'elapsed': (job['finished_at'] or time.time()) - job['created_at']}
+
+    def _expire(self):
+        now = time.time()
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job['finished_at'] is not None and now - job['finished_at'] > self.ttl]
+        # Beyond max_jobs the oldest finished jobs go first; pending ones stay.
+        excess = len(self._jobs) - len(finished) - self.max_jobs
+        if excess > 0:
+            finished += [job_id for job_id, job in self._jobs.items()
+                         if job['finished_at'] is not None and job_id not in finished][:excess]
+        for job_id in finished:
+            del self._jobs[job_id]
+        self._stats['expired'] += len(finished)
+
+    def shutdown(self):
+        for task in self._tasks.values():
+            task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'jobs': len(self._jobs),
+            'pending': len(self._pending),
+            **self._stats
+        }
@@ -0,0 +1,167 @@
+import pandas as pd
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import logging
+
+from services.providers.base import MarketDataProvider
+from services.providers.factory import get_market_data_provider
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+    logger.warning("pyarrow not installed, bar store will fall back to pickle files")
+
+
+DEFAULT_BAR_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'bars')
+
+
+class BarStore:
+    # Daily qfq bars, one file per symbol, kept with akshare's column names.
+    # After the first load only the bars missing since the last stored date
+    # are fetched from upstream. Recently used frames stay in memory (at most
+    # max_frames symbols); the rest are read back from disk when needed.
+
+    def __init__(self, base_dir: str = None, sync_interval: int = 300,
+                 provider: MarketDataProvider = None, max_frames: int = None):
+        self._provider = provider or get_market_data_provider()
+        self.base_dir = base_dir or os.getenv('BAR_STORE_DIR', DEFAULT_BAR_STORE_DIR)
+        self._sync_interval = sync_interval
+        self._ext = '.parquet' if HAS_PYARROW else '.pkl'
+        self.max_frames = max_frames or int(os.getenv('BAR_STORE_MAX_FRAMES', '256'))
+        self._frames: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._frames_lock = threading.Lock()
+        self._last_sync: Dict[str, datetime] = {}
+        self._covered_from: Dict[str, datetime] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def get_bars(self, code: str, days: int, force_sync: bool = False) -> pd.DataFrame:
+        need_start = datetime.now() - timedelta(days=days * 2)
+
+        with self._lock_for(code):
+            df = self._cached(code)
+            if df is None:
+                df = self._read(code)
+
+            if df is None or df.empty:
+                df = self._fetch(code, need_start, datetime.now())
+                self._covered_from[code] = need_start
+            elif len(df) < days and df['日期'].iloc[0] > need_start \
+                    and self._covered_from.get(code, datetime.max) > need_start:
+                df = self._merge(df, self._fetch(code, need_start, datetime.now()))
+                self._covered_from[code] = need_start
+            elif force_sync or self._needs_sync(code):
+                try:
+                    df = self._sync(code, df)
+                except Exception as e:
+                    logger.warning(f"Failed to sync bars for {code}, serving stored data: {e}")
+                    return self._slice(df, need_start, days)
+            else:
+                return self._slice(df, need_start, days)
+
+            self._last_sync[code] = datetime.now()
+            if not df.empty:
+                self._remember(code, df)
+                self._write(code, df)
+            return self._slice(df, need_start, days)
+
+    def _sync(self, code: str, df: pd.DataFrame) -> pd.DataFrame:
+        # Re-fetch from the second-to-last stored bar: the last one may have been
+        # stored intraday, while the one before it is final and tells us whether
+        # the forward adjustment has changed (ex-dividend) since it was written.
+        anchor_pos = max(len(df) - 2, 0)
+        anchor = df.iloc[anchor_pos]
+        fresh = self._fetch(code, anchor['日期'], datetime.now())
+        if fresh.empty:
+            return df
+
+        overlap = fresh[fresh['日期'] == anchor['日期']]
+        if overlap.empty or abs(float(overlap['收盘'].iloc[0]) - float(anchor['收盘'])) > 1e-6:
+            logger.info(f"Adjustment changed for {code}, reloading stored bars")
+            return self._fetch(code, df['日期'].iloc[0], datetime.now())
+
+        return self._merge(df, fresh)
+
+    def _needs_sync(self, code: str) -> bool:
+        last = self._last_sync.get(code)
+        if last is None:
+            return True
+        return (datetime.now() - last).total_seconds() >= self._sync_interval
+
+    def _fetch(self, code: str, start: datetime, end: datetime) -> pd.DataFrame:
+        df = self._provider.get_history(code, start.strftime('%Y%m%d'), end.strftime('%Y%m%d'), adjust="qfq")
+        if df is None or df.empty:
+            return pd.DataFrame()
+        df = df.copy()
+        df['日期'] = pd.to_datetime(df['日期'])
+        return df.reset_index(drop=True)
+
+    @staticmethod
+    def _merge(stored: pd.DataFrame, fresh: pd.DataFrame) -> pd.DataFrame:
+        if fresh.empty:
+            return stored
+        df = pd.concat([stored, fresh], ignore_index=True)
+        df = df.drop_duplicates(subset='日期', keep='last').sort_values('日期')
+        return df.reset_index(drop=True)
+
+    @staticmethod
+    def _slice(df: pd.DataFrame, start: datetime, days: int) -> pd.DataFrame:
+        return df[df['日期'] >= start].tail(days)
+
+    def _cached(self, code: str) -> Optional[pd.DataFrame]:
+        with self._frames_lock:
+            df = self._frames.get(code)
+            if df is not None:
+                self._frames.move_to_end(code)
+            return df
+
+    def _remember(self, code: str, df: pd.DataFrame):
+        with self._frames_lock:
+            self._frames[code] = df
+            self._frames.move_to_end(code)
+            while len(self._frames) > self.max_frames:
+                self._frames.popitem(last=False)
+
+    def _path(self, code: str) -> str:
+        return os.path.join(self.base_dir, f"{code}{self._ext}")
+
+    def _read(self, code: str) -> Optional[pd.DataFrame]:
+        path = self._path(code)
+        if not os.path.exists(path):
+            return None
+        try:
+            if HAS_PYARROW:
+                df = pd.read_parquet(path)
+            else:
+                df = pd.read_pickle(path)
+            self._remember(code, df)
+            return df
+        except Exception as e:
+            logger.warning(f"Failed to read stored bars for {code}: {e}")
+            return None
+
+    def _write(self, code: str, df: pd.DataFrame):
+        path = self._path(code)
+        tmp_path = f"{path}.tmp"
+        try:
+            if HAS_PYARROW:
+                df.to_parquet(tmp_path, index=False)
+            else:
+                df.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write stored bars for {code}: {e}")
+
+    def _lock_for(self, code: str) -> threading.Lock:
+        with self._locks_guard:
+            if code not in self._locks:
+                self._locks[code] = threading.Lock()
+            return self._locks[code]
@@ -0,0 +1,83 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_WORKERS = int(os.getenv('UPSTREAM_MAX_WORKERS', '8'))
+
+# Requests per second allowed against each upstream, shared by every worker.
+DEFAULT_RATE_LIMITS = {
+    'akshare': float(os.getenv('AKSHARE_RATE_LIMIT', '5')),
+    'dashscope': float(os.getenv('DASHSCOPE_RATE_LIMIT', '2')),
+}
+
+
+class RateLimiter:
+    # Token bucket: `rate` tokens per second, up to `burst` tokens banked.
+
+    def __init__(self, rate: float, burst: int = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(upstream: str) -> RateLimiter:
+    with _rate_limiters_lock:
+        if upstream not in _rate_limiters:
+            _rate_limiters[upstream] = RateLimiter(DEFAULT_RATE_LIMITS.get(upstream, 0))
+        return _rate_limiters[upstream]
+
+
+def iter_completed(
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: Optional[int] = None
+) -> Iterator[Tuple[Any, Any, Optional[Exception]]]:
+    # Runs fn over items on a bounded pool and yields (item, result, error)
+    # in completion order. Failures are yielded, not raised, so one bad
+    # symbol does not abort the whole batch.
+    items = list(items)
+    if not items:
+        return
+
+    workers = max(1, min(max_workers or DEFAULT_MAX_WORKERS, len(items)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, e
@@ -0,0 +1,44 @@
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from services.feature_engineering.technical_indicators import TechnicalIndicators
+from services.visualization.chart_builder import StockVisualizationEngine
+
+
+# Work handed to WorkerPools.run_cpu (as is latest_indicator_summary).
+# Spawned workers import this module to unpickle the task, so it only pulls
+# in the pure computation modules; the indicator and chart objects are built
+# per worker on first use instead of being pickled with every call.
+
+_indicators: Dict[str, TechnicalIndicators] = {}
+_viz_engine: Optional[StockVisualizationEngine] = None
+
+
+def _get_indicators(precision: str) -> TechnicalIndicators:
+    if precision not in _indicators:
+        _indicators[precision] = TechnicalIndicators(precision=precision)
+    return _indicators[precision]
+
+
+def _get_viz_engine() -> StockVisualizationEngine:
+    global _viz_engine
+    if _viz_engine is None:
+        _viz_engine = StockVisualizationEngine()
+    return _viz_engine
+
+
+def indicator_frame(history: pd.DataFrame, outputs: Optional[List[str]] = None,
+                    precision: str = 'float64') -> pd.DataFrame:
+    indicators = _get_indicators(precision)
+    if outputs is None:
+        return indicators.add_all_indicators(history)
+    return indicators.add_indicators(history, outputs)
+
+
+def candlestick_chart(df: pd.DataFrame, **kwargs) -> Any:
+    return _get_viz_engine().create_candlestick_chart(df, **kwargs)
+
+
+def volume_analysis_chart(df: pd.DataFrame, **kwargs) -> Any:
+    return _get_viz_engine().create_volume_analysis_chart(df, **kwargs)
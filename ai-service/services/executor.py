@@ -0,0 +1,150 @@
+import os
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _PoolMetrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.active = 0
+        self.max_queued = 0
+
+    def on_submit(self):
+        with self._lock:
+            self.submitted += 1
+            self.max_queued = max(self.max_queued, self.submitted - self.completed - self.active)
+
+    def on_start(self):
+        with self._lock:
+            self.active += 1
+
+    def on_finish(self, ok: bool):
+        with self._lock:
+            self.active = max(self.active - 1, 0)
+            self.completed += 1
+            if not ok:
+                self.failed += 1
+
+    def snapshot(self, workers: int, track_active: bool) -> Dict[str, Any]:
+        with self._lock:
+            pending = self.submitted - self.completed
+            return {
+                'workers': workers,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'active': self.active if track_active else min(pending, workers),
+                'queued': pending - self.active if track_active else max(pending - workers, 0),
+                'max_queued': self.max_queued
+            }
+
+
+class WorkerPools:
+    # Blocking upstream calls (akshare, dashscope, SnowNLP) run on a thread
+    # pool; CPU-heavy pandas work runs on a process pool so it does not hold
+    # the GIL of the worker serving requests. Async handlers await both.
+
+    def __init__(self, io_workers: int = None, cpu_workers: int = None):
+        self.io_workers = io_workers or int(os.getenv('IO_POOL_SIZE', '32'))
+        self.cpu_workers = cpu_workers if cpu_workers is not None else \
+            int(os.getenv('CPU_POOL_SIZE', str(min(4, os.cpu_count() or 1))))
+
+        self._io = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='io-pool')
+        self._cpu = None
+        self._cpu_lock = threading.Lock()
+        self._io_metrics = _PoolMetrics()
+        self._cpu_metrics = _PoolMetrics()
+
+    async def run_io(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        self._io_metrics.on_submit()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io, partial(self._run_tracked, fn, *args, **kwargs))
+
+    async def run_cpu(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        # With CPU_POOL_SIZE=0 the work stays in-process on the thread pool,
+        # which is cheaper when frames are small and pickling dominates.
+        if self.cpu_workers <= 0:
+            return await self.run_io(fn, *args, **kwargs)
+
+        self._cpu_metrics.on_submit()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_cpu_pool(), partial(fn, *args, **kwargs))
+        try:
+            result = await future
+        except Exception:
+            self._cpu_metrics.on_finish(False)
+            raise
+        self._cpu_metrics.on_finish(True)
+        return result
+
+    async def iterate_io(self, fn: Callable[..., Any], *args, **kwargs) -> AsyncIterator[Any]:
+        # Drives the blocking iterator fn returns on the I/O pool, one item per
+        # hop, so streamed upstream responses can be forwarded as they arrive.
+        iterator = await self.run_io(lambda: iter(fn(*args, **kwargs)))
+        done = object()
+        step = None
+        try:
+            while True:
+                # Shielded so a cancelled consumer leaves the in-flight next()
+                # to finish instead of abandoning it on the worker thread.
+                step = asyncio.ensure_future(self.run_io(next, iterator, done))
+                item = await asyncio.shield(step)
+                if item is done:
+                    return
+                yield item
+        finally:
+            # The consumer went away early: a generator cannot be closed while
+            # next() is running in it, so wait for that step, then close it to
+            # release the upstream connection. The original exception
+            # (usually CancelledError) propagates unchanged.
+            if step is not None and not step.done():
+                try:
+                    await asyncio.wait([step])
+                except BaseException:
+                    pass
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                try:
+                    await self.run_io(close)
+                except Exception as e:
+                    logger.warning(f"Failed to close streamed iterator: {e}")
+
+    def _run_tracked(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        self._io_metrics.on_start()
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            self._io_metrics.on_finish(ok)
+
+    def _get_cpu_pool(self) -> Executor:
+        with self._cpu_lock:
+            if self._cpu is None:
+                # spawn avoids forking a process that already runs the I/O threads
+                context = multiprocessing.get_context('spawn')
+                self._cpu = ProcessPoolExecutor(max_workers=self.cpu_workers, mp_context=context)
+            return self._cpu
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'io': self._io_metrics.snapshot(self.io_workers, track_active=True),
+            'cpu': self._cpu_metrics.snapshot(self.cpu_workers, track_active=False)
+        }
+
+    def shutdown(self):
+        self._io.shutdown(wait=False, cancel_futures=True)
+        if self._cpu is not None:
+            self._cpu.shutdown(wait=False, cancel_futures=True)
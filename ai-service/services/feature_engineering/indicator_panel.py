@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Mapping, Sequence
+import logging
+
+from services.feature_engineering.technical_indicators import TechnicalIndicators
+
+logger = logging.getLogger(__name__)
+
+
+PANEL_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class IndicatorPanel:
+    # All indicators for many symbols, one (dates x symbols) frame per column.
+    # Slice by symbol for the per-symbol layout add_all_indicators returns,
+    # or by date for a cross-section to screen and rank on.
+
+    def __init__(self, fields: Dict[str, pd.DataFrame], indicators: Dict[str, pd.DataFrame]):
+        self.fields = fields
+        self.indicators = indicators
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.fields['close'].columns)
+
+    @property
+    def dates(self) -> pd.Index:
+        return self.fields['close'].index
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.fields) + list(self.indicators)
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        if name in self.indicators:
+            return self.indicators[name]
+        return self.fields[name]
+
+    def symbol(self, code: str) -> pd.DataFrame:
+        frames = {**self.fields, **self.indicators}
+        df = pd.DataFrame({name: frame[code] for name, frame in frames.items()}, index=self.dates)
+        # Dates the symbol has no bar for are padding from the shared axis.
+        return df[df[PANEL_FIELDS].notna().any(axis=1)]
+
+    def date(self, date: Any) -> pd.DataFrame:
+        frames = {**self.fields, **self.indicators}
+        position = self.dates.get_loc(pd.Timestamp(date)) if not isinstance(date, int) else date
+        return pd.DataFrame({name: frame.iloc[position] for name, frame in frames.items()})
+
+    def latest(self) -> pd.DataFrame:
+        return self.date(-1)
+
+
+def compute_panel(
+    fields: Mapping[str, Any],
+    symbols: Sequence[str] = None,
+    dates: Sequence[Any] = None,
+    indicators: TechnicalIndicators = None
+) -> IndicatorPanel:
+    # fields maps each OHLCV name to a (symbols x dates) DataFrame, or to a
+    # 2-D array when symbols and dates are given. Every indicator is computed
+    # along the date axis for all symbols at once with the same helpers
+    # add_all_indicators uses.
+    indicators = indicators or TechnicalIndicators()
+    missing = [name for name in PANEL_FIELDS if name not in fields]
+    if missing:
+        raise ValueError(f"Missing panel fields: {missing}")
+
+    wide = {}
+    for name in PANEL_FIELDS:
+        values = fields[name]
+        if isinstance(values, pd.DataFrame):
+            frame = values.T
+        else:
+            frame = pd.DataFrame(np.asarray(values, dtype=np.float64).T, index=dates, columns=symbols)
+        wide[name] = frame.astype(np.float64)
+
+    reference = wide['close']
+    for name, frame in wide.items():
+        if not (frame.index.equals(reference.index) and frame.columns.equals(reference.columns)):
+            wide[name] = frame.reindex(index=reference.index, columns=reference.columns)
+
+    has_bar = np.zeros(reference.shape, dtype=bool)
+    for frame in wide.values():
+        has_bar |= frame.notna().to_numpy()
+    if has_bar.all():
+        return IndicatorPanel(wide, indicators.compute_columns(wide))
+
+    # Symbols listed later or suspended have dates without bars. Each
+    # symbol's bars are moved to the top of its column so windows only see
+    # real bars, as in a per-symbol frame, and results are put back on
+    # their dates afterwards.
+    order = np.argsort(~has_bar, axis=0, kind='stable')
+    compact = {
+        name: pd.DataFrame(np.take_along_axis(frame.to_numpy(), order, axis=0), columns=reference.columns)
+        for name, frame in wide.items()
+    }
+    columns = {}
+    for name, values in indicators.compute_columns(compact).items():
+        result = np.empty(values.shape, dtype=values.dtypes.iloc[0])
+        np.put_along_axis(result, order, values.to_numpy(), axis=0)
+        result[~has_bar] = np.nan if result.dtype.kind == 'f' else 0
+        columns[name] = pd.DataFrame(result, index=reference.index, columns=reference.columns)
+
+    return IndicatorPanel(wide, columns)
+
+
+def panel_fields_from_histories(histories: Mapping[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    # Aligns date-indexed per-symbol histories (HistoryProvider frames) on
+    # the union of their dates as (symbols x dates) frames for compute_panel.
+    histories = {code: df for code, df in histories.items() if df is not None and not df.empty}
+    return {
+        name: pd.DataFrame({code: df[name] for code, df in histories.items()}).sort_index().T
+        for name in PANEL_FIELDS
+    }
@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+import logging
+
+from services.feature_engineering.rolling_kernels import rolling_extreme
+from services.feature_engineering.technical_indicators import SIGNAL_OUTPUTS, SUMMARY_FIELDS
+
+logger = logging.getLogger(__name__)
+
+
+NAN = np.float64(np.nan)
+
+# Latest-bar evaluation of the indicators get_indicator_summary reads, on raw
+# arrays instead of the full indicator frame. Rolling means, sums, std and
+# EMAs run through pandas' own rolling/ewm over the whole array: its rolling
+# sums carry a running compensation from the first bar and EMAs carry their
+# whole history, so a trailing-window computation can differ in the last bit
+# and flip a crossover when prices tie. Those passes are O(n) in C; extremes
+# and mean deviations only look at the trailing window. Signals match the
+# full pipeline exactly and values to floating-point rounding.
+
+
+def _tail(values: np.ndarray, end: int, window: int) -> Optional[np.ndarray]:
+    start = end - window + 1
+    if start < 0 or end < 0:
+        return None
+    return values[start:end + 1]
+
+
+def _rolling(window: int, *columns: np.ndarray):
+    # One pandas rolling over several equal-length arrays; each column is
+    # aggregated independently, exactly as its own Series would be.
+    return pd.DataFrame(np.column_stack(columns)).rolling(window=window)
+
+
+def _rolling_mean(window: int, *columns: np.ndarray) -> np.ndarray:
+    means = _rolling(window, *columns).mean().to_numpy().T
+    return means[0] if len(columns) == 1 else means
+
+
+def _max(values: np.ndarray, end: int, window: int) -> np.float64:
+    tail = _tail(values, end, window)
+    return NAN if tail is None else tail.max()
+
+
+def _min(values: np.ndarray, end: int, window: int) -> np.float64:
+    tail = _tail(values, end, window)
+    return NAN if tail is None else tail.min()
+
+
+def _ewm(values: np.ndarray, **params) -> np.ndarray:
+    return pd.Series(values).ewm(adjust=False, **params).mean().to_numpy()
+
+
+def _cross(fast: np.ndarray, slow: np.ndarray) -> int:
+    if len(fast) < 2:
+        return 0
+    if fast[-1] > slow[-1] and fast[-2] <= slow[-2]:
+        return 1
+    if fast[-1] < slow[-1] and fast[-2] >= slow[-2]:
+        return -1
+    return 0
+
+
+def _level(buy: bool, sell: bool) -> int:
+    if sell:
+        return -1
+    return 1 if buy else 0
+
+
+def latest_indicator_values(df: pd.DataFrame) -> Dict[str, float]:
+    close = df['close'].to_numpy(dtype=np.float64)
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    volume = df['volume'].to_numpy(dtype=np.float64)
+    t = len(close) - 1
+    o = {}
+
+    with np.errstate(all='ignore'):
+        prev_close = np.concatenate(([np.nan], close[:-1]))
+
+        tp = (high + low + close) / 3
+        direction = (close > prev_close).astype(np.int64) - (close < prev_close).astype(np.int64)
+        flow = direction * volume
+        obv = np.nancumsum(flow)
+        obv[np.isnan(flow)] = np.nan
+
+        means = {period: _rolling_mean(period, close) for period in (5, 10, 60)}
+        means[20], tp_mean, obv_ma = _rolling_mean(20, close, tp, obv)
+        for period in (5, 10, 20, 60):
+            o[f'MA{period}'] = means[period][t]
+        o['SMA_SIGNAL'] = _cross(means[5][-2:], means[20][-2:])
+
+        macd = _ewm(close, span=12) - _ewm(close, span=26)
+        macd_signal = _ewm(macd, span=9)
+        o['MACD'] = macd[t]
+        o['MACD_SIGNAL'] = macd_signal[t]
+        o['MACD_HISTOGRAM'] = macd[t] - macd_signal[t]
+        o['MACD_SIGNAL_TYPE'] = _cross(macd[-2:], macd_signal[-2:])
+
+        delta = close - prev_close
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+        plus_dm = np.diff(high, prepend=np.nan)
+        minus_dm = np.diff(low, prepend=np.nan)
+        plus_dm = np.where(plus_dm < 0, 0.0, plus_dm)
+        minus_dm = np.abs(np.where(minus_dm > 0, 0.0, minus_dm))
+        avg_gain, avg_loss, atr, plus_dm_mean, minus_dm_mean = _rolling_mean(
+            14, gain, loss, tr, plus_dm, minus_dm)
+
+        rs = avg_gain[t] / avg_loss[t]
+        rsi = 100 - (100 / (1 + rs))
+        o['RSI'] = rsi
+        o['RSI_SIGNAL'] = _level(rsi < 30, rsi > 70)
+
+        high_max, _ = rolling_extreme(high, 9, is_max=True)
+        low_min, _ = rolling_extreme(low, 9, is_max=False)
+        k = _ewm((close - low_min) / (high_max - low_min) * 100, alpha=1 / 3)
+        d = _ewm(k, alpha=1 / 3)
+        o['K'] = k[t]
+        o['D'] = d[t]
+        o['J'] = 3 * k[t] - 2 * d[t]
+        o['KDJ_SIGNAL'] = _cross(k[-2:], d[-2:])
+
+        middle = means[20][t]
+        std = _rolling(20, close).std().to_numpy()[t, 0]
+        upper = middle + std * 2
+        lower = middle - std * 2
+        o['BB_UPPER'] = upper
+        o['BB_LOWER'] = lower
+        o['BB_WIDTH'] = (upper - lower) / middle * 100
+        o['BB_SIGNAL'] = _level(close[t] < lower, close[t] > upper)
+
+        o['ATR'] = atr[t]
+
+        plus_di = 100 * (plus_dm_mean / atr)
+        minus_di = 100 * (minus_dm_mean / atr)
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+        adx = _rolling_mean(14, dx)[t]
+        o['ADX'] = adx
+        o['ADX_SIGNAL'] = _level(plus_di[-1] > minus_di[-1] and adx > 25,
+                                 plus_di[-1] < minus_di[-1] and adx > 25)
+
+        o['OBV'] = obv[t]
+        o['OBV_SIGNAL'] = _cross(obv[-2:], obv_ma[-2:])
+
+        vwap = np.nansum(tp * volume) / np.nansum(volume)
+        if np.isnan(tp[t] * volume[t]) or np.isnan(volume[t]):
+            vwap = NAN
+        o['VWAP'] = vwap
+        o['VWAP_SIGNAL'] = _level(close[t] > vwap, close[t] < vwap)
+
+        window = _tail(tp, t, 20)
+        if window is None:
+            cci = NAN
+        else:
+            mad = np.abs(window - window.mean()).mean()
+            cci = (tp[t] - tp_mean[t]) / (0.015 * mad)
+        o['CCI'] = cci
+        o['CCI_SIGNAL'] = _level(cci < -100, cci > 100)
+
+        high14, low14 = _max(high, t, 14), _min(low, t, 14)
+        williams_r = (high14 - close[t]) / (high14 - low14) * -100
+        o['WILLIAMS_R'] = williams_r
+        o['WR_SIGNAL'] = _level(williams_r < -80, williams_r > -20)
+
+        mf = tp * volume
+        prev_tp = np.concatenate(([np.nan], tp[:-1]))
+        positive = np.where(tp > prev_tp, mf, 0.0)
+        negative = np.where(tp < prev_tp, mf, 0.0)
+        positive_sum, negative_sum = _rolling(14, positive, negative).sum().to_numpy()[t]
+        mfi = 100 - (100 / (1 + positive_sum / negative_sum))
+        o['MFI'] = mfi
+        o['MFI_SIGNAL'] = _level(mfi < 20, mfi > 80)
+
+        close_12 = close[t - 12] if t >= 12 else NAN
+        roc = (close[t] - close_12) / close_12 * 100
+        o['ROC'] = roc
+        o['ROC_SIGNAL'] = _level(roc > 0, roc < 0)
+
+        window_high, window_low = _tail(high, t, 26), _tail(low, t, 26)
+        if window_high is None or np.isnan(window_high).any() or np.isnan(window_low).any():
+            oscillator = NAN
+        else:
+            oscillator = (25 - window_high.argmax()) / 25 * 100 - (25 - window_low.argmin()) / 25 * 100
+        o['AROON_SIGNAL'] = _level(oscillator > 50, oscillator < -50)
+
+        shifted = t - 26
+        tenkan = (_max(high, shifted, 9) + _min(low, shifted, 9)) / 2
+        kijun = (_max(high, shifted, 26) + _min(low, shifted, 26)) / 2
+        senkou_a = (tenkan + kijun) / 2
+        senkou_b = (_max(high, shifted, 52) + _min(low, shifted, 52)) / 2
+        o['ICHIMOKU_SIGNAL'] = _level(
+            close[t] > senkou_a and close[t] > senkou_b,
+            close[t] < senkou_a and close[t] < senkou_b)
+
+    return o
+
+
+def latest_indicator_summary(df: pd.DataFrame) -> Dict:
+    # Same dictionary TechnicalIndicators.get_indicator_summary builds from
+    # the full indicator frame, computed from the raw OHLCV history alone.
+    if df.empty:
+        return {}
+
+    values = latest_indicator_values(df)
+    summary = {group: {} for group in SUMMARY_FIELDS}
+    for group, cols in SUMMARY_FIELDS.items():
+        for col in cols:
+            summary[group][col] = None if np.isnan(values[col]) else float(values[col])
+    summary['signals'] = {
+        col: 0 if np.isnan(values[col]) else int(values[col]) for col in SIGNAL_OUTPUTS
+    }
+    return summary
@@ -0,0 +1,214 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+# Upper bound on the temporary (rows x columns x window) view materialised by
+# the NumPy kernels; wide panels are processed in column chunks below it.
+CHUNK_ELEMENTS = 4_000_000
+
+# NumPy sums blocks of up to 128 values with eight interleaved accumulators;
+# the numba MAD kernel reproduces that order, so longer windows use NumPy.
+PAIRWISE_BLOCK = 128
+
+# Rolling kernels over the time axis (axis 0) of 1-D series or 2-D
+# (dates x symbols) arrays. A window containing NaN yields NaN, matching
+# pandas rolling with min_periods=window.
+
+
+def _resolve_backend(backend: Optional[str]) -> str:
+    if backend is None:
+        return 'numba' if HAS_NUMBA else 'numpy'
+    if backend == 'numba' and not HAS_NUMBA:
+        raise ValueError("numba backend requested but numba is not installed")
+    if backend not in ('numba', 'numpy'):
+        raise ValueError(f"Unknown kernel backend: {backend}")
+    return backend
+
+
+def _as_2d(values) -> Tuple[np.ndarray, tuple]:
+    arr = np.ascontiguousarray(values, dtype=np.float64)
+    return arr.reshape(len(arr), -1), arr.shape
+
+
+def _column_chunks(arr: np.ndarray, window: int):
+    step = max(1, CHUNK_ELEMENTS // max(len(arr) * window, 1))
+    for start in range(0, arr.shape[1], step):
+        yield slice(start, start + step)
+
+
+def rolling_mad(values, window: int, backend: str = None) -> np.ndarray:
+    # Mean absolute deviation around the window mean, as
+    # rolling(window).apply(lambda x: np.abs(x - x.mean()).mean()).
+    arr, shape = _as_2d(values)
+    if _resolve_backend(backend) == 'numba' and window <= PAIRWISE_BLOCK:
+        out = _mad_numba(arr, window)
+    else:
+        out = _mad_numpy(arr, window)
+    return out.reshape(shape)
+
+
+def rolling_extreme(values, window: int, is_max: bool = True,
+                    backend: str = None) -> Tuple[np.ndarray, np.ndarray]:
+    # Rolling max (or min) and the position of the first occurrence of that
+    # extreme within each window (0 = oldest bar), as np.argmax/argmin would
+    # report it. Positions are float so incomplete windows can be NaN.
+    arr, shape = _as_2d(values)
+    if _resolve_backend(backend) == 'numba':
+        extremes, positions = _extreme_numba(arr, window, is_max)
+    else:
+        extremes, positions = _extreme_numpy(arr, window, is_max)
+    return extremes.reshape(shape), positions.reshape(shape)
+
+
+def _mad_numpy(arr: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(arr.shape, np.nan)
+    if window > len(arr):
+        return out
+    for cols in _column_chunks(arr, window):
+        windows = sliding_window_view(arr[:, cols], window, axis=0)
+        mean = windows.mean(axis=-1, keepdims=True)
+        out[window - 1:, cols] = np.abs(windows - mean).mean(axis=-1)
+    return out
+
+
+def _extreme_numpy(arr: np.ndarray, window: int, is_max: bool) -> Tuple[np.ndarray, np.ndarray]:
+    # O(n) without numba: split the axis into blocks of `window` bars and take
+    # a running extreme forwards and backwards within each block. A window
+    # spans the tail of one block and the head of the next, so its extreme is
+    # the better of the backward run at its start and the forward run at its
+    # end, with the backward (earlier) side winning ties.
+    n, k = arr.shape
+    extremes = np.full(arr.shape, np.nan)
+    positions = np.full(arr.shape, np.nan)
+    if window > n:
+        return extremes, positions
+    blocks = -(-n // window)
+    size = blocks * window
+    values = np.full((size, k), -np.inf)
+    values[:n] = arr if is_max else -arr
+    values[:n][np.isnan(arr)] = -np.inf
+    index = np.broadcast_to(np.arange(size)[:, None], (size, k))
+
+    shaped = values.reshape(blocks, window, k)
+    forward = np.maximum.accumulate(shaped, axis=1)
+    backward = np.maximum.accumulate(shaped[:, ::-1], axis=1)[:, ::-1]
+
+    # Forward run: the position is the latest strict new high so far.
+    previous = np.concatenate((np.full((blocks, 1, k), -np.inf), forward[:, :-1]), axis=1)
+    new_high = (shaped > previous) | (np.arange(window)[None, :, None] == 0)
+    forward_pos = np.maximum.accumulate(
+        np.where(new_high, index.reshape(blocks, window, k), -1), axis=1).reshape(size, k)
+    # Backward run: the position is the first bar at or above everything after it.
+    at_high = shaped == backward
+    backward_pos = np.minimum.accumulate(
+        np.where(at_high, index.reshape(blocks, window, k), size)[:, ::-1], axis=1)[:, ::-1].reshape(size, k)
+    forward = forward.reshape(size, k)
+    backward = backward.reshape(size, k)
+
+    start = np.arange(n - window + 1)
+    end = start + window - 1
+    first = backward[start] >= forward[end]
+    pos = np.where(first, backward_pos[start], forward_pos[end])
+
+    nans = np.concatenate((np.zeros((1, k), dtype=np.int64), np.cumsum(np.isnan(arr), axis=0)))
+    valid = nans[end + 1] == nans[start]
+    picked = np.take_along_axis(arr, pos, axis=0)
+    extremes[window - 1:] = np.where(valid, picked, np.nan)
+    positions[window - 1:] = np.where(valid, pos - start[:, None], np.nan)
+    return extremes, positions
+
+
+if HAS_NUMBA:
+
+    @numba.njit(cache=True)
+    def _pairwise_sum(values):
+        # NumPy's summation order for short arrays (eight interleaved
+        # accumulators), so results match the NumPy backend bit for bit.
+        n = len(values)
+        if n < 8:
+            total = 0.0
+            for t in range(n):
+                total += values[t]
+            return total
+        acc = values[:8].copy()
+        t = 8
+        while t < n - n % 8:
+            for r in range(8):
+                acc[r] += values[t + r]
+            t += 8
+        total = ((acc[0] + acc[1]) + (acc[2] + acc[3])) + ((acc[4] + acc[5]) + (acc[6] + acc[7]))
+        while t < n:
+            total += values[t]
+            t += 1
+        return total
+
+    @numba.njit(cache=True)
+    def _mad_numba(arr, window):
+        n, k = arr.shape
+        out = np.full((n, k), np.nan)
+        deviations = np.empty(window)
+        for j in range(k):
+            column = arr[:, j].copy()
+            last_nan = -1
+            for i in range(n):
+                if np.isnan(column[i]):
+                    last_nan = i
+                if i < window - 1 or last_nan > i - window:
+                    continue
+                values = column[i - window + 1:i + 1]
+                mean = _pairwise_sum(values) / window
+                for t in range(window):
+                    deviations[t] = abs(values[t] - mean)
+                out[i, j] = _pairwise_sum(deviations) / window
+        return out
+
+    @numba.njit(cache=True)
+    def _extreme_numba(arr, window, is_max):
+        # Monotonic deque of indices: O(n) per column. Only strictly better
+        # values evict the tail, so the front is the earliest extreme.
+        n, k = arr.shape
+        extremes = np.full((n, k), np.nan)
+        positions = np.full((n, k), np.nan)
+        deque = np.empty(n, dtype=np.int64)
+        for j in range(k):
+            head = 0
+            tail = 0
+            last_nan = -1
+            for i in range(n):
+                x = arr[i, j]
+                if np.isnan(x):
+                    last_nan = i
+                else:
+                    if is_max:
+                        while tail > head and arr[deque[tail - 1], j] < x:
+                            tail -= 1
+                    else:
+                        while tail > head and arr[deque[tail - 1], j] > x:
+                            tail -= 1
+                    deque[tail] = i
+                    tail += 1
+                while tail > head and deque[head] <= i - window:
+                    head += 1
+                if i < window - 1 or last_nan > i - window:
+                    continue
+                extremes[i, j] = arr[deque[head], j]
+                positions[i, j] = deque[head] - (i - window + 1)
+        return extremes, positions
+
+else:
+
+    def _mad_numba(arr, window):
+        raise RuntimeError("numba is not installed")
+
+    def _extreme_numba(arr, window, is_max):
+        raise RuntimeError("numba is not installed")
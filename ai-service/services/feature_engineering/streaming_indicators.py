@@ -0,0 +1,594 @@
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+import logging
+
+import pandas as pd
+
+from services.feature_engineering.technical_indicators import ALL_OUTPUTS, MA_PERIODS, TechnicalIndicators
+
+logger = logging.getLogger(__name__)
+
+
+NAN = float('nan')
+
+
+def _div(a: float, b: float) -> float:
+    # NumPy division semantics (x/0 -> +-inf, 0/0 -> nan) without exceptions.
+    if b == 0:
+        if a != a or a == 0:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+def _cross(a: float, b: float, prev_a: float, prev_b: float) -> int:
+    if a > b and prev_a <= prev_b:
+        return 1
+    if a < b and prev_a >= prev_b:
+        return -1
+    return 0
+
+
+def _band(value: float, buy_below: float, sell_above: float) -> int:
+    if value < buy_below:
+        return 1
+    if value > sell_above:
+        return -1
+    return 0
+
+
+# Every primitive below supports push(x) for a new bar and replace(x) to revise
+# the most recent bar (intraday updates), and reproduces the pandas operation
+# used by TechnicalIndicators exactly, including its NaN handling. The one
+# exception is rolling std on (near-)flat windows, where the variance residue
+# can differ from pandas' by ~1e-15 (~1e-7 after the square root).
+
+class _Ewm:
+    # Series.ewm(alpha=..., adjust=False).mean() with ignore_na=False.
+
+    __slots__ = ('alpha', 'weighted', 'old_wt', 'prev')
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.prev = (NAN, 1.0)
+
+    def push(self, x: float) -> float:
+        self.prev = (self.weighted, self.old_wt)
+        return self._apply(x)
+
+    def replace(self, x: float) -> float:
+        self.weighted, self.old_wt = self.prev
+        return self._apply(x)
+
+    def _apply(self, x: float) -> float:
+        if self.weighted == self.weighted:
+            self.old_wt *= 1 - self.alpha
+            if x == x:
+                if self.weighted != x:
+                    self.weighted = (self.old_wt * self.weighted + self.alpha * x) / (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif x == x:
+            self.weighted = x
+        return self.weighted
+
+
+def _pairwise_sum(values: List[float]) -> float:
+    # NumPy's summation order for short arrays (eight interleaved
+    # accumulators), so window means match np.mean bit for bit.
+    n = len(values)
+    if n < 8:
+        total = 0.0
+        for v in values:
+            total += v
+        return total
+    acc = list(values[:8])
+    t = 8
+    while t < n - n % 8:
+        for r in range(8):
+            acc[r] += values[t + r]
+        t += 8
+    total = ((acc[0] + acc[1]) + (acc[2] + acc[3])) + ((acc[4] + acc[5]) + (acc[6] + acc[7]))
+    while t < n:
+        total += values[t]
+        t += 1
+    return total
+
+
+class _Rolling:
+    # rolling(window).mean()/.sum()/.std() with min_periods=window, updated
+    # the way pandas' window aggregations update: the sum with Kahan
+    # compensation (separate terms for added and removed values), the
+    # variance with compensated Welford steps, and a window of identical
+    # values giving that value exactly for mean and sum. Nothing is re-summed,
+    # so results carry the same rounding as the batch frame.
+
+    __slots__ = ('window', 'buf', 'nobs', 'total', 'add_comp', 'remove_comp', 'same', 'last', 'negs',
+                 'mean', 'ssq', 'var_add_comp', 'var_remove_comp', 'saved')
+
+    def __init__(self, window: int):
+        self.window = window
+        self.buf = deque(maxlen=window)
+        self.nobs = 0
+        self.total = 0.0
+        self.add_comp = 0.0
+        self.remove_comp = 0.0
+        self.same = 0
+        self.last = NAN
+        self.negs = 0
+        self.mean = 0.0
+        self.ssq = 0.0
+        self.var_add_comp = 0.0
+        self.var_remove_comp = 0.0
+        self.saved = None
+
+    def push(self, x: float):
+        if len(self.buf) == self.window:
+            self._remove(self.buf[0])
+        self.saved = self._state()
+        self.buf.append(x)
+        self._add(x)
+
+    def replace(self, x: float):
+        # Undo the last add; the removal that preceded it stays applied.
+        (self.nobs, self.total, self.add_comp, self.same, self.last, self.negs,
+         self.mean, self.ssq, self.var_add_comp) = self.saved
+        self.buf[-1] = x
+        self._add(x)
+
+    def _state(self) -> tuple:
+        return (self.nobs, self.total, self.add_comp, self.same, self.last, self.negs,
+                self.mean, self.ssq, self.var_add_comp)
+
+    def _add(self, x: float):
+        if x != x:
+            return
+        self.nobs += 1
+        y = x - self.add_comp
+        t = self.total + y
+        self.add_comp = t - self.total - y
+        self.total = t
+        self.same = self.same + 1 if x == self.last else 1
+        self.last = x
+        if x < 0:
+            self.negs += 1
+
+        prev_mean = self.mean - self.var_add_comp
+        y = x - self.var_add_comp
+        t = y - self.mean
+        self.var_add_comp = t + self.mean - y
+        self.mean += t / self.nobs
+        self.ssq += (x - prev_mean) * (x - self.mean)
+
+    def _remove(self, x: float):
+        if x != x:
+            return
+        self.nobs -= 1
+        y = -x - self.remove_comp
+        t = self.total + y
+        self.remove_comp = t - self.total - y
+        self.total = t
+        if x < 0:
+            self.negs -= 1
+
+        if self.nobs:
+            prev_mean = self.mean - self.var_remove_comp
+            y = x - self.var_remove_comp
+            t = y - self.mean
+            self.var_remove_comp = t + self.mean - y
+            self.mean -= t / self.nobs
+            self.ssq -= (x - prev_mean) * (x - self.mean)
+        else:
+            self.mean = 0.0
+            self.ssq = 0.0
+
+    @property
+    def full(self) -> bool:
+        return self.nobs == self.window
+
+    @property
+    def constant(self) -> bool:
+        return self.same >= self.nobs
+
+    def get_mean(self) -> float:
+        if not self.full:
+            return NAN
+        if self.constant:
+            return self.last
+        mean = self.total / self.nobs
+        if self.negs == 0 and mean < 0:
+            return 0.0
+        if self.negs == self.nobs and mean > 0:
+            return 0.0
+        return mean
+
+    def get_sum(self) -> float:
+        if not self.full:
+            return NAN
+        return self.last * self.nobs if self.constant else self.total
+
+    def get_std(self) -> float:
+        if not self.full or self.window < 2:
+            return NAN
+        return math.sqrt(max(self.ssq / (self.nobs - 1), 0.0))
+
+    def get_mad(self) -> float:
+        # Mean absolute deviation is not decomposable; it costs O(window),
+        # which is constant for the fixed CCI period. Summed in NumPy's
+        # order, as the batch kernel does.
+        if not self.full:
+            return NAN
+        values = list(self.buf)
+        mean = _pairwise_sum(values) / self.window
+        return _pairwise_sum([abs(v - mean) for v in values]) / self.window
+
+
+class _RollingExtreme:
+    # rolling(window).max()/.min() plus the age of the extreme, via a
+    # monotonic deque. On ties the earliest bar wins, like np.argmax/argmin.
+
+    __slots__ = ('window', 'is_max', 'buf', 'mono', 'index', 'nans')
+
+    def __init__(self, window: int, is_max: bool):
+        self.window = window
+        self.is_max = is_max
+        self.buf = deque(maxlen=window)
+        self.mono = deque()
+        self.index = -1
+        self.nans = 0
+
+    def push(self, x: float):
+        if len(self.buf) == self.window and self.buf[0] != self.buf[0]:
+            self.nans -= 1
+        self.buf.append(x)
+        self.index += 1
+        if x != x:
+            self.nans += 1
+        else:
+            self._insert(self.index, x)
+        while self.mono and self.mono[0][0] <= self.index - self.window:
+            self.mono.popleft()
+
+    def replace(self, x: float):
+        # Popped entries cannot be restored cheaply, so the deque is rebuilt
+        # from the window buffer: O(window), constant for a fixed period.
+        if self.buf[-1] != self.buf[-1]:
+            self.nans -= 1
+        self.buf[-1] = x
+        if x != x:
+            self.nans += 1
+        self.mono.clear()
+        start = self.index - len(self.buf) + 1
+        for offset, value in enumerate(self.buf):
+            if value == value:
+                self._insert(start + offset, value)
+
+    def _insert(self, i: int, x: float):
+        if self.is_max:
+            while self.mono and self.mono[-1][1] < x:
+                self.mono.pop()
+        else:
+            while self.mono and self.mono[-1][1] > x:
+                self.mono.pop()
+        self.mono.append((i, x))
+
+    @property
+    def full(self) -> bool:
+        return len(self.buf) == self.window and self.nans == 0
+
+    def value(self) -> float:
+        return self.mono[0][1] if self.full else NAN
+
+    def age(self) -> float:
+        # Bars since the extreme, i.e. (window - 1) - argmax within the window.
+        return float(self.index - self.mono[0][0]) if self.full else NAN
+
+
+class _Lag:
+    # Series.shift(n) for the latest bar.
+
+    __slots__ = ('buf',)
+
+    def __init__(self, n: int):
+        self.buf = deque(maxlen=n + 1)
+
+    def push(self, x: float) -> float:
+        self.buf.append(x)
+        return self.get()
+
+    def replace(self, x: float) -> float:
+        self.buf[-1] = x
+        return self.get()
+
+    def get(self) -> float:
+        return self.buf[0] if len(self.buf) == self.buf.maxlen else NAN
+
+
+class _Cumsum:
+
+    __slots__ = ('total', 'prev')
+
+    def __init__(self):
+        self.total = 0.0
+        self.prev = 0.0
+
+    def push(self, x: float) -> float:
+        self.prev = self.total
+        return self._apply(x)
+
+    def replace(self, x: float) -> float:
+        self.total = self.prev
+        return self._apply(x)
+
+    def _apply(self, x: float) -> float:
+        if x != x:
+            return NAN
+        self.total += x
+        return self.total
+
+
+class _SymbolState:
+
+    def __init__(self):
+        self.bars = 0
+        self.last_date = None
+        self.prev_bar: Dict[str, float] = {}
+        self.bar: Dict[str, float] = {}
+        self.prev_out: Dict[str, float] = {}
+        self.out: Dict[str, float] = {}
+
+        self.ma = {p: _Rolling(p) for p in MA_PERIODS}
+        self.ema = {p: _Ewm(2 / (p + 1)) for p in MA_PERIODS}
+        self.ema12 = _Ewm(2 / 13)
+        self.ema26 = _Ewm(2 / 27)
+        self.macd_signal = _Ewm(2 / 10)
+        self.rsi_gain = _Rolling(14)
+        self.rsi_loss = _Rolling(14)
+        self.high9 = _RollingExtreme(9, True)
+        self.low9 = _RollingExtreme(9, False)
+        self.k = _Ewm(1 / 3)
+        self.d = _Ewm(1 / 3)
+        self.bb = _Rolling(20)
+        self.tr14 = _Rolling(14)
+        self.plus_dm = _Rolling(14)
+        self.minus_dm = _Rolling(14)
+        self.dx = _Rolling(14)
+        self.obv = _Cumsum()
+        self.obv_ma = _Rolling(20)
+        self.vwap_pv = _Cumsum()
+        self.vwap_v = _Cumsum()
+        self.cci = _Rolling(20)
+        self.high14 = _RollingExtreme(14, True)
+        self.low14 = _RollingExtreme(14, False)
+        self.mfi_pos = _Rolling(14)
+        self.mfi_neg = _Rolling(14)
+        self.roc_lag = _Lag(12)
+        self.aroon_high = _RollingExtreme(26, True)
+        self.aroon_low = _RollingExtreme(26, False)
+        self.high26 = _RollingExtreme(26, True)
+        self.low26 = _RollingExtreme(26, False)
+        self.high52 = _RollingExtreme(52, True)
+        self.low52 = _RollingExtreme(52, False)
+        self.senkou_a = _Lag(26)
+        self.senkou_b = _Lag(26)
+
+    def apply(self, bar: Dict[str, float], revise: bool) -> Dict[str, float]:
+        if revise:
+            self.bar = bar
+        else:
+            self.prev_bar, self.bar = self.bar, bar
+            self.prev_out = self.out
+            self.bars += 1
+
+        op = 'replace' if revise else 'push'
+        o: Dict[str, float] = {}
+        po = self.prev_out
+        high, low, close, volume = bar['high'], bar['low'], bar['close'], bar['volume']
+        prev_close = self.prev_bar.get('close', NAN)
+        prev_high = self.prev_bar.get('high', NAN)
+        prev_low = self.prev_bar.get('low', NAN)
+
+        for p in MA_PERIODS:
+            getattr(self.ma[p], op)(close)
+            o[f'MA{p}'] = self.ma[p].get_mean()
+            o[f'EMA{p}'] = getattr(self.ema[p], op)(close)
+        o['SMA_SIGNAL'] = _cross(o['MA5'], o['MA20'], po.get('MA5', NAN), po.get('MA20', NAN))
+
+        macd = getattr(self.ema12, op)(close) - getattr(self.ema26, op)(close)
+        signal = getattr(self.macd_signal, op)(macd)
+        o['MACD'] = macd
+        o['MACD_SIGNAL'] = signal
+        o['MACD_HISTOGRAM'] = macd - signal
+        o['MACD_SIGNAL_TYPE'] = _cross(macd, signal, po.get('MACD', NAN), po.get('MACD_SIGNAL', NAN))
+
+        delta = close - prev_close
+        getattr(self.rsi_gain, op)(delta if delta > 0 else 0.0)
+        getattr(self.rsi_loss, op)(-delta if delta < 0 else 0.0)
+        rs = _div(self.rsi_gain.get_mean(), self.rsi_loss.get_mean())
+        o['RSI'] = 100 - _div(100, 1 + rs)
+        o['RSI_SIGNAL'] = _band(o['RSI'], 30, 70)
+
+        for extreme, x in ((self.high9, high), (self.low9, low), (self.high14, high), (self.low14, low),
+                           (self.aroon_high, high), (self.aroon_low, low), (self.high26, high),
+                           (self.low26, low), (self.high52, high), (self.low52, low)):
+            getattr(extreme, op)(x)
+
+        high9, low9 = self.high9.value(), self.low9.value()
+        rsv = _div(close - low9, high9 - low9) * 100
+        k = getattr(self.k, op)(rsv)
+        d = getattr(self.d, op)(k)
+        o['K'] = k
+        o['D'] = d
+        o['J'] = 3 * k - 2 * d
+        o['KDJ_SIGNAL'] = _cross(k, d, po.get('K', NAN), po.get('D', NAN))
+
+        getattr(self.bb, op)(close)
+        middle = self.bb.get_mean()
+        std = self.bb.get_std()
+        upper = middle + std * 2
+        lower = middle - std * 2
+        o['BB_MIDDLE'] = middle
+        o['BB_UPPER'] = upper
+        o['BB_LOWER'] = lower
+        o['BB_WIDTH'] = _div(upper - lower, middle) * 100
+        o['BB_PERCENT'] = _div(close - lower, upper - lower)
+        o['BB_SIGNAL'] = 1 if close < lower else (-1 if close > upper else 0)
+
+        tr = max((v for v in (high - low, abs(high - prev_close), abs(low - prev_close)) if v == v),
+                 default=NAN)
+        getattr(self.tr14, op)(tr)
+        atr = self.tr14.get_mean()
+        o['ATR'] = atr
+        o['ATR_RATIO'] = _div(atr, close) * 100
+
+        plus_dm = high - prev_high
+        minus_dm = low - prev_low
+        getattr(self.plus_dm, op)(0.0 if plus_dm < 0 else plus_dm)
+        getattr(self.minus_dm, op)(abs(0.0 if minus_dm > 0 else minus_dm))
+        plus_di = 100 * _div(self.plus_dm.get_mean(), atr)
+        minus_di = 100 * _div(self.minus_dm.get_mean(), atr)
+        getattr(self.dx, op)(100 * _div(abs(plus_di - minus_di), plus_di + minus_di))
+        adx = self.dx.get_mean()
+        o['ADX'] = adx
+        o['PLUS_DI'] = plus_di
+        o['MINUS_DI'] = minus_di
+        o['ADX_SIGNAL'] = (1 if plus_di > minus_di else (-1 if plus_di < minus_di else 0)) if adx > 25 else 0
+
+        direction = 1 if close > prev_close else (-1 if close < prev_close else 0)
+        obv = getattr(self.obv, op)(direction * volume)
+        getattr(self.obv_ma, op)(obv)
+        obv_ma = self.obv_ma.get_mean()
+        o['OBV'] = obv
+        o['OBV_MA'] = obv_ma
+        o['OBV_SIGNAL'] = _cross(obv, obv_ma, po.get('OBV', NAN), po.get('OBV_MA', NAN))
+
+        tp = (high + low + close) / 3
+        vwap = _div(getattr(self.vwap_pv, op)(tp * volume), getattr(self.vwap_v, op)(volume))
+        o['VWAP'] = vwap
+        o['VWAP_SIGNAL'] = 1 if close > vwap else (-1 if close < vwap else 0)
+
+        getattr(self.cci, op)(tp)
+        cci = _div(tp - self.cci.get_mean(), 0.015 * self.cci.get_mad())
+        o['CCI'] = cci
+        o['CCI_SIGNAL'] = _band(cci, -100, 100)
+
+        high14, low14 = self.high14.value(), self.low14.value()
+        wr = _div(high14 - close, high14 - low14) * -100
+        o['WILLIAMS_R'] = wr
+        o['WR_SIGNAL'] = _band(wr, -80, -20)
+
+        prev_tp = (prev_high + prev_low + prev_close) / 3
+        mf = tp * volume
+        getattr(self.mfi_pos, op)(mf if tp > prev_tp else 0.0)
+        getattr(self.mfi_neg, op)(mf if tp < prev_tp else 0.0)
+        mfi = 100 - _div(100, 1 + _div(self.mfi_pos.get_sum(), self.mfi_neg.get_sum()))
+        o['MFI'] = mfi
+        o['MFI_SIGNAL'] = _band(mfi, 20, 80)
+
+        close_12 = getattr(self.roc_lag, op)(close)
+        roc = _div(close - close_12, close_12) * 100
+        o['ROC'] = roc
+        o['ROC_SIGNAL'] = 1 if roc > 0 else (-1 if roc < 0 else 0)
+
+        aroon_up = self.aroon_high.age() / 25 * 100
+        aroon_down = self.aroon_low.age() / 25 * 100
+        o['AROON_UP'] = aroon_up
+        o['AROON_DOWN'] = aroon_down
+        o['AROON_OSCILLATOR'] = aroon_up - aroon_down
+        o['AROON_SIGNAL'] = 1 if aroon_up - aroon_down > 50 else (-1 if aroon_up - aroon_down < -50 else 0)
+
+        tenkan = (high9 + low9) / 2
+        kijun = (self.high26.value() + self.low26.value()) / 2
+        senkou_a = getattr(self.senkou_a, op)((tenkan + kijun) / 2)
+        senkou_b = getattr(self.senkou_b, op)((self.high52.value() + self.low52.value()) / 2)
+        o['ICHIMOKU_TENKAN'] = tenkan
+        o['ICHIMOKU_KIJUN'] = kijun
+        o['ICHIMOKU_SENKOU_A'] = senkou_a
+        o['ICHIMOKU_SENKOU_B'] = senkou_b
+        # Chikou is the close 26 bars ahead, never known for the latest bar.
+        o['ICHIMOKU_CHIKOU'] = NAN
+        if close > senkou_a and close > senkou_b:
+            o['ICHIMOKU_SIGNAL'] = 1
+        elif close < senkou_a and close < senkou_b:
+            o['ICHIMOKU_SIGNAL'] = -1
+        else:
+            o['ICHIMOKU_SIGNAL'] = 0
+
+        self.out = o
+        return o
+
+
+class StreamingIndicatorEngine:
+    # Keeps per-symbol running state (EMA values, rolling sums, monotonic
+    # deques) so a new bar, or an intraday revision of the last bar, updates
+    # every add_all_indicators output without touching the history. Costs do
+    # not grow with history length; MAD (CCI) and extreme revisions scan
+    # their fixed window.
+
+    def __init__(self):
+        self._states: Dict[str, _SymbolState] = {}
+        self._lock = threading.Lock()
+        self._summary_indicators = TechnicalIndicators()
+
+    def warm(self, code: str, df: pd.DataFrame) -> Dict[str, float]:
+        # Seeds state from a history frame (date-indexed, open/high/low/close/
+        # volume columns); O(len(df)) once, after which updates are incremental.
+        state = _SymbolState()
+        rows = df[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype='float64')
+        for row in rows:
+            state.apply({'open': row[0], 'high': row[1], 'low': row[2], 'close': row[3], 'volume': row[4]},
+                        revise=False)
+        state.last_date = df.index[-1] if len(df) else None
+        with self._lock:
+            self._states[code] = state
+        return dict(state.out)
+
+    def update(self, code: str, bar: Dict[str, Any], date: Any = None) -> Dict[str, float]:
+        # A bar with the same date as the last one revises it (intraday
+        # update); any other date appends a new bar.
+        state = self._get_state(code)
+        revise = date is not None and state.bars > 0 and date == state.last_date
+        return self._apply(state, bar, revise, date)
+
+    def update_last(self, code: str, bar: Dict[str, Any]) -> Dict[str, float]:
+        state = self._get_state(code)
+        return self._apply(state, bar, revise=state.bars > 0, date=state.last_date)
+
+    def latest(self, code: str) -> Optional[Dict[str, float]]:
+        state = self._states.get(code)
+        return dict(state.out) if state is not None and state.bars else None
+
+    def get_summary(self, code: str) -> Dict:
+        # Same structure as TechnicalIndicators.get_indicator_summary.
+        latest = self.latest(code)
+        if latest is None:
+            return {}
+        row = pd.DataFrame([{name: latest[name] for name in ALL_OUTPUTS}])
+        return self._summary_indicators.get_indicator_summary(row)
+
+    def reset(self, code: str = None):
+        with self._lock:
+            if code is None:
+                self._states.clear()
+            else:
+                self._states.pop(code, None)
+
+    def symbols(self) -> List[str]:
+        return list(self._states)
+
+    def _get_state(self, code: str) -> _SymbolState:
+        with self._lock:
+            if code not in self._states:
+                self._states[code] = _SymbolState()
+            return self._states[code]
+
+    @staticmethod
+    def _apply(state: _SymbolState, bar: Dict[str, Any], revise: bool, date: Any) -> Dict[str, float]:
+        values = {field: float(bar.get(field, NAN)) for field in ('open', 'high', 'low', 'close', 'volume')}
+        out = state.apply(values, revise)
+        if date is not None:
+            state.last_date = date
+        return dict(out)
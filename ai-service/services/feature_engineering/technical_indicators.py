@@ -1,15 +1,122 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple
 import logging
 
+from services.feature_engineering.rolling_kernels import rolling_extreme, rolling_mad
+
 logger = logging.getLogger(__name__)
 
 
+class IndicatorSpec(NamedTuple):
+    method: str
+    outputs: Tuple[str, ...]
+    depends: Tuple[str, ...] = ()
+
+
+MA_PERIODS = [5, 10, 20, 60, 120, 250]
+
+# Indicator registry in output order. depends names the shared intermediates
+# an indicator reads, which are computed once per IndicatorContext.
+INDICATOR_SPECS: Dict[str, IndicatorSpec] = {
+    'moving_averages': IndicatorSpec(
+        '_moving_average_columns',
+        tuple(name for p in MA_PERIODS for name in (f'MA{p}', f'EMA{p}')) + ('SMA_SIGNAL',),
+        tuple(f'close_mean:{p}' for p in MA_PERIODS)),
+    'macd': IndicatorSpec('_macd_columns', ('MACD', 'MACD_SIGNAL', 'MACD_HISTOGRAM', 'MACD_SIGNAL_TYPE')),
+    'rsi': IndicatorSpec('_rsi_columns', ('RSI', 'RSI_SIGNAL'), ('close_diff',)),
+    'kdj': IndicatorSpec('_kdj_columns', ('K', 'D', 'J', 'KDJ_SIGNAL'), ('rolling_max:high:9', 'rolling_min:low:9')),
+    'bollinger': IndicatorSpec(
+        '_bollinger_columns',
+        ('BB_MIDDLE', 'BB_UPPER', 'BB_LOWER', 'BB_WIDTH', 'BB_PERCENT', 'BB_SIGNAL'),
+        ('close_mean:20',)),
+    'atr': IndicatorSpec('_atr_columns', ('ATR', 'ATR_RATIO'), ('true_range_mean:14',)),
+    'adx': IndicatorSpec('_adx_columns', ('ADX', 'PLUS_DI', 'MINUS_DI', 'ADX_SIGNAL'), ('true_range_mean:14',)),
+    'obv': IndicatorSpec('_obv_columns', ('OBV', 'OBV_MA', 'OBV_SIGNAL'), ('prev_close',)),
+    'vwap': IndicatorSpec('_vwap_columns', ('VWAP', 'VWAP_SIGNAL'), ('typical_price',)),
+    'cci': IndicatorSpec('_cci_columns', ('CCI', 'CCI_SIGNAL'), ('typical_price',)),
+    'williams_r': IndicatorSpec(
+        '_williams_r_columns', ('WILLIAMS_R', 'WR_SIGNAL'), ('rolling_max:high:14', 'rolling_min:low:14')),
+    'mfi': IndicatorSpec('_mfi_columns', ('MFI', 'MFI_SIGNAL'), ('typical_price',)),
+    'roc': IndicatorSpec('_roc_columns', ('ROC', 'ROC_SIGNAL')),
+    'aroon': IndicatorSpec(
+        '_aroon_columns',
+        ('AROON_UP', 'AROON_DOWN', 'AROON_OSCILLATOR', 'AROON_SIGNAL'),
+        ('rolling_max:high:26', 'rolling_min:low:26')),
+    'ichimoku': IndicatorSpec(
+        '_ichimoku_columns',
+        ('ICHIMOKU_TENKAN', 'ICHIMOKU_KIJUN', 'ICHIMOKU_SENKOU_A', 'ICHIMOKU_SENKOU_B',
+         'ICHIMOKU_CHIKOU', 'ICHIMOKU_SIGNAL'),
+        ('rolling_max:high:9', 'rolling_min:low:9', 'rolling_max:high:26', 'rolling_min:low:26',
+         'rolling_max:high:52', 'rolling_min:low:52'))
+}
+
+INTERMEDIATE_DEPENDS: Dict[str, Tuple[str, ...]] = {
+    'true_range': ('prev_close',),
+    'true_range_mean:14': ('true_range',)
+}
+
+OUTPUT_TO_INDICATOR = {output: name for name, spec in INDICATOR_SPECS.items() for output in spec.outputs}
+ALL_OUTPUTS = list(OUTPUT_TO_INDICATOR)
+
+# What get_indicator_summary reads; every *_SIGNAL column lands in 'signals'.
+SUMMARY_FIELDS = {
+    'trend_indicators': ['MA5', 'MA10', 'MA20', 'MA60'],
+    'momentum_indicators': ['MACD', 'MACD_SIGNAL', 'MACD_HISTOGRAM',
+                            'RSI', 'K', 'D', 'J', 'CCI', 'WILLIAMS_R', 'MFI', 'ROC'],
+    'volatility_indicators': ['BB_UPPER', 'BB_LOWER', 'BB_WIDTH', 'ATR', 'ADX'],
+    'volume_indicators': ['OBV', 'VWAP']
+}
+SIGNAL_OUTPUTS = [output for output in ALL_OUTPUTS if output.endswith('_SIGNAL')]
+SUMMARY_OUTPUTS = list(dict.fromkeys(
+    [col for cols in SUMMARY_FIELDS.values() for col in cols] + SIGNAL_OUTPUTS))
+CHART_OUTPUTS = ['MA5', 'MA10', 'MA20', 'MA60', 'MACD', 'MACD_SIGNAL', 'MACD_HISTOGRAM', 'RSI']
+
+# Storage precision of computed indicator columns. Everything is computed in
+# float64; 'float32' rounds continuous columns to float32 and stores the
+# -1/0/1 signal columns as int8, halving frame and panel memory. Tolerance:
+# NaN/inf positions and signals are unchanged, and every finite value is
+# within one float32 ulp (2**-23 relative) of its float64 result, which
+# check_precision verifies.
+PRECISIONS = {'float64': (None, None), 'float32': (np.float32, np.int8)}
+FLOAT32_RTOL = 2 ** -23
+
+
+class IndicatorContext(Mapping):
+    # The OHLCV inputs of one computation plus the intermediates indicators
+    # share (true range, typical price, rolling means and extremes), each
+    # computed on first use and reused after.
+
+    def __init__(self, data: Mapping[str, Any]):
+        self._data = data
+        self._shared: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def shared(self, key: str, compute: Callable[[], Any]) -> Any:
+        if key not in self._shared:
+            self._shared[key] = compute()
+        return self._shared[key]
+
+    @property
+    def computed(self) -> List[str]:
+        return list(self._shared)
+
+
 class TechnicalIndicators:
     
-    def __init__(self):
+    def __init__(self, precision: str = 'float64'):
         self.required_columns = ['open', 'high', 'low', 'close', 'volume']
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown indicator precision: {precision}")
+        self.precision = precision
     
     def _validate_df(self, df: pd.DataFrame) -> bool:
         missing = [col for col in self.required_columns if col not in df.columns]
@@ -22,81 +129,182 @@ class TechnicalIndicators:
         if not self._validate_df(df):
             return df
         
-        df = df.copy()
+        # Every step reads the input fields and returns its new columns, so the
+        # frame is neither copied per indicator nor grown column by column; the
+        # buffers are joined onto it once at the end.
+        data = {col: df[col] for col in self.required_columns}
         
-        df = self.add_moving_averages(df)
-        df = self.add_macd(df)
-        df = self.add_rsi(df)
-        df = self.add_kdj(df)
-        df = self.add_bollinger_bands(df)
-        df = self.add_atr(df)
-        df = self.add_adx(df)
-        df = self.add_obv(df)
-        df = self.add_vwap(df)
-        df = self.add_cci(df)
-        df = self.add_williams_r(df)
-        df = self.add_mfi(df)
-        df = self.add_roc(df)
-        df = self.add_aroon(df)
-        df = self.add_ichimoku(df)
-        
-        return df
+        return self._assemble(df, self.compute_columns(data))
     
-    def add_moving_averages(self, df: pd.DataFrame, periods: List[int] = None) -> pd.DataFrame:
-        if periods is None:
-            periods = [5, 10, 20, 60, 120, 250]
-        
-        df = df.copy()
-        for period in periods:
-            df[f'MA{period}'] = df['close'].rolling(window=period).mean()
-            df[f'EMA{period}'] = df['close'].ewm(span=period, adjust=False).mean()
+    def add_indicators(self, df: pd.DataFrame, outputs: Iterable[str]) -> pd.DataFrame:
+        # Like add_all_indicators, but only the indicators behind the named
+        # outputs run and only those columns are added.
+        if not self._validate_df(df):
+            return df
         
-        df['SMA_SIGNAL'] = self._sma_signal(df)
+        data = {col: df[col] for col in self.required_columns}
         
-        return df
+        return self._assemble(df, self.compute_columns(data, outputs))
+    
+    def compute_columns(self, data: Mapping[str, Any], outputs: Iterable[str] = None) -> Dict[str, Any]:
+        # data maps the OHLCV names to Series, or to (dates x symbols) frames
+        # for panel computation; results come back in the same shape.
+        names, wanted = self._resolve(outputs)
+        context = IndicatorContext(data)
+        columns = {}
+        for name in names:
+            columns.update(getattr(self, INDICATOR_SPECS[name].method)(context))
+        if wanted is not None:
+            columns = {output: columns[output] for output in ALL_OUTPUTS if output in wanted}
+        return self._apply_precision(columns)
+    
+    def _apply_precision(self, columns: Dict[str, Any]) -> Dict[str, Any]:
+        float_dtype, int_dtype = PRECISIONS[self.precision]
+        if float_dtype is None:
+            return columns
+        
+        reduced = {}
+        for name, values in columns.items():
+            dtype = values.dtype if isinstance(values, pd.Series) else values.dtypes.iloc[0]
+            reduced[name] = values.astype(int_dtype if dtype.kind in 'iu' else float_dtype)
+        return reduced
+    
+    def plan(self, outputs: Iterable[str] = None) -> Dict[str, List[str]]:
+        # The indicators and shared intermediates a request for outputs runs.
+        names, _ = self._resolve(outputs)
+        intermediates = []
+        pending = [dep for name in names for dep in INDICATOR_SPECS[name].depends]
+        while pending:
+            dep = pending.pop(0)
+            if dep not in intermediates:
+                intermediates.append(dep)
+                pending.extend(INTERMEDIATE_DEPENDS.get(dep, ()))
+        return {'indicators': names, 'intermediates': intermediates}
+    
+    def _resolve(self, outputs: Optional[Iterable[str]]) -> Tuple[List[str], Optional[set]]:
+        if outputs is None:
+            return list(INDICATOR_SPECS), None
+        wanted = set(outputs)
+        unknown = wanted - set(OUTPUT_TO_INDICATOR)
+        if unknown:
+            raise ValueError(f"Unknown indicator outputs: {sorted(unknown)}")
+        needed = {OUTPUT_TO_INDICATOR[output] for output in wanted}
+        return [name for name in INDICATOR_SPECS if name in needed], wanted
+    
+    def _shared(self, data: Mapping[str, Any], key: str, compute: Callable[[], Any]) -> Any:
+        # Frames handed to the public add_* methods have no context, so the
+        # intermediate is simply computed.
+        if isinstance(data, IndicatorContext):
+            return data.shared(key, compute)
+        return compute()
+    
+    def _prev_close(self, data: Mapping[str, Any]):
+        return self._shared(data, 'prev_close', lambda: data['close'].shift(1))
+    
+    def _typical_price(self, data: Mapping[str, Any]):
+        return self._shared(data, 'typical_price', lambda: (data['high'] + data['low'] + data['close']) / 3)
+    
+    def _close_mean(self, data: Mapping[str, Any], period: int):
+        return self._shared(data, f'close_mean:{period}', lambda: data['close'].rolling(window=period).mean())
     
-    def _sma_signal(self, df: pd.DataFrame) -> pd.Series:
-        signal = pd.Series(0, index=df.index)
+    def _rolling_extreme(self, data: Mapping[str, Any], field: str, window: int, is_max: bool):
+        # Values and arg positions come from one monotonic-deque pass, shared
+        # by every indicator using the same (field, window): KDJ and Ichimoku
+        # over 9 bars, Williams %R over 14, Ichimoku and Aroon over 26.
+        def compute():
+            series = data[field]
+            values, positions = rolling_extreme(series.to_numpy(), window, is_max=is_max)
+            return self._like(series, values), positions
+        
+        kind = 'max' if is_max else 'min'
+        return self._shared(data, f'rolling_{kind}:{field}:{window}', compute)
+    
+    def _rolling_max(self, data: Mapping[str, Any], field: str, window: int):
+        return self._rolling_extreme(data, field, window, True)[0]
+    
+    def _rolling_min(self, data: Mapping[str, Any], field: str, window: int):
+        return self._rolling_extreme(data, field, window, False)[0]
+    
+    def _true_range_mean(self, data: Mapping[str, Any], period: int):
+        tr = self._shared(data, 'true_range', lambda: self._true_range(data))
+        return self._shared(data, f'true_range_mean:{period}', lambda: tr.rolling(window=period).mean())
+    
+    def _assemble(self, df: pd.DataFrame, columns: Dict[str, pd.Series]) -> pd.DataFrame:
+        buffers = {name: values.to_numpy() for name, values in columns.items()}
+        new_columns = pd.DataFrame(buffers, index=df.index)
         
-        if 'MA5' in df.columns and 'MA20' in df.columns:
-            golden_cross = (df['MA5'] > df['MA20']) & (df['MA5'].shift(1) <= df['MA20'].shift(1))
-            death_cross = (df['MA5'] < df['MA20']) & (df['MA5'].shift(1) >= df['MA20'].shift(1))
-            
-            signal[golden_cross] = 1
-            signal[death_cross] = -1
+        existing = [name for name in buffers if name in df.columns]
+        if existing:
+            df = df.drop(columns=existing)
         
-        return signal
+        return pd.concat([df, new_columns], axis=1)
     
-    def add_macd(self, df: pd.DataFrame, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame:
+    def _with_columns(self, df: pd.DataFrame, columns: Dict[str, pd.Series]) -> pd.DataFrame:
         df = df.copy()
-        
-        ema_fast = df['close'].ewm(span=fast, adjust=False).mean()
-        ema_slow = df['close'].ewm(span=slow, adjust=False).mean()
-        
-        df['MACD'] = ema_fast - ema_slow
-        df['MACD_SIGNAL'] = df['MACD'].ewm(span=signal, adjust=False).mean()
-        df['MACD_HISTOGRAM'] = df['MACD'] - df['MACD_SIGNAL']
-        
-        df['MACD_SIGNAL_TYPE'] = self._macd_signal(df)
-        
+        for name, values in columns.items():
+            df[name] = values
         return df
     
-    def _macd_signal(self, df: pd.DataFrame) -> pd.Series:
-        signal = pd.Series(0, index=df.index)
+    def _like(self, template, values: np.ndarray):
+        # Wraps a kernel result in the pandas type and labels of its input.
+        if isinstance(template, pd.DataFrame):
+            return pd.DataFrame(values, index=template.index, columns=template.columns)
+        return pd.Series(values, index=template.index)
+    
+    def _signal(self, buy, sell):
+        # 1 where buy holds, -1 where sell holds (sell wins), 0 elsewhere.
+        return buy.astype('int64').mask(sell, -1)
+    
+    def _cross_signal(self, fast, slow):
+        golden_cross = (fast > slow) & (fast.shift(1) <= slow.shift(1))
+        death_cross = (fast < slow) & (fast.shift(1) >= slow.shift(1))
+        return self._signal(golden_cross, death_cross)
+    
+    def add_moving_averages(self, df: pd.DataFrame, periods: List[int] = None) -> pd.DataFrame:
+        return self._with_columns(df, self._moving_average_columns(df, periods))
+    
+    def _moving_average_columns(self, data: Mapping[str, Any], periods: List[int] = None) -> Dict[str, Any]:
+        if periods is None:
+            periods = MA_PERIODS
         
-        if 'MACD' in df.columns and 'MACD_SIGNAL' in df.columns:
-            golden_cross = (df['MACD'] > df['MACD_SIGNAL']) & (df['MACD'].shift(1) <= df['MACD_SIGNAL'].shift(1))
-            death_cross = (df['MACD'] < df['MACD_SIGNAL']) & (df['MACD'].shift(1) >= df['MACD_SIGNAL'].shift(1))
-            
-            signal[golden_cross] = 1
-            signal[death_cross] = -1
+        close = data['close']
+        columns = {}
+        for period in periods:
+            columns[f'MA{period}'] = self._close_mean(data, period)
+            columns[f'EMA{period}'] = close.ewm(span=period, adjust=False).mean()
+        
+        ma5 = columns.get('MA5', data.get('MA5'))
+        ma20 = columns.get('MA20', data.get('MA20'))
+        if ma5 is not None and ma20 is not None:
+            columns['SMA_SIGNAL'] = self._cross_signal(ma5, ma20)
+        else:
+            columns['SMA_SIGNAL'] = pd.Series(0, index=close.index)
         
-        return signal
+        return columns
+    
+    def add_macd(self, df: pd.DataFrame, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame:
+        return self._with_columns(df, self._macd_columns(df, fast, slow, signal))
+    
+    def _macd_columns(self, data: Mapping[str, Any], fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, Any]:
+        close = data['close']
+        ema_fast = close.ewm(span=fast, adjust=False).mean()
+        ema_slow = close.ewm(span=slow, adjust=False).mean()
+        
+        macd = ema_fast - ema_slow
+        macd_signal = macd.ewm(span=signal, adjust=False).mean()
+        
+        return {
+            'MACD': macd,
+            'MACD_SIGNAL': macd_signal,
+            'MACD_HISTOGRAM': macd - macd_signal,
+            'MACD_SIGNAL_TYPE': self._cross_signal(macd, macd_signal)
+        }
     
     def add_rsi(self, df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
-        df = df.copy()
-        
-        delta = df['close'].diff()
+        return self._with_columns(df, self._rsi_columns(df, period))
+    
+    def _rsi_columns(self, data: Mapping[str, Any], period: int = 14) -> Dict[str, Any]:
+        delta = self._shared(data, 'close_diff', lambda: data['close'].diff())
         gain = delta.where(delta > 0, 0)
         loss = (-delta).where(delta < 0, 0)
         
@@ -104,229 +312,229 @@ class TechnicalIndicators:
         avg_loss = loss.rolling(window=period).mean()
         
         rs = avg_gain / avg_loss
-        df['RSI'] = 100 - (100 / (1 + rs))
+        rsi = 100 - (100 / (1 + rs))
         
-        df['RSI_SIGNAL'] = pd.Series(0, index=df.index)
-        df.loc[df['RSI'] < 30, 'RSI_SIGNAL'] = 1
-        df.loc[df['RSI'] > 70, 'RSI_SIGNAL'] = -1
-        
-        return df
+        return {'RSI': rsi, 'RSI_SIGNAL': self._signal(rsi < 30, rsi > 70)}
     
     def add_kdj(self, df: pd.DataFrame, n: int = 9, m1: int = 3, m2: int = 3) -> pd.DataFrame:
-        df = df.copy()
-        
-        low_min = df['low'].rolling(window=n).min()
-        high_max = df['high'].rolling(window=n).max()
-        
-        rsv = (df['close'] - low_min) / (high_max - low_min) * 100
+        return self._with_columns(df, self._kdj_columns(df, n, m1, m2))
+    
+    def _kdj_columns(self, data: Mapping[str, Any], n: int = 9, m1: int = 3, m2: int = 3) -> Dict[str, Any]:
+        low_min = self._rolling_min(data, 'low', n)
+        high_max = self._rolling_max(data, 'high', n)
         
-        df['K'] = rsv.ewm(alpha=1/m1, adjust=False).mean()
-        df['D'] = df['K'].ewm(alpha=1/m2, adjust=False).mean()
-        df['J'] = 3 * df['K'] - 2 * df['D']
+        rsv = (data['close'] - low_min) / (high_max - low_min) * 100
         
-        df['KDJ_SIGNAL'] = pd.Series(0, index=df.index)
-        df.loc[(df['K'] > df['D']) & (df['K'].shift(1) <= df['D'].shift(1)), 'KDJ_SIGNAL'] = 1
-        df.loc[(df['K'] < df['D']) & (df['K'].shift(1) >= df['D'].shift(1)), 'KDJ_SIGNAL'] = -1
+        k = rsv.ewm(alpha=1/m1, adjust=False).mean()
+        d = k.ewm(alpha=1/m2, adjust=False).mean()
         
-        return df
+        return {'K': k, 'D': d, 'J': 3 * k - 2 * d, 'KDJ_SIGNAL': self._cross_signal(k, d)}
     
     def add_bollinger_bands(self, df: pd.DataFrame, period: int = 20, std_dev: float = 2) -> pd.DataFrame:
-        df = df.copy()
-        
-        df['BB_MIDDLE'] = df['close'].rolling(window=period).mean()
-        std = df['close'].rolling(window=period).std()
-        
-        df['BB_UPPER'] = df['BB_MIDDLE'] + (std * std_dev)
-        df['BB_LOWER'] = df['BB_MIDDLE'] - (std * std_dev)
-        df['BB_WIDTH'] = (df['BB_UPPER'] - df['BB_LOWER']) / df['BB_MIDDLE'] * 100
-        df['BB_PERCENT'] = (df['close'] - df['BB_LOWER']) / (df['BB_UPPER'] - df['BB_LOWER'])
-        
-        df['BB_SIGNAL'] = pd.Series(0, index=df.index)
-        df.loc[df['close'] < df['BB_LOWER'], 'BB_SIGNAL'] = 1
-        df.loc[df['close'] > df['BB_UPPER'], 'BB_SIGNAL'] = -1
-        
-        return df
+        return self._with_columns(df, self._bollinger_columns(df, period, std_dev))
+    
+    def _bollinger_columns(self, data: Mapping[str, Any], period: int = 20, std_dev: float = 2) -> Dict[str, Any]:
+        close = data['close']
+        middle = self._close_mean(data, period)
+        std = close.rolling(window=period).std()
+        
+        upper = middle + (std * std_dev)
+        lower = middle - (std * std_dev)
+        
+        return {
+            'BB_MIDDLE': middle,
+            'BB_UPPER': upper,
+            'BB_LOWER': lower,
+            'BB_WIDTH': (upper - lower) / middle * 100,
+            'BB_PERCENT': (close - lower) / (upper - lower),
+            'BB_SIGNAL': self._signal(close < lower, close > upper)
+        }
     
     def add_atr(self, df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
-        df = df.copy()
-        
-        high_low = df['high'] - df['low']
-        high_close = abs(df['high'] - df['close'].shift(1))
-        low_close = abs(df['low'] - df['close'].shift(1))
-        
-        tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        df['ATR'] = tr.rolling(window=period).mean()
-        
-        df['ATR_RATIO'] = df['ATR'] / df['close'] * 100
-        
-        return df
+        return self._with_columns(df, self._atr_columns(df, period))
+    
+    def _atr_columns(self, data: Mapping[str, Any], period: int = 14) -> Dict[str, Any]:
+        atr = self._true_range_mean(data, period)
+        return {'ATR': atr, 'ATR_RATIO': atr / data['close'] * 100}
     
     def add_adx(self, df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
-        df = df.copy()
-        
-        plus_dm = df['high'].diff()
-        minus_dm = df['low'].diff()
+        return self._with_columns(df, self._adx_columns(df, period))
+    
+    def _adx_columns(self, data: Mapping[str, Any], period: int = 14) -> Dict[str, Any]:
+        plus_dm = data['high'].diff()
+        minus_dm = data['low'].diff()
         
-        plus_dm[plus_dm < 0] = 0
-        minus_dm[minus_dm > 0] = 0
+        plus_dm = plus_dm.mask(plus_dm < 0, 0)
+        minus_dm = minus_dm.mask(minus_dm > 0, 0)
         
-        tr = self._true_range(df)
-        atr = tr.rolling(window=period).mean()
+        atr = self._true_range_mean(data, period)
         
         plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
         minus_di = 100 * (abs(minus_dm).rolling(window=period).mean() / atr)
         
         dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-        df['ADX'] = dx.rolling(window=period).mean()
-        df['PLUS_DI'] = plus_di
-        df['MINUS_DI'] = minus_di
+        adx = dx.rolling(window=period).mean()
         
-        df['ADX_SIGNAL'] = pd.Series(0, index=df.index)
-        df.loc[(df['PLUS_DI'] > df['MINUS_DI']) & (df['ADX'] > 25), 'ADX_SIGNAL'] = 1
-        df.loc[(df['PLUS_DI'] < df['MINUS_DI']) & (df['ADX'] > 25), 'ADX_SIGNAL'] = -1
-        
-        return df
+        return {
+            'ADX': adx,
+            'PLUS_DI': plus_di,
+            'MINUS_DI': minus_di,
+            'ADX_SIGNAL': self._signal((plus_di > minus_di) & (adx > 25), (plus_di < minus_di) & (adx > 25))
+        }
     
-    def _true_range(self, df: pd.DataFrame) -> pd.Series:
+    def _true_range(self, df: Mapping[str, Any]) -> pd.Series:
+        prev_close = self._prev_close(df)
         high_low = df['high'] - df['low']
-        high_close = abs(df['high'] - df['close'].shift(1))
-        low_close = abs(df['low'] - df['close'].shift(1))
+        high_close = abs(df['high'] - prev_close)
+        low_close = abs(df['low'] - prev_close)
         
-        return pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+        # fmax skips NaN like a row-wise max, without concatenating a frame
+        return np.fmax(np.fmax(high_low, high_close), low_close)
     
     def add_obv(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        
-        direction = np.where(df['close'] > df['close'].shift(1), 1,
-                            np.where(df['close'] < df['close'].shift(1), -1, 0))
-        
-        df['OBV'] = (direction * df['volume']).cumsum()
-        df['OBV_MA'] = df['OBV'].rolling(window=20).mean()
+        return self._with_columns(df, self._obv_columns(df))
+    
+    def _obv_columns(self, data: Mapping[str, Any]) -> Dict[str, Any]:
+        close = data['close']
+        prev_close = self._prev_close(data)
+        direction = (close > prev_close).astype('int64') - (close < prev_close).astype('int64')
         
-        df['OBV_SIGNAL'] = pd.Series(0, index=df.index)
-        df.loc[(df['OBV'] > df['OBV_MA']) & (df['OBV'].shift(1) <= df['OBV_MA'].shift(1)), 'OBV_SIGNAL'] = 1
-        df.loc[(df['OBV'] < df['OBV_MA']) & (df['OBV'].shift(1) >= df['OBV_MA'].shift(1)), 'OBV_SIGNAL'] = -1
+        obv = (direction * data['volume']).cumsum()
+        obv_ma = obv.rolling(window=20).mean()
         
-        return df
+        return {'OBV': obv, 'OBV_MA': obv_ma, 'OBV_SIGNAL': self._cross_signal(obv, obv_ma)}
     
     def add_vwap(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        
-        typical_price = (df['high'] + df['low'] + df['close']) / 3
-        df['VWAP'] = (typical_price * df['volume']).cumsum() / df['volume'].cumsum()
-        
-        df['VWAP_SIGNAL'] = pd.Series(0, index=df.index)
-        df.loc[df['close'] > df['VWAP'], 'VWAP_SIGNAL'] = 1
-        df.loc[df['close'] < df['VWAP'], 'VWAP_SIGNAL'] = -1
+        return self._with_columns(df, self._vwap_columns(df))
+    
+    def _vwap_columns(self, data: Mapping[str, Any]) -> Dict[str, Any]:
+        close = data['close']
+        typical_price = self._typical_price(data)
+        vwap = (typical_price * data['volume']).cumsum() / data['volume'].cumsum()
         
-        return df
+        return {'VWAP': vwap, 'VWAP_SIGNAL': self._signal(close > vwap, close < vwap)}
     
     def add_cci(self, df: pd.DataFrame, period: int = 20) -> pd.DataFrame:
-        df = df.copy()
-        
-        tp = (df['high'] + df['low'] + df['close']) / 3
+        return self._with_columns(df, self._cci_columns(df, period))
+    
+    def _cci_columns(self, data: Mapping[str, Any], period: int = 20) -> Dict[str, Any]:
+        tp = self._typical_price(data)
         sma = tp.rolling(window=period).mean()
-        mad = tp.rolling(window=period).apply(lambda x: np.abs(x - x.mean()).mean())
+        mad = self._like(tp, rolling_mad(tp.to_numpy(), period))
         
-        df['CCI'] = (tp - sma) / (0.015 * mad)
+        cci = (tp - sma) / (0.015 * mad)
         
-        df['CCI_SIGNAL'] = pd.Series(0, index=df.index)
-        df.loc[df['CCI'] < -100, 'CCI_SIGNAL'] = 1
-        df.loc[df['CCI'] > 100, 'CCI_SIGNAL'] = -1
-        
-        return df
+        return {'CCI': cci, 'CCI_SIGNAL': self._signal(cci < -100, cci > 100)}
     
     def add_williams_r(self, df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
-        df = df.copy()
-        
-        high_max = df['high'].rolling(window=period).max()
-        low_min = df['low'].rolling(window=period).min()
-        
-        df['WILLIAMS_R'] = (high_max - df['close']) / (high_max - low_min) * -100
+        return self._with_columns(df, self._williams_r_columns(df, period))
+    
+    def _williams_r_columns(self, data: Mapping[str, Any], period: int = 14) -> Dict[str, Any]:
+        high_max = self._rolling_max(data, 'high', period)
+        low_min = self._rolling_min(data, 'low', period)
         
-        df['WR_SIGNAL'] = pd.Series(0, index=df.index)
-        df.loc[df['WILLIAMS_R'] < -80, 'WR_SIGNAL'] = 1
-        df.loc[df['WILLIAMS_R'] > -20, 'WR_SIGNAL'] = -1
+        williams_r = (high_max - data['close']) / (high_max - low_min) * -100
         
-        return df
+        return {'WILLIAMS_R': williams_r, 'WR_SIGNAL': self._signal(williams_r < -80, williams_r > -20)}
     
     def add_mfi(self, df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
-        df = df.copy()
-        
-        tp = (df['high'] + df['low'] + df['close']) / 3
-        mf = tp * df['volume']
-        
-        positive_mf = pd.Series(0.0, index=df.index)
-        negative_mf = pd.Series(0.0, index=df.index)
+        return self._with_columns(df, self._mfi_columns(df, period))
+    
+    def _mfi_columns(self, data: Mapping[str, Any], period: int = 14) -> Dict[str, Any]:
+        tp = self._typical_price(data)
+        mf = tp * data['volume']
+        prev_tp = tp.shift(1)
         
-        positive_mf[tp > tp.shift(1)] = mf[tp > tp.shift(1)]
-        negative_mf[tp < tp.shift(1)] = mf[tp < tp.shift(1)]
+        positive_mf = mf.where(tp > prev_tp, 0.0)
+        negative_mf = mf.where(tp < prev_tp, 0.0)
         
         positive_sum = positive_mf.rolling(window=period).sum()
         negative_sum = negative_mf.rolling(window=period).sum()
         
         mfi_ratio = positive_sum / negative_sum
-        df['MFI'] = 100 - (100 / (1 + mfi_ratio))
+        mfi = 100 - (100 / (1 + mfi_ratio))
         
-        df['MFI_SIGNAL'] = pd.Series(0, index=df.index)
-        df.loc[df['MFI'] < 20, 'MFI_SIGNAL'] = 1
-        df.loc[df['MFI'] > 80, 'MFI_SIGNAL'] = -1
-        
-        return df
+        return {'MFI': mfi, 'MFI_SIGNAL': self._signal(mfi < 20, mfi > 80)}
     
     def add_roc(self, df: pd.DataFrame, period: int = 12) -> pd.DataFrame:
-        df = df.copy()
-        
-        df['ROC'] = ((df['close'] - df['close'].shift(period)) / df['close'].shift(period)) * 100
-        
-        df['ROC_SIGNAL'] = pd.Series(0, index=df.index)
-        df.loc[df['ROC'] > 0, 'ROC_SIGNAL'] = 1
-        df.loc[df['ROC'] < 0, 'ROC_SIGNAL'] = -1
+        return self._with_columns(df, self._roc_columns(df, period))
+    
+    def _roc_columns(self, data: Mapping[str, Any], period: int = 12) -> Dict[str, Any]:
+        close = data['close']
+        shifted = close.shift(period)
+        roc = ((close - shifted) / shifted) * 100
         
-        return df
+        return {'ROC': roc, 'ROC_SIGNAL': self._signal(roc > 0, roc < 0)}
     
     def add_aroon(self, df: pd.DataFrame, period: int = 25) -> pd.DataFrame:
-        df = df.copy()
-        
-        aroon_up = df['high'].rolling(window=period + 1).apply(lambda x: (period - x.argmax()) / period * 100)
-        aroon_down = df['low'].rolling(window=period + 1).apply(lambda x: (period - x.argmin()) / period * 100)
-        
-        df['AROON_UP'] = aroon_up
-        df['AROON_DOWN'] = aroon_down
-        df['AROON_OSCILLATOR'] = aroon_up - aroon_down
-        
-        df['AROON_SIGNAL'] = pd.Series(0, index=df.index)
-        df.loc[df['AROON_OSCILLATOR'] > 50, 'AROON_SIGNAL'] = 1
-        df.loc[df['AROON_OSCILLATOR'] < -50, 'AROON_SIGNAL'] = -1
-        
-        return df
+        return self._with_columns(df, self._aroon_columns(df, period))
+    
+    def _aroon_columns(self, data: Mapping[str, Any], period: int = 25) -> Dict[str, Any]:
+        _, high_pos = self._rolling_extreme(data, 'high', period + 1, True)
+        _, low_pos = self._rolling_extreme(data, 'low', period + 1, False)
+        
+        aroon_up = self._like(data['high'], (period - high_pos) / period * 100)
+        aroon_down = self._like(data['low'], (period - low_pos) / period * 100)
+        oscillator = aroon_up - aroon_down
+        
+        return {
+            'AROON_UP': aroon_up,
+            'AROON_DOWN': aroon_down,
+            'AROON_OSCILLATOR': oscillator,
+            'AROON_SIGNAL': self._signal(oscillator > 50, oscillator < -50)
+        }
     
     def add_ichimoku(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        
-        tenkan_high = df['high'].rolling(window=9).max()
-        tenkan_low = df['low'].rolling(window=9).min()
-        df['ICHIMOKU_TENKAN'] = (tenkan_high + tenkan_low) / 2
-        
-        kijun_high = df['high'].rolling(window=26).max()
-        kijun_low = df['low'].rolling(window=26).min()
-        df['ICHIMOKU_KIJUN'] = (kijun_high + kijun_low) / 2
-        
-        df['ICHIMOKU_SENKOU_A'] = ((df['ICHIMOKU_TENKAN'] + df['ICHIMOKU_KIJUN']) / 2).shift(26)
-        
-        senkou_b_high = df['high'].rolling(window=52).max()
-        senkou_b_low = df['low'].rolling(window=52).min()
-        df['ICHIMOKU_SENKOU_B'] = ((senkou_b_high + senkou_b_low) / 2).shift(26)
-        
-        df['ICHIMOKU_CHIKOU'] = df['close'].shift(-26)
-        
-        df['ICHIMOKU_SIGNAL'] = pd.Series(0, index=df.index)
-        above_cloud = (df['close'] > df['ICHIMOKU_SENKOU_A']) & (df['close'] > df['ICHIMOKU_SENKOU_B'])
-        below_cloud = (df['close'] < df['ICHIMOKU_SENKOU_A']) & (df['close'] < df['ICHIMOKU_SENKOU_B'])
-        df.loc[above_cloud, 'ICHIMOKU_SIGNAL'] = 1
-        df.loc[below_cloud, 'ICHIMOKU_SIGNAL'] = -1
+        return self._with_columns(df, self._ichimoku_columns(df))
+    
+    def _ichimoku_columns(self, data: Mapping[str, Any]) -> Dict[str, Any]:
+        close = data['close']
+        
+        tenkan = (self._rolling_max(data, 'high', 9) + self._rolling_min(data, 'low', 9)) / 2
+        kijun = (self._rolling_max(data, 'high', 26) + self._rolling_min(data, 'low', 26)) / 2
+        senkou_a = ((tenkan + kijun) / 2).shift(26)
+        senkou_b = ((self._rolling_max(data, 'high', 52) + self._rolling_min(data, 'low', 52)) / 2).shift(26)
+        
+        above_cloud = (close > senkou_a) & (close > senkou_b)
+        below_cloud = (close < senkou_a) & (close < senkou_b)
+        
+        return {
+            'ICHIMOKU_TENKAN': tenkan,
+            'ICHIMOKU_KIJUN': kijun,
+            'ICHIMOKU_SENKOU_A': senkou_a,
+            'ICHIMOKU_SENKOU_B': senkou_b,
+            'ICHIMOKU_CHIKOU': close.shift(-26),
+            'ICHIMOKU_SIGNAL': self._signal(above_cloud, below_cloud)
+        }
+    
+    def check_precision(self, reference: pd.DataFrame, reduced: pd.DataFrame,
+                        rtol: float = FLOAT32_RTOL) -> Dict[str, Any]:
+        # Compares a reduced-precision indicator frame with the float64 frame
+        # for the same bars against the tolerance documented at PRECISIONS.
+        max_rel_error = {}
+        failures = []
+        for col in reduced.columns:
+            if col not in reference.columns or col in self.required_columns:
+                continue
+            expected = reference[col].to_numpy(dtype=np.float64)
+            actual = reduced[col].to_numpy(dtype=np.float64)
+            
+            if reduced[col].dtype.kind in 'iu':
+                max_rel_error[col] = 0.0 if np.array_equal(expected, actual) else float('inf')
+            else:
+                finite = np.isfinite(expected)
+                same_special = np.array_equal(finite, np.isfinite(actual)) and \
+                    np.array_equal(expected[~finite], actual[~finite], equal_nan=True)
+                with np.errstate(all='ignore'):
+                    error = np.abs(actual[finite] - expected[finite]) / np.maximum(np.abs(expected[finite]), 1e-300)
+                max_rel_error[col] = float(error.max()) if error.size else 0.0
+                if not same_special:
+                    max_rel_error[col] = float('inf')
+            
+            if max_rel_error[col] > rtol:
+                failures.append(col)
         
-        return df
+        return {'ok': not failures, 'rtol': rtol, 'failures': failures, 'max_rel_error': max_rel_error}
     
     def get_indicator_summary(self, df: pd.DataFrame) -> Dict:
         if df.empty:
@@ -341,25 +549,10 @@ class TechnicalIndicators:
             'signals': {}
         }
         
-        for col in ['MA5', 'MA10', 'MA20', 'MA60']:
-            if col in df.columns:
-                summary['trend_indicators'][col] = float(last[col]) if pd.notna(last[col]) else None
-        
-        for col in ['MACD', 'MACD_SIGNAL', 'MACD_HISTOGRAM']:
-            if col in df.columns:
-                summary['momentum_indicators'][col] = float(last[col]) if pd.notna(last[col]) else None
-        
-        for col in ['RSI', 'K', 'D', 'J', 'CCI', 'WILLIAMS_R', 'MFI', 'ROC']:
-            if col in df.columns:
-                summary['momentum_indicators'][col] = float(last[col]) if pd.notna(last[col]) else None
-        
-        for col in ['BB_UPPER', 'BB_LOWER', 'BB_WIDTH', 'ATR', 'ADX']:
-            if col in df.columns:
-                summary['volatility_indicators'][col] = float(last[col]) if pd.notna(last[col]) else None
-        
-        for col in ['OBV', 'VWAP']:
-            if col in df.columns:
-                summary['volume_indicators'][col] = float(last[col]) if pd.notna(last[col]) else None
+        for group, cols in SUMMARY_FIELDS.items():
+            for col in cols:
+                if col in df.columns:
+                    summary[group][col] = float(last[col]) if pd.notna(last[col]) else None
         
         signal_cols = [col for col in df.columns if col.endswith('_SIGNAL')]
         for col in signal_cols:
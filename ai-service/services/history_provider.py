@@ -0,0 +1,107 @@
+import pandas as pd
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import logging
+
+from services.bar_store import BarStore
+from services.singleflight import singleflight
+
+logger = logging.getLogger(__name__)
+
+
+HISTORY_COLUMNS = {
+    '日期': 'date',
+    '开盘': 'open',
+    '最高': 'high',
+    '最低': 'low',
+    '收盘': 'close',
+    '成交量': 'volume',
+    '成交额': 'turnover',
+    '涨跌幅': 'changePercent'
+}
+
+
+class HistoryProvider:
+    # Single source of daily history for every service. Frames are normalized
+    # once to a date-indexed float64 frame with English column names and
+    # shared read-only between callers, so treat them as immutable.
+
+    def __init__(self, bar_store: BarStore = None, cache_ttl: int = 300, min_days: int = 120):
+        self._bar_store = bar_store or BarStore()
+        self._min_days = min_days
+        self._cache: Dict[str, Tuple[pd.DataFrame, int, datetime]] = {}
+        self._cache_ttl = cache_ttl
+        # Set by the background refresher: expired entries are then served
+        # immediately while a reload runs in the background.
+        self.serve_stale = False
+        self.max_stale = 3600
+        # Loads fill this instance's cache, so flights are scoped to it.
+        self._flight = f'history:{id(self):x}'
+
+    def get_history_df(self, code: str, days: int = 120) -> pd.DataFrame:
+        cached = self._get_cached(code, days)
+        if cached is not None:
+            return cached
+
+        stale = self._get_stale(code, days)
+        if stale is not None:
+            _, cached_days, _ = self._cache[code]
+            singleflight.do_async(f"{self._flight}:{code}:{cached_days}", self._load, code, cached_days)
+            return stale
+
+        # Load at least min_days so the short and long windows requested by
+        # different endpoints for the same symbol share one entry.
+        fetch_days = max(days, self._min_days)
+        df = singleflight.do(f"{self._flight}:{code}:{fetch_days}", self._load, code, fetch_days)
+        return df.tail(days)
+
+    def refresh(self, code: str, days: int = None, force_sync: bool = False) -> pd.DataFrame:
+        entry = self._cache.get(code)
+        fetch_days = max(days or (entry[1] if entry else 0), self._min_days)
+        return singleflight.do(f"{self._flight}:{code}:{fetch_days}", self._load, code, fetch_days, force_sync)
+
+    def get_cache_age(self, code: str) -> Optional[float]:
+        entry = self._cache.get(code)
+        if entry is None:
+            return None
+        return (datetime.now() - entry[2]).total_seconds()
+
+    def _load(self, code: str, fetch_days: int, force_sync: bool = False) -> pd.DataFrame:
+        raw = self._bar_store.get_bars(code, fetch_days, force_sync=force_sync)
+        df = self._normalize(raw)
+        self._cache[code] = (df, fetch_days, datetime.now())
+        return df
+
+    def _get_cached(self, code: str, days: int):
+        entry = self._cache.get(code)
+        if entry is None:
+            return None
+        df, cached_days, cached_time = entry
+        if (datetime.now() - cached_time).total_seconds() >= self._cache_ttl:
+            return None
+        if days > cached_days:
+            return None
+        return df.tail(days)
+
+    def _get_stale(self, code: str, days: int):
+        if not self.serve_stale:
+            return None
+        entry = self._cache.get(code)
+        if entry is None:
+            return None
+        df, cached_days, cached_time = entry
+        if days > cached_days or (datetime.now() - cached_time).total_seconds() >= self.max_stale:
+            return None
+        return df.tail(days)
+
+    @staticmethod
+    def _normalize(raw: pd.DataFrame) -> pd.DataFrame:
+        if raw is None or raw.empty:
+            return pd.DataFrame(columns=list(HISTORY_COLUMNS.values())[1:],
+                                index=pd.DatetimeIndex([], name='date'), dtype='float64')
+
+        columns = [col for col in HISTORY_COLUMNS if col in raw.columns]
+        df = raw[columns].rename(columns=HISTORY_COLUMNS)
+        df['date'] = pd.to_datetime(df['date'])
+        df = df.set_index('date')
+        return df.astype('float64')
@@ -0,0 +1,190 @@
+import os
+import pickle
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Result a cancelled leader hands its followers: they retry the lookup, and
+# one of them computes, instead of failing as if they had been cancelled.
+_RETRY = object()
+
+
+class IndicatorCache:
+    # Bounded LRU of indicator results (frames and summaries) keyed by symbol,
+    # the bars they were computed from and the parameters. A changed last bar
+    # (new date, or an intraday revision of today's bar) drops the symbol's
+    # older entries; concurrent requests for the same key await one
+    # computation. Results are shared between requests and must not be
+    # mutated.
+
+    def __init__(self, max_bytes: int = None, max_entries: int = 1024):
+        self.max_bytes = max_bytes or int(float(os.getenv('INDICATOR_CACHE_MB', '64')) * 1024 * 1024)
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self._bar_states: "OrderedDict[str, Tuple]" = OrderedDict()
+        self._pending: Dict[Tuple, asyncio.Future] = {}
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'shared': 0, 'evictions': 0, 'invalidations': 0}
+
+    async def get_frame(
+        self,
+        code: str,
+        history: pd.DataFrame,
+        outputs: Optional[List[str]],
+        compute: Callable[[], Awaitable[pd.DataFrame]]
+    ) -> pd.DataFrame:
+        # A cached frame with every indicator also serves any subset.
+        key = self._make_key(code, history, ('frame', tuple(outputs) if outputs is not None else None))
+        fallback = None
+        if outputs is not None:
+            full_key = self._make_key(code, history, ('frame', None))
+
+            def fallback():
+                entry = self._entries.get(full_key)
+                if entry is None:
+                    return None
+                self._entries.move_to_end(full_key)
+                frame = entry[0]
+                wanted = set(outputs)
+                return frame[list(history.columns) + [col for col in frame.columns if col in wanted]]
+
+        return await self._get_or_compute(key, compute, fallback)
+
+    async def get_summary(
+        self,
+        code: str,
+        history: pd.DataFrame,
+        compute: Callable[[], Awaitable[Dict]]
+    ) -> Dict:
+        return await self._get_or_compute(self._make_key(code, history, ('summary',)), compute)
+
+    @staticmethod
+    def _make_key(code: str, history: pd.DataFrame, params: Hashable) -> Tuple:
+        # (code, bar state, bar count, params). The bar state fingerprints the
+        # last bar so an intraday revision is a different key, not a stale hit.
+        if history.empty:
+            bar_state = (None, None, None)
+        else:
+            bar_state = (history.index[-1], float(history['close'].iloc[-1]), float(history['volume'].iloc[-1]))
+        return code, bar_state, len(history), params
+
+    async def _get_or_compute(
+        self,
+        key: Tuple,
+        compute: Callable[[], Awaitable[Any]],
+        fallback: Callable[[], Any] = None
+    ) -> Any:
+        while True:
+            with self._lock:
+                self._invalidate_if_new_bar(key)
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[0]
+                value = fallback() if fallback is not None else None
+                if value is not None:
+                    self._stats['hits'] += 1
+                    return value
+                self._stats['misses'] += 1
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = asyncio.get_running_loop().create_future()
+                    self._pending[key] = pending
+                    leader = True
+                else:
+                    self._stats['shared'] += 1
+                    leader = False
+
+            if leader:
+                break
+            value = await asyncio.shield(pending)
+            if value is not _RETRY:
+                return value
+
+        try:
+            value = await compute()
+        except Exception as e:
+            pending.set_exception(e)
+            # Followers re-raise it; retrieve it so an unawaited one is not logged.
+            pending.exception()
+            raise
+        else:
+            self._put(key, value)
+            pending.set_result(value)
+            return value
+        finally:
+            if not pending.done():
+                pending.set_result(_RETRY)
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _invalidate_if_new_bar(self, key: Tuple):
+        # Bar states are kept for at most max_entries symbols, least recently
+        # looked up first out, together with any entries left for them.
+        code, bar_state = key[0], key[1]
+        previous = self._bar_states.get(code)
+        self._bar_states[code] = bar_state
+        self._bar_states.move_to_end(code)
+        while len(self._bar_states) > self.max_entries:
+            self._drop_entries(self._bar_states.popitem(last=False)[0])
+        if previous is not None and previous != bar_state:
+            self._stats['invalidations'] += self._drop_entries(code, keep=bar_state)
+
+    def _drop_entries(self, code: str, keep: Tuple = None) -> int:
+        stale = [k for k in self._entries if k[0] == code and k[1] != keep]
+        for k in stale:
+            self._bytes -= self._entries.pop(k)[1]
+        return len(stale)
+
+    def _put(self, key: Tuple, value: Any):
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            logger.warning(f"Indicator result for {key[0]} ({size} bytes) exceeds the cache budget")
+            return
+        with self._lock:
+            # The bars moved on while this was computing; do not cache it.
+            if self._bar_states.get(key[0]) != key[1]:
+                return
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats['evictions'] += 1
+
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        if isinstance(value, pd.DataFrame):
+            return int(value.memory_usage(index=True, deep=False).sum())
+        try:
+            return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return 1024
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bar_states.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hit_ratio': self._stats['hits'] / lookups if lookups else 0.0,
+                **self._stats
+            }
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import numbers
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+from services.market_calendar import next_phase_change
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_LLM_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'llm_cache.sqlite3'
+)
+
+# Seconds a result stays valid per kind of call. Results that depend on the
+# market are also dropped when the trading phase changes (open, lunch break,
+# close), since the next phase brings new prices and news.
+KIND_TTLS = {
+    'analysis': 1800,
+    'market_summary': 900,
+    'news_impact': 86400,
+}
+SESSION_BOUND = {'analysis', 'market_summary'}
+
+# Inputs are rounded to this many significant digits before fingerprinting,
+# so ticks and indicator noise below what the prompt conveys reuse a result.
+SIGNIFICANT_DIGITS = 4
+
+
+def _normalize(value: Any, digits: int) -> Any:
+    # Only numbers are rounded (NumPy scalars included); strings such as
+    # stock codes ("000001") are kept verbatim.
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        value = float(value)
+        return float(f"{value:.{digits}g}") if value == value else None
+    if isinstance(value, dict):
+        return {str(k): _normalize(v, digits) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v, digits) for v in value]
+    return str(value)
+
+
+def fingerprint(kind: str, model: str, inputs: Dict[str, Any], digits: int = SIGNIFICANT_DIGITS) -> str:
+    payload = json.dumps([kind, model, _normalize(inputs, digits)], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    # Persistent cache of LLM results keyed by a fingerprint of the model and
+    # the rounded prompt inputs. Entries live in SQLite so they survive
+    # restarts; recently used ones are also kept in memory. Values are stored
+    # as JSON and every get returns a fresh copy.
+
+    def __init__(self, path: str = None, max_memory_entries: int = 512, enabled: bool = None):
+        self.path = path or os.getenv('LLM_CACHE_PATH', DEFAULT_LLM_CACHE_PATH)
+        self.enabled = enabled if enabled is not None else os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+        self.max_memory_entries = max_memory_entries
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._db = None
+        if self.enabled:
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._db = sqlite3.connect(self.path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache "
+                    "(key TEXT PRIMARY KEY, kind TEXT, value TEXT, expires_at REAL)"
+                )
+                self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+                self._db.commit()
+            except Exception as e:
+                logger.warning(f"LLM cache at {self.path} unavailable, caching in memory only: {e}")
+                self._db = None
+
+    def get(self, kind: str, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            stats = self._kind_stats(kind)
+            entry = self._memory.get(key)
+            if entry is None and self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT expires_at, value FROM llm_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                except Exception as e:
+                    logger.warning(f"LLM cache read failed: {e}")
+                    row = None
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self._remember(key, entry)
+
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    self._forget(key)
+                    stats['expired'] += 1
+                stats['misses'] += 1
+                return None
+
+            self._memory.move_to_end(key)
+            stats['hits'] += 1
+            value = entry[1]
+        return json.loads(value)
+
+    def put(self, kind: str, key: str, value: Any):
+        if not self.enabled:
+            return
+        expires_at = self.expires_at(kind)
+        text = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, (expires_at, text))
+            self._kind_stats(kind)['stores'] += 1
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, kind, value, expires_at) VALUES (?, ?, ?, ?)",
+                        (key, kind, text, expires_at)
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    logger.warning(f"LLM cache write failed: {e}")
+
+    @staticmethod
+    def expires_at(kind: str, now: float = None) -> float:
+        now = now if now is not None else time.time()
+        expires_at = now + KIND_TTLS.get(kind, 900)
+        if kind in SESSION_BOUND:
+            expires_at = min(expires_at, next_phase_change().timestamp())
+        return expires_at
+
+    def _remember(self, key: str, entry: Tuple[float, str]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _forget(self, key: str):
+        self._memory.pop(key, None)
+        if self._db is not None:
+            try:
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._db.commit()
+            except Exception as e:
+                logger.warning(f"LLM cache delete failed: {e}")
+
+    def _kind_stats(self, kind: str) -> Dict[str, int]:
+        if kind not in self._stats:
+            self._stats[kind] = {'hits': 0, 'misses': 0, 'stores': 0, 'expired': 0}
+        return self._stats[kind]
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            kinds = {}
+            for kind, stats in self._stats.items():
+                lookups = stats['hits'] + stats['misses']
+                kinds[kind] = {**stats, 'hit_ratio': stats['hits'] / lookups if lookups else 0.0}
+            hits = sum(s['hits'] for s in self._stats.values())
+            lookups = hits + sum(s['misses'] for s in self._stats.values())
+            stored = None
+            if self._db is not None:
+                try:
+                    stored = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+                except Exception:
+                    stored = None
+            return {
+                'enabled': self.enabled,
+                'persistent': self._db is not None,
+                'memory_entries': len(self._memory),
+                'stored_entries': stored,
+                'hit_ratio': hits / lookups if lookups else 0.0,
+                'kinds': kinds
+            }
@@ -0,0 +1,73 @@
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUsageTracker:
+    # Input/output token counts and latency of every upstream LLM call, per
+    # kind of call, plus the most recent calls, so prompt changes can be
+    # measured in tokens and in latency per output token.
+
+    def __init__(self, recent: int = 50):
+        self._lock = threading.Lock()
+        self._kinds: Dict[str, Dict[str, float]] = {}
+        self._recent = deque(maxlen=recent)
+
+    def record(self, kind: str, model: str, usage: Any, latency: float, mode: str = None):
+        input_tokens = _usage_value(usage, 'input_tokens')
+        output_tokens = _usage_value(usage, 'output_tokens')
+        logger.info(
+            f"LLM {kind} ({model}{', ' + mode if mode else ''}): {input_tokens} input / "
+            f"{output_tokens} output tokens in {latency * 1000:.0f}ms"
+        )
+        with self._lock:
+            stats = self._kinds.setdefault(kind, {
+                'calls': 0, 'input_tokens': 0, 'output_tokens': 0, 'latency_s': 0.0
+            })
+            stats['calls'] += 1
+            stats['input_tokens'] += input_tokens or 0
+            stats['output_tokens'] += output_tokens or 0
+            stats['latency_s'] += latency
+            self._recent.append({
+                'kind': kind,
+                'model': model,
+                'mode': mode,
+                'input_tokens': input_tokens,
+                'output_tokens': output_tokens,
+                'latency_ms': round(latency * 1000, 1),
+                'timestamp': datetime.now().isoformat()
+            })
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            kinds = {}
+            for kind, stats in self._kinds.items():
+                calls = stats['calls']
+                kinds[kind] = {
+                    'calls': calls,
+                    'input_tokens': stats['input_tokens'],
+                    'output_tokens': stats['output_tokens'],
+                    'avg_input_tokens': stats['input_tokens'] / calls,
+                    'avg_output_tokens': stats['output_tokens'] / calls,
+                    'avg_latency_ms': stats['latency_s'] * 1000 / calls,
+                    'ms_per_output_token': stats['latency_s'] * 1000 / stats['output_tokens']
+                    if stats['output_tokens'] else None
+                }
+            return {
+                'input_tokens': sum(s['input_tokens'] for s in self._kinds.values()),
+                'output_tokens': sum(s['output_tokens'] for s in self._kinds.values()),
+                'kinds': kinds,
+                'recent': list(self._recent)
+            }
+
+
+def _usage_value(usage: Any, name: str) -> Optional[int]:
+    # dashscope responses expose usage as an attribute dict; tolerate either.
+    if usage is None:
+        return None
+    value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+    return int(value) if value is not None else None
@@ -0,0 +1,44 @@
+from datetime import datetime, time, timedelta, timezone
+
+
+# Trading calendar of the A-share market: sessions and phase boundaries.
+# Kept free of service imports so any layer can depend on it.
+
+# A-shares trade on Beijing time, which has no DST, so a fixed offset is exact
+# and does not depend on tzdata being installed in the container.
+MARKET_TZ = timezone(timedelta(hours=8))
+
+MORNING_SESSION = (time(9, 15), time(11, 30))
+AFTERNOON_SESSION = (time(13, 0), time(15, 0))
+
+
+def market_now() -> datetime:
+    return datetime.now(MARKET_TZ)
+
+
+def get_market_phase(now: datetime = None) -> str:
+    now = now or market_now()
+    if now.weekday() >= 5:
+        return 'closed'
+    t = now.time()
+    if MORNING_SESSION[0] <= t < MORNING_SESSION[1] or AFTERNOON_SESSION[0] <= t < AFTERNOON_SESSION[1]:
+        return 'trading'
+    if MORNING_SESSION[1] <= t < AFTERNOON_SESSION[0]:
+        return 'break'
+    return 'closed'
+
+
+def next_phase_change(now: datetime = None) -> datetime:
+    # When get_market_phase(now) next changes: the end of the current session
+    # or break, or the next weekday's open while closed.
+    now = now or market_now()
+    boundaries = [MORNING_SESSION[0], MORNING_SESSION[1], AFTERNOON_SESSION[0], AFTERNOON_SESSION[1]]
+    if now.weekday() < 5:
+        for boundary in boundaries:
+            at = datetime.combine(now.date(), boundary, now.tzinfo)
+            if at > now:
+                return at
+    day = now.date() + timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return datetime.combine(day, MORNING_SESSION[0], now.tzinfo)
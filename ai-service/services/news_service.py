@@ -1,10 +1,14 @@
-import akshare as ak
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 import re
 
+from services.concurrency import iter_completed
+from services.providers.base import MarketDataProvider
+from services.providers.factory import get_market_data_provider
+from services.singleflight import singleflight
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -17,10 +21,12 @@ except ImportError:
 
 class NewsService:
     
-    def __init__(self):
+    def __init__(self, provider: MarketDataProvider = None):
+        self._provider = provider or get_market_data_provider()
         self._news_cache = None
         self._cache_time = None
         self._cache_ttl = 1800
+        self._sentiment_cache: Dict[str, Tuple[datetime, Dict[str, Any]]] = {}
     
     def _is_cache_valid(self) -> bool:
         if self._cache_time is None:
@@ -31,9 +37,12 @@ class NewsService:
         if self._is_cache_valid() and self._news_cache:
             return self._news_cache[:limit]
         
+        return singleflight.do(f"news:hot:{limit}", self._fetch_hot_news, limit)
+    
+    def _fetch_hot_news(self, limit: int) -> List[Dict[str, Any]]:
         results = []
         try:
-            df = ak.stock_news_em(symbol="财经新闻")
+            df = self._provider.get_news("财经新闻")
             
             for _, row in df.head(limit).iterrows():
                 title = row.get('新闻标题', '')
@@ -59,11 +68,26 @@ class NewsService:
         return results
     
     def get_stock_sentiment(self, code: str) -> Dict[str, Any]:
+        cached = self.get_cached_stock_sentiment(code)
+        if cached is not None:
+            return cached
+        return singleflight.do(f"news:{code}", self._fetch_stock_sentiment, code)
+    
+    def get_cached_stock_sentiment(self, code: str) -> Optional[Dict[str, Any]]:
+        # Never scrapes: the sentiment of a fetch within the cache TTL, or None.
+        entry = self._sentiment_cache.get(code)
+        if entry is None or (datetime.now() - entry[0]).total_seconds() >= self._cache_ttl:
+            return None
+        return dict(entry[1])
+    
+    def _fetch_stock_sentiment(self, code: str) -> Dict[str, Any]:
         try:
-            df = ak.stock_news_em(symbol=code)
+            df = self._provider.get_news(code)
             
             if df.empty:
-                return {"sentiment": "中性", "score": 0.5, "news_count": 0}
+                result = {"sentiment": "中性", "score": 0.5, "news_count": 0}
+                self._sentiment_cache[code] = (datetime.now(), result)
+                return result
             
             sentiments = []
             for _, row in df.head(10).iterrows():
@@ -80,16 +104,27 @@ class NewsService:
             else:
                 sentiment_label = "中性"
             
-            return {
+            result = {
                 "sentiment": sentiment_label,
                 "score": avg_score,
                 "news_count": len(sentiments)
             }
+            # Failures below are not cached, so the next request retries.
+            self._sentiment_cache[code] = (datetime.now(), result)
+            return result
             
         except Exception as e:
             logger.error(f"Failed to get sentiment for {code}: {e}")
             return {"sentiment": "中性", "score": 0.5, "news_count": 0}
     
+    def get_stock_sentiment_bulk(self, codes: List[str],
+                                 max_workers: int = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for code, sentiment, error in iter_completed(self.get_stock_sentiment, codes, max_workers):
+            if error is not None:
+                logger.error(f"Failed to get sentiment for {code}: {error}")
+                sentiment = {"sentiment": "中性", "score": 0.5, "news_count": 0}
+            yield code, sentiment
+    
     def _analyze_sentiment(self, text: str) -> Dict[str, Any]:
         if not text:
             return {"sentiment": "中性", "score": 0.5}
@@ -0,0 +1,23 @@
+import akshare as ak
+import pandas as pd
+
+from services.concurrency import get_rate_limiter
+from services.providers.base import MarketDataProvider
+
+
+class AkshareProvider(MarketDataProvider):
+
+    name = 'akshare'
+
+    def get_spot(self) -> pd.DataFrame:
+        with get_rate_limiter('akshare'):
+            return ak.stock_zh_a_spot_em()
+
+    def get_history(self, code: str, start_date: str, end_date: str, adjust: str = "qfq") -> pd.DataFrame:
+        with get_rate_limiter('akshare'):
+            return ak.stock_zh_a_hist(symbol=code, period="daily",
+                                      start_date=start_date, end_date=end_date, adjust=adjust)
+
+    def get_news(self, symbol: str) -> pd.DataFrame:
+        with get_rate_limiter('akshare'):
+            return ak.stock_news_em(symbol=symbol)
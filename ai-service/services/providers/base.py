@@ -0,0 +1,22 @@
+import pandas as pd
+from abc import ABC, abstractmethod
+
+
+class MarketDataProvider(ABC):
+    # Upstream market data as raw akshare-shaped frames (Chinese column
+    # names). Services normalize what they read, so every backend only has
+    # to reproduce the akshare schema.
+
+    name = 'base'
+
+    @abstractmethod
+    def get_spot(self) -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def get_history(self, code: str, start_date: str, end_date: str, adjust: str = "qfq") -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def get_news(self, symbol: str) -> pd.DataFrame:
+        pass
@@ -0,0 +1,45 @@
+import os
+import threading
+import logging
+
+from services.providers.base import MarketDataProvider
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_REPLAY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                  'data', 'replay')
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def create_market_data_provider(kind: str = None) -> MarketDataProvider:
+    kind = (kind or os.getenv('MARKET_DATA_PROVIDER', 'akshare')).lower()
+    replay_dir = os.getenv('REPLAY_DATA_DIR', DEFAULT_REPLAY_DIR)
+
+    if kind == 'replay':
+        from services.providers.replay_provider import ReplayProvider
+        return ReplayProvider(
+            replay_dir,
+            latency_ms=float(os.getenv('REPLAY_LATENCY_MS', '0')),
+            jitter_ms=float(os.getenv('REPLAY_JITTER_MS', '0'))
+        )
+
+    from services.providers.akshare_provider import AkshareProvider
+    if kind == 'record':
+        from services.providers.replay_provider import RecordingProvider
+        return RecordingProvider(AkshareProvider(), replay_dir)
+
+    if kind != 'akshare':
+        logger.warning(f"Unknown market data provider '{kind}', falling back to akshare")
+    return AkshareProvider()
+
+
+def get_market_data_provider() -> MarketDataProvider:
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = create_market_data_provider()
+            logger.info(f"Using market data provider: {_provider.name}")
+        return _provider
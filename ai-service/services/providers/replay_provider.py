@@ -0,0 +1,133 @@
+import os
+import time
+import random
+import threading
+import pandas as pd
+from typing import Dict
+import logging
+
+from services.providers.base import MarketDataProvider
+
+logger = logging.getLogger(__name__)
+
+
+# Layout shared by ReplayProvider and RecordingProvider:
+#   <data_dir>/spot.csv
+#   <data_dir>/bars/<code>.csv
+#   <data_dir>/news/<symbol>.csv
+CODE_COLUMNS = {'代码': str}
+
+
+def _spot_path(data_dir: str) -> str:
+    return os.path.join(data_dir, 'spot.csv')
+
+
+def _bars_path(data_dir: str, code: str) -> str:
+    return os.path.join(data_dir, 'bars', f"{code}.csv")
+
+
+def _news_path(data_dir: str, symbol: str) -> str:
+    return os.path.join(data_dir, 'news', f"{symbol}.csv")
+
+
+class ReplayProvider(MarketDataProvider):
+    # Serves recorded frames from local files, with synthetic per-call latency
+    # so load tests and benchmarks behave like a slow upstream without network.
+
+    name = 'replay'
+
+    def __init__(self, data_dir: str, latency_ms: float = 0, jitter_ms: float = 0):
+        self.data_dir = data_dir
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def get_spot(self) -> pd.DataFrame:
+        self._sleep()
+        return self._load(_spot_path(self.data_dir)).copy()
+
+    def get_history(self, code: str, start_date: str, end_date: str, adjust: str = "qfq") -> pd.DataFrame:
+        self._sleep()
+        df = self._load(_bars_path(self.data_dir, code))
+        if df.empty:
+            return df.copy()
+        dates = pd.to_datetime(df['日期'])
+        mask = (dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))
+        return df[mask].reset_index(drop=True)
+
+    def get_news(self, symbol: str) -> pd.DataFrame:
+        self._sleep()
+        return self._load(_news_path(self.data_dir, symbol)).copy()
+
+    def _sleep(self):
+        delay = self.latency_ms
+        if self.jitter_ms:
+            delay += random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _load(self, path: str) -> pd.DataFrame:
+        with self._lock:
+            if path not in self._frames:
+                if os.path.exists(path):
+                    self._frames[path] = pd.read_csv(path, dtype=CODE_COLUMNS)
+                else:
+                    logger.warning(f"No recorded data at {path}")
+                    self._frames[path] = pd.DataFrame()
+            return self._frames[path]
+
+
+class RecordingProvider(MarketDataProvider):
+    # Passes calls through to another provider and saves every response in
+    # the replay layout, so a live session can be captured for later replay.
+
+    def __init__(self, inner: MarketDataProvider, data_dir: str):
+        self.inner = inner
+        self.data_dir = data_dir
+        self.name = f"recording:{inner.name}"
+        self._lock = threading.Lock()
+
+    def get_spot(self) -> pd.DataFrame:
+        df = self.inner.get_spot()
+        self._save(_spot_path(self.data_dir), df)
+        return df
+
+    def get_history(self, code: str, start_date: str, end_date: str, adjust: str = "qfq") -> pd.DataFrame:
+        df = self.inner.get_history(code, start_date, end_date, adjust)
+        if df is None or df.empty:
+            return df
+        path = _bars_path(self.data_dir, code)
+        # Read, merge and write under one lock so concurrent recordings of
+        # the same code each merge against the other's rows. A recording
+        # that cannot be read or written never fails the live call.
+        try:
+            with self._lock:
+                merged = df
+                if os.path.exists(path):
+                    stored = pd.read_csv(path, dtype=CODE_COLUMNS)
+                    merged = pd.concat([stored, df.astype({'日期': str})], ignore_index=True)
+                    merged = merged.drop_duplicates(subset='日期', keep='last').sort_values('日期')
+                self._write(path, merged)
+        except Exception as e:
+            logger.warning(f"Failed to record {path}: {e}")
+        return df
+
+    def get_news(self, symbol: str) -> pd.DataFrame:
+        df = self.inner.get_news(symbol)
+        self._save(_news_path(self.data_dir, symbol), df)
+        return df
+
+    def _save(self, path: str, df: pd.DataFrame):
+        if df is None or df.empty:
+            return
+        try:
+            with self._lock:
+                self._write(path, df)
+        except Exception as e:
+            logger.warning(f"Failed to record {path}: {e}")
+
+    @staticmethod
+    def _write(path: str, df: pd.DataFrame):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_csv(path, index=False)
@@ -0,0 +1,118 @@
+import sys
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+SPOT_COLUMNS = {
+    '代码': 'code',
+    '名称': 'name',
+    '最新价': 'currentPrice',
+    '涨跌幅': 'changePercent',
+    '成交量': 'volume',
+    '成交额': 'turnover',
+    '最高': 'high',
+    '最低': 'low',
+    '今开': 'open',
+    '昨收': 'preClose'
+}
+
+QUOTE_FIELDS = ['code', 'name', 'currentPrice', 'changePercent', 'volume', 'turnover',
+                'high', 'low', 'open', 'preClose']
+SCREEN_FIELDS = ['code', 'name', 'currentPrice', 'changePercent', 'volume', 'turnover']
+
+# Prices and change (2 decimals, well under 1e5) fit in float32. Volume and
+# turnover stay float64: float32 is exact for integers only up to 2**24
+# (~16.8M lots), which liquid names exceed, and turnover reaches 1e10+ yuan.
+FLOAT32_FIELDS = ['currentPrice', 'changePercent', 'high', 'low', 'open', 'preClose']
+PRICE_FIELDS = {'currentPrice', 'changePercent', 'high', 'low', 'open', 'preClose'}
+
+
+class Quote:
+    __slots__ = ('code', 'name', 'currentPrice', 'changePercent', 'volume', 'turnover',
+                 'high', 'low', 'open', 'preClose')
+
+    def __init__(self, table: 'QuoteTable', row: int):
+        self.code = table.codes[row]
+        self.name = table.names[row]
+        for field in QUOTE_FIELDS[2:]:
+            value = float(table.columns[field][row])
+            # float32 values carry representation noise past the 2 decimals
+            # upstream publishes, so prices are rounded back on the way out.
+            setattr(self, field, round(value, 2) if field in PRICE_FIELDS else value)
+
+    def to_dict(self, fields: List[str] = None) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in (fields or QUOTE_FIELDS)}
+
+
+class QuoteTable:
+    # Immutable full-market snapshot: interned code strings, a code -> row
+    # dict for O(1) lookups and one typed NumPy array per field. Built once
+    # per refresh and shared read-only by every quote consumer.
+
+    def __init__(self, codes: List[str], names: List[str], columns: Dict[str, np.ndarray]):
+        self.codes = codes
+        self.names = names
+        self.columns = columns
+        self._index = {code: row for row, code in enumerate(codes)}
+        for array in columns.values():
+            array.flags.writeable = False
+
+    @classmethod
+    def from_frame(cls, raw: pd.DataFrame) -> 'QuoteTable':
+        df = raw[[col for col in SPOT_COLUMNS if col in raw.columns]].rename(columns=SPOT_COLUMNS)
+        df = df.drop_duplicates(subset='code')
+
+        codes = [sys.intern(str(code)) for code in df['code'].tolist()]
+        names = df['name'].astype(str).tolist() if 'name' in df.columns else [''] * len(codes)
+        columns = {}
+        for field in QUOTE_FIELDS[2:]:
+            if field in df.columns:
+                values = pd.to_numeric(df[field], errors='coerce').to_numpy()
+            else:
+                values = np.full(len(codes), np.nan)
+            dtype = np.float32 if field in FLOAT32_FIELDS else np.float64
+            columns[field] = np.ascontiguousarray(values, dtype=dtype)
+        return cls(codes, names, columns)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._index
+
+    def get(self, code: str) -> Optional[Quote]:
+        row = self._index.get(code)
+        return Quote(self, row) if row is not None else None
+
+    def top_by(self, field: str, limit: int, mask: np.ndarray = None) -> List[Quote]:
+        # Highest values first, NaNs excluded.
+        if limit <= 0:
+            return []
+        values = self.columns[field]
+        valid = ~np.isnan(values)
+        if mask is not None:
+            valid &= mask
+        rows = np.flatnonzero(valid)
+        if limit < len(rows):
+            rows = np.sort(rows[np.argpartition(-values[rows], limit - 1)[:limit]])
+        rows = rows[np.argsort(-values[rows], kind='stable')]
+        return [Quote(self, row) for row in rows]
+
+    def mask(self, field: str, lower: float = None, upper: float = None) -> np.ndarray:
+        values = self.columns[field]
+        result = np.ones(len(values), dtype=bool)
+        # Compare in the column's own precision so a bound equal to a listed
+        # price matches it exactly.
+        if lower is not None:
+            result &= values >= values.dtype.type(lower)
+        if upper is not None:
+            result &= values <= values.dtype.type(upper)
+        return result
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.columns.values())
@@ -0,0 +1,134 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import logging
+
+from services.market_calendar import AFTERNOON_SESSION, MARKET_TZ, get_market_phase, market_now
+from services.stock_data import StockDataService
+from services.history_provider import HistoryProvider
+
+logger = logging.getLogger(__name__)
+
+
+# Delay before the post-close refresh so upstream has published final bars.
+POST_CLOSE_DELAY = timedelta(minutes=10)
+
+DEFAULT_WATCHLIST = ["600519", "000858", "000001", "600036", "601318"]
+
+
+class BackgroundRefresher:
+    # Renews the spot snapshot and watchlist histories shortly before their
+    # TTL runs out, so requests are served from cache. Cadence follows the
+    # session: frequent while trading, one pass at the lunch break and one
+    # after the close, idle otherwise. History passes always sync the bar
+    # store, so history_interval alone sets how fresh watchlist bars are;
+    # the store's own sync_interval only applies to request-driven loads.
+
+    def __init__(
+        self,
+        stock_service: StockDataService,
+        history_provider: HistoryProvider,
+        watchlist: List[str] = None,
+        snapshot_interval: int = 50,
+        history_interval: int = 240,
+        tick: int = 5
+    ):
+        self.stock_service = stock_service
+        self.history_provider = history_provider
+        if watchlist is None:
+            env_codes = os.getenv('WATCHLIST_CODES', '')
+            watchlist = [c.strip() for c in env_codes.split(',') if c.strip()] or DEFAULT_WATCHLIST
+        self.watchlist = watchlist
+        self.snapshot_interval = snapshot_interval
+        self.history_interval = history_interval
+        self.tick = tick
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_snapshot: Optional[datetime] = None
+        self._last_history: Optional[datetime] = None
+        self._last_phase: Optional[str] = None
+        self._stats = {'snapshot_refreshes': 0, 'history_refreshes': 0, 'failures': 0}
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.stock_service.serve_stale = True
+        self.history_provider.serve_stale = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='background-refresher', daemon=True)
+        self._thread.start()
+        logger.info(f"Background refresher started for {len(self.watchlist)} watchlist symbols")
+
+    def stop(self):
+        self._stop.set()
+        self.stock_service.serve_stale = False
+        self.history_provider.serve_stale = False
+        if self._thread is not None:
+            self._thread.join(timeout=self.tick * 2)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._refresh_due(market_now())
+            except Exception as e:
+                self._stats['failures'] += 1
+                logger.warning(f"Background refresh failed: {e}")
+            self._stop.wait(self.tick)
+
+    def _refresh_due(self, now: datetime):
+        phase = get_market_phase(now)
+        entered = phase != self._last_phase
+        self._last_phase = phase
+
+        if phase == 'trading':
+            if self._is_due(self._last_snapshot, now, self.snapshot_interval):
+                self._refresh_snapshot(now)
+            if self._is_due(self._last_history, now, self.history_interval):
+                self._refresh_histories(now)
+        elif phase == 'break':
+            if entered:
+                self._refresh_snapshot(now)
+        elif self._needs_post_close_refresh(now):
+            self._refresh_snapshot(now)
+            self._refresh_histories(now)
+
+    def _needs_post_close_refresh(self, now: datetime) -> bool:
+        if now.weekday() >= 5:
+            return False
+        close_at = datetime.combine(now.date(), AFTERNOON_SESSION[1], MARKET_TZ) + POST_CLOSE_DELAY
+        if now < close_at:
+            return False
+        return self._last_history is None or self._last_history < close_at
+
+    @staticmethod
+    def _is_due(last: Optional[datetime], now: datetime, interval: int) -> bool:
+        return last is None or (now - last).total_seconds() >= interval
+
+    def _refresh_snapshot(self, now: datetime):
+        self.stock_service.refresh_spot_snapshot()
+        self._last_snapshot = now
+        self._stats['snapshot_refreshes'] += 1
+
+    def _refresh_histories(self, now: datetime):
+        for code in self.watchlist:
+            if self._stop.is_set():
+                return
+            try:
+                self.history_provider.refresh(code, force_sync=True)
+            except Exception as e:
+                self._stats['failures'] += 1
+                logger.warning(f"Failed to refresh history for {code}: {e}")
+        self._last_history = now
+        self._stats['history_refreshes'] += 1
+
+    def get_stats(self) -> Dict:
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'phase': get_market_phase(),
+            'watchlist': self.watchlist,
+            'last_snapshot': self._last_snapshot.isoformat() if self._last_snapshot else None,
+            'last_history': self._last_history.isoformat() if self._last_history else None,
+            **self._stats
+        }
@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # Collapses concurrent calls with the same key into one execution: the
+    # first caller runs fn, everyone arriving while it is in flight waits and
+    # receives the same result (or exception).
+
+    def __init__(self, max_tracked_keys: int = 1000):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._stats: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self._max_tracked_keys = max_tracked_keys
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            stats = self._stats_for(key)
+            stats['requests'] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                stats['shared'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                stats['executions'] += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def do_async(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> bool:
+        # Fire-and-forget variant used for background revalidation. Returns
+        # False without starting a thread when the key is already in flight.
+        with self._lock:
+            if key in self._calls:
+                return False
+
+        def run():
+            try:
+                self.do(key, fn, *args, **kwargs)
+            except Exception as e:
+                logger.warning(f"Background call {key} failed: {e}")
+
+        threading.Thread(target=run, name=f"singleflight-{key}", daemon=True).start()
+        return True
+
+    def _stats_for(self, key: str) -> Dict[str, int]:
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = {'requests': 0, 'executions': 0, 'shared': 0}
+            self._stats[key] = stats
+            if len(self._stats) > self._max_tracked_keys:
+                self._stats.popitem(last=False)
+        else:
+            self._stats.move_to_end(key)
+        return stats
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = {key: dict(stats) for key, stats in self._stats.items()}
+            in_flight = len(self._calls)
+
+        requests = sum(s['requests'] for s in keys.values())
+        shared = sum(s['shared'] for s in keys.values())
+        return {
+            'requests': requests,
+            'executions': sum(s['executions'] for s in keys.values()),
+            'shared': shared,
+            'collapse_ratio': shared / requests if requests else 0.0,
+            'in_flight': in_flight,
+            'keys': keys
+        }
+
+
+singleflight = SingleFlight()
@@ -1,46 +1,97 @@
-import akshare as ak
 import pandas as pd
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from datetime import datetime
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import logging
 
+from services.concurrency import iter_completed
+from services.history_provider import HistoryProvider
+from services.providers.base import MarketDataProvider
+from services.providers.factory import get_market_data_provider
+from services.quote_table import QuoteTable, SCREEN_FIELDS
+from services.singleflight import singleflight
+
 logger = logging.getLogger(__name__)
 
 
+def history_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    if df.empty:
+        return []
+    out = df.reset_index()
+    out['date'] = out['date'].dt.strftime('%Y-%m-%d')
+    return out.to_dict('records')
+
+
 class StockDataService:
     
-    def __init__(self):
+    def __init__(self, history_provider: HistoryProvider = None, provider: MarketDataProvider = None):
+        self._provider = provider or get_market_data_provider()
+        self._history = history_provider or HistoryProvider()
         self._cache = {}
         self._cache_time = {}
         self._cache_ttl = 60
+        # Set by the background refresher: an expired snapshot is then served
+        # immediately while a new one is downloaded in the background.
+        self.serve_stale = False
+        self.max_stale = 900
+        # Each instance caches its own snapshot, so it only joins downloads
+        # that will fill that cache.
+        self._spot_flight = f'spot:{id(self):x}'
     
     def _is_cache_valid(self, key: str) -> bool:
         if key not in self._cache_time:
             return False
-        return (datetime.now() - self._cache_time[key]).seconds < self._cache_ttl
+        return (datetime.now() - self._cache_time[key]).total_seconds() < self._cache_ttl
+    
+    def _get_spot_snapshot(self) -> QuoteTable:
+        # One full-market download per TTL, converted once into a compact
+        # QuoteTable that every quote consumer shares read-only.
+        if self._is_cache_valid('spot'):
+            return self._cache['spot']
+        
+        age = self.get_snapshot_age()
+        if self.serve_stale and age is not None and age < self.max_stale:
+            singleflight.do_async(self._spot_flight, self._refresh_spot_snapshot)
+            return self._cache['spot']
+        
+        return self.refresh_spot_snapshot()
+    
+    def refresh_spot_snapshot(self) -> QuoteTable:
+        return singleflight.do(self._spot_flight, self._refresh_spot_snapshot)
+    
+    def get_snapshot_age(self) -> Optional[float]:
+        if 'spot' not in self._cache_time:
+            return None
+        return (datetime.now() - self._cache_time['spot']).total_seconds()
+    
+    def get_snapshot_info(self) -> Dict[str, Any]:
+        age = self.get_snapshot_age()
+        if age is None:
+            return {"asOf": None, "ageSeconds": None, "stale": True}
+        return {
+            "asOf": self._cache_time['spot'].isoformat(),
+            "ageSeconds": round(age, 1),
+            "stale": age >= self._cache_ttl
+        }
+    
+    def _refresh_spot_snapshot(self) -> QuoteTable:
+        table = QuoteTable.from_frame(self._provider.get_spot())
+        
+        self._cache['spot'] = table
+        self._cache_time['spot'] = datetime.now()
+        return table
     
     def get_realtime_quotes(self, codes: List[str]) -> List[Dict[str, Any]]:
         results = []
         try:
-            df = ak.stock_zh_a_spot_em()
+            table = self._get_spot_snapshot()
             
+            update_time = self._cache_time['spot'].isoformat()
             for code in codes:
-                stock_data = df[df['代码'] == code]
-                if not stock_data.empty:
-                    row = stock_data.iloc[0]
-                    results.append({
-                        "code": code,
-                        "name": row.get('名称', ''),
-                        "currentPrice": float(row.get('最新价', 0)),
-                        "changePercent": float(row.get('涨跌幅', 0)),
-                        "volume": float(row.get('成交量', 0)),
-                        "turnover": float(row.get('成交额', 0)),
-                        "high": float(row.get('最高', 0)),
-                        "low": float(row.get('最低', 0)),
-                        "open": float(row.get('今开', 0)),
-                        "preClose": float(row.get('昨收', 0)),
-                        "updateTime": datetime.now().isoformat()
-                    })
+                quote = table.get(code)
+                if quote is not None:
+                    record = quote.to_dict()
+                    record["updateTime"] = update_time
+                    results.append(record)
         except Exception as e:
             logger.error(f"Failed to get realtime quotes: {e}")
         
@@ -53,82 +104,42 @@ class StockDataService:
     def get_hot_stocks(self, limit: int = 20) -> List[Dict[str, Any]]:
         results = []
         try:
-            df = ak.stock_zh_a_spot_em()
-            df = df.sort_values(by='成交额', ascending=False)
-            
-            for _, row in df.head(limit).iterrows():
-                results.append({
-                    "code": row.get('代码', ''),
-                    "name": row.get('名称', ''),
-                    "currentPrice": float(row.get('最新价', 0)),
-                    "changePercent": float(row.get('涨跌幅', 0)),
-                    "volume": float(row.get('成交量', 0)),
-                    "turnover": float(row.get('成交额', 0)),
-                    "high": float(row.get('最高', 0)),
-                    "low": float(row.get('最低', 0)),
-                    "open": float(row.get('今开', 0)),
-                    "preClose": float(row.get('昨收', 0))
-                })
+            table = self._get_spot_snapshot()
+            results = [quote.to_dict() for quote in table.top_by('turnover', limit)]
         except Exception as e:
             logger.error(f"Failed to get hot stocks: {e}")
         
         return results
     
-    def get_history(self, code: str, days: int = 30) -> List[Dict[str, Any]]:
-        results = []
+    def get_history(self, code: str, days: int = 30) -> pd.DataFrame:
         try:
-            end_date = datetime.now().strftime('%Y%m%d')
-            start_date = (datetime.now() - timedelta(days=days * 2)).strftime('%Y%m%d')
-            
-            df = ak.stock_zh_a_hist(symbol=code, period="daily", 
-                                   start_date=start_date, end_date=end_date, adjust="qfq")
-            
-            df = df.tail(days)
-            
-            for _, row in df.iterrows():
-                results.append({
-                    "date": row.get('日期', '').strftime('%Y-%m-%d') if hasattr(row.get('日期', ''), 'strftime') else str(row.get('日期', '')),
-                    "open": float(row.get('开盘', 0)),
-                    "high": float(row.get('最高', 0)),
-                    "low": float(row.get('最低', 0)),
-                    "close": float(row.get('收盘', 0)),
-                    "volume": float(row.get('成交量', 0)),
-                    "turnover": float(row.get('成交额', 0)),
-                    "changePercent": float(row.get('涨跌幅', 0))
-                })
+            return self._history.get_history_df(code, days)
         except Exception as e:
             logger.error(f"Failed to get history for {code}: {e}")
-        
-        return results
+            return pd.DataFrame()
+    
+    def get_history_bulk(self, codes: List[str], days: int = 30,
+                         max_workers: int = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+        for code, df, error in iter_completed(lambda c: self._history.get_history_df(c, days),
+                                              codes, max_workers):
+            if error is not None:
+                logger.error(f"Failed to get history for {code}: {error}")
+                df = pd.DataFrame()
+            yield code, df
     
     def screen_stocks(self, conditions: Dict[str, Any]) -> List[Dict[str, Any]]:
         results = []
         try:
-            df = ak.stock_zh_a_spot_em()
+            table = self._get_spot_snapshot()
             
-            if conditions.get("min_price"):
-                df = df[df['最新价'] >= conditions["min_price"]]
-            if conditions.get("max_price"):
-                df = df[df['最新价'] <= conditions["max_price"]]
-            if conditions.get("min_change"):
-                df = df[df['涨跌幅'] >= conditions["min_change"]]
-            if conditions.get("max_change"):
-                df = df[df['涨跌幅'] <= conditions["max_change"]]
-            if conditions.get("min_volume"):
-                df = df[df['成交量'] >= conditions["min_volume"]]
+            mask = (
+                table.mask('currentPrice', conditions.get("min_price") or None, conditions.get("max_price") or None)
+                & table.mask('changePercent', conditions.get("min_change") or None, conditions.get("max_change") or None)
+                & table.mask('volume', conditions.get("min_volume") or None)
+            )
             
-            df = df.sort_values(by='成交额', ascending=False)
             limit = conditions.get("limit", 10)
-            
-            for _, row in df.head(limit).iterrows():
-                results.append({
-                    "code": row.get('代码', ''),
-                    "name": row.get('名称', ''),
-                    "currentPrice": float(row.get('最新价', 0)),
-                    "changePercent": float(row.get('涨跌幅', 0)),
-                    "volume": float(row.get('成交量', 0)),
-                    "turnover": float(row.get('成交额', 0))
-                })
+            results = [quote.to_dict(SCREEN_FIELDS) for quote in table.top_by('turnover', limit, mask)]
         except Exception as e:
             logger.error(f"Failed to screen stocks: {e}")
         
@@ -1,40 +1,29 @@
-import akshare as ak
 import pandas as pd
 import numpy as np
 from typing import Dict, Any, List
-from datetime import datetime, timedelta
 import logging
 
+from services.history_provider import HistoryProvider
+
 logger = logging.getLogger(__name__)
 
 
 class TechnicalAnalysisService:
     
-    def __init__(self):
-        self._history_cache = {}
+    def __init__(self, history_provider: HistoryProvider = None):
+        self._history = history_provider or HistoryProvider()
     
     def _get_history_df(self, code: str, days: int = 120) -> pd.DataFrame:
-        cache_key = f"{code}_{days}"
-        if cache_key in self._history_cache:
-            cached_df, cached_time = self._history_cache[cache_key]
-            if (datetime.now() - cached_time).seconds < 300:
-                return cached_df
-        
         try:
-            end_date = datetime.now().strftime('%Y%m%d')
-            start_date = (datetime.now() - timedelta(days=days * 2)).strftime('%Y%m%d')
-            
-            df = ak.stock_zh_a_hist(symbol=code, period="daily",
-                                   start_date=start_date, end_date=end_date, adjust="qfq")
-            
-            self._history_cache[cache_key] = (df, datetime.now())
-            return df
+            return self._history.get_history_df(code, days)
         except Exception as e:
             logger.error(f"Failed to get history for {code}: {e}")
             return pd.DataFrame()
     
     def analyze(self, code: str) -> Dict[str, Any]:
-        df = self._get_history_df(code)
+        return self.analyze_history(self._get_history_df(code))
+    
+    def analyze_history(self, df: pd.DataFrame) -> Dict[str, Any]:
         if df.empty:
             return {"trend": "未知", "summary": "无法获取数据", "signals": []}
         
@@ -60,26 +49,26 @@ class TechnicalAnalysisService:
     def _calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         df = df.copy()
         
-        df['MA5'] = df['收盘'].rolling(window=5).mean()
-        df['MA10'] = df['收盘'].rolling(window=10).mean()
-        df['MA20'] = df['收盘'].rolling(window=20).mean()
-        df['MA60'] = df['收盘'].rolling(window=60).mean()
+        df['MA5'] = df['close'].rolling(window=5).mean()
+        df['MA10'] = df['close'].rolling(window=10).mean()
+        df['MA20'] = df['close'].rolling(window=20).mean()
+        df['MA60'] = df['close'].rolling(window=60).mean()
         
-        delta = df['收盘'].diff()
+        delta = df['close'].diff()
         gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
         loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
         rs = gain / loss
         df['RSI'] = 100 - (100 / (1 + rs))
         
-        ema12 = df['收盘'].ewm(span=12, adjust=False).mean()
-        ema26 = df['收盘'].ewm(span=26, adjust=False).mean()
+        ema12 = df['close'].ewm(span=12, adjust=False).mean()
+        ema26 = df['close'].ewm(span=26, adjust=False).mean()
         df['MACD'] = ema12 - ema26
         df['Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
         df['Histogram'] = df['MACD'] - df['Signal']
         
-        low_min = df['最低'].rolling(window=9).min()
-        high_max = df['最高'].rolling(window=9).max()
-        df['K'] = 100 * (df['收盘'] - low_min) / (high_max - low_min)
+        low_min = df['low'].rolling(window=9).min()
+        high_max = df['high'].rolling(window=9).max()
+        df['K'] = 100 * (df['close'] - low_min) / (high_max - low_min)
         df['D'] = df['K'].rolling(window=3).mean()
         
         return df
@@ -88,7 +77,7 @@ class TechnicalAnalysisService:
         if len(df) < 20:
             return "数据不足"
         
-        last_close = df['收盘'].iloc[-1]
+        last_close = df['close'].iloc[-1]
         ma5 = df['MA5'].iloc[-1]
         ma10 = df['MA10'].iloc[-1]
         ma20 = df['MA20'].iloc[-1]
@@ -147,10 +136,10 @@ class TechnicalAnalysisService:
         last = df.iloc[-1]
         prev = df.iloc[-2]
         
-        change_pct = (last['收盘'] - prev['收盘']) / prev['收盘'] * 100
+        change_pct = (last['close'] - prev['close']) / prev['close'] * 100
         
         summary = f"当前趋势：{trend}。"
-        summary += f"最新收盘价{last['收盘']:.2f}，"
+        summary += f"最新收盘价{last['close']:.2f}，"
         
         if change_pct > 0:
             summary += f"上涨{change_pct:.2f}%。"
@@ -1,21 +1,80 @@
 import os
 import json
+import asyncio
+import time
+import hashlib
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
 import dashscope
 from dashscope import Generation
 
+from services.concurrency import get_rate_limiter
+from services.llm_cache import LLMCache, fingerprint
+from services.llm_usage import LLMUsageTracker
+from services.singleflight import singleflight
+
 logger = logging.getLogger(__name__)
 
 
+# Compact prompt mode: instructions shared by every stock go in one system
+# message, the schema is terse, and only the requested sections are asked
+# for. Sections not requested are filled with the defaults, as for a reply
+# that omits them.
+COMPACT_SYSTEM_PROMPT = (
+    "你是专业股票分析师，为投资新手给出简单易懂的建议。只输出一个JSON对象，不要其他内容。"
+    "用大白话，避免术语；给出具体数字；单只股票投入不超过总资金10%；亏损8-10%止损。"
+)
+
+COMPACT_CORE_SCHEMA = (
+    '"recommendation":"BUY|SELL|HOLD","confidence":0-1,"risk_level":"低|中等|较高|高",'
+    '"trend_direction":"上涨|下跌|横盘震荡","reasons":[str],"technical_analysis":str,'
+    '"suggestion":str,"stop_loss":num,"target_price":num'
+)
+
+COMPACT_SECTION_SCHEMAS = {
+    'support_resistance': '"support_resistance":{"support_levels":[{"price":num,"strength":"强|中|弱","reason":str}],'
+                          '"resistance_levels":[{"price":num,"strength":"强|中|弱","reason":str}],'
+                          '"current_position":str,"breakthrough_hint":str}',
+    'stop_profit_strategy': '"stop_profit_strategy":{"tiered_profit_taking":[{"trigger":str,"action":str,"reason":str}],'
+                            '"trailing_stop":{"enabled":bool,"trigger":str,"stop_ratio":str,"explanation":str},'
+                            '"time_based_exit":{"holding_period":str,"reason":str}}',
+    'stop_loss_strategy': '"stop_loss_strategy":{"initial_stop_loss":{"price":num,"ratio":str,"reason":str},'
+                          '"moving_stop_loss":{"condition":str,"method":str},"forced_exit_conditions":[str]}',
+    'risk_factors': '"risk_factors":[{"factor":str,"level":"高|中|低","description":str,"mitigation":str}]',
+    'market_environment': '"market_environment":{"overall_assessment":str,"impact_on_stock":str,"suggested_position":str}',
+    'operation_difficulty': '"operation_difficulty":{"level":"简单|中等|复杂","reason":str,"suitable_for":str,'
+                            '"required_skills":[str]}',
+    'batch_operation_plan': '"batch_operation_plan":{"buy_plan":[{"condition":str,"position":str,"price_hint":str}],'
+                            '"sell_plan":[{"condition":str,"position":str,"price_hint":str}],'
+                            '"total_position_limit":str,"execution_timeline":str}',
+    'investment_advice': '"investment_advice":{"position_ratio":str,"max_investment":str,"why_this_ratio":str,'
+                         '"risk_warning":str,"beginner_tips":[str]}',
+    'simple_explanation': '"simple_explanation":{"what_to_do":str,"key_point":str,"when_to_buy":str,"when_to_sell":str}',
+    'data_quality': '"data_quality":{"completeness_score":0-1,"data_used":[str],"missing_data":[str],'
+                    '"reliability_note":str}',
+}
+ANALYSIS_SECTIONS = list(COMPACT_SECTION_SCHEMAS)
+
+# Output budget of a compact analysis: the core fields plus each section.
+COMPACT_CORE_TOKENS = 400
+COMPACT_SECTION_TOKENS = 250
+
+
 class TongyiAnalysisService:
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, max_concurrency: int = None, request_timeout: float = None,
+                 cache: LLMCache = None):
         self.api_key = api_key or os.getenv('DASHSCOPE_API_KEY')
         if self.api_key:
             dashscope.api_key = self.api_key
         self.model = 'qwen-turbo'
+        self.max_concurrency = max_concurrency or int(os.getenv('TONGYI_MAX_CONCURRENCY', '4'))
+        self.request_timeout = request_timeout if request_timeout is not None else \
+            float(os.getenv('TONGYI_REQUEST_TIMEOUT', '60'))
+        self.cache = cache or LLMCache()
+        self.usage = LLMUsageTracker()
+        self.prompt_mode = os.getenv('TONGYI_PROMPT_MODE', 'full')
     
     def analyze_stock(
         self,
@@ -24,25 +83,27 @@ class TongyiAnalysisService:
         current_price: float,
         tech_indicators: Dict,
         news_sentiment: Dict,
-        historical_summary: str = None
+        historical_summary: str = None,
+        sections: List[str] = None,
+        compact: bool = None
     ) -> Dict:
         
-        prompt = self._build_analysis_prompt(
-            code, name, current_price, tech_indicators, news_sentiment, historical_summary
+        cache_key, request = self._analysis_request(
+            code, name, current_price, tech_indicators, news_sentiment, historical_summary, sections, compact
         )
+        cached = self.cache.get('analysis', cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            response = Generation.call(
-                model=self.model,
-                prompt=prompt,
-                max_tokens=3000,
-                temperature=0.7,
-                top_p=0.8
-            )
+            response = self._call('analysis', **request)
             
             if response.status_code == 200:
                 result_text = response.output.text
-                return self._parse_analysis_result(result_text, code, name, current_price)
+                result = self._parse_analysis_result(result_text, code, name, current_price)
+                if result['source'] == 'tongyi_qwen':
+                    self.cache.put('analysis', cache_key, result)
+                return result
             else:
                 logger.error(f"Tongyi API error: {response.code} - {response.message}")
                 return self._get_default_result(code, name, current_price)
@@ -51,6 +112,186 @@ class TongyiAnalysisService:
             logger.error(f"Failed to call Tongyi API: {e}")
             return self._get_default_result(code, name, current_price)
     
+    def _analysis_request(
+        self,
+        code: str,
+        name: str,
+        current_price: float,
+        tech_indicators: Dict,
+        news_sentiment: Dict,
+        historical_summary: str,
+        sections: Optional[List[str]],
+        compact: Optional[bool]
+    ) -> Tuple[str, Dict]:
+        # Asking for specific sections implies the compact prompt.
+        if compact is None:
+            compact = sections is not None or self.prompt_mode == 'compact'
+        if compact:
+            sections = ANALYSIS_SECTIONS if sections is None else [s for s in ANALYSIS_SECTIONS if s in sections]
+            request = {
+                'model': self.model,
+                'messages': [
+                    {'role': 'system', 'content': COMPACT_SYSTEM_PROMPT},
+                    {'role': 'user', 'content': self._build_compact_analysis_prompt(
+                        code, name, current_price, tech_indicators, news_sentiment, historical_summary, sections
+                    )}
+                ],
+                'max_tokens': COMPACT_CORE_TOKENS + COMPACT_SECTION_TOKENS * len(sections),
+                'temperature': 0.7,
+                'top_p': 0.8
+            }
+        else:
+            sections = None
+            request = {
+                'model': self.model,
+                'prompt': self._build_analysis_prompt(
+                    code, name, current_price, tech_indicators, news_sentiment, historical_summary
+                ),
+                'max_tokens': 3000,
+                'temperature': 0.7,
+                'top_p': 0.8
+            }
+        
+        cache_key = fingerprint('analysis', self.model, {
+            'code': code, 'name': name, 'current_price': current_price, 'tech_indicators': tech_indicators,
+            'news_sentiment': news_sentiment, 'historical_summary': historical_summary,
+            'compact': compact, 'sections': sections
+        })
+        return cache_key, request
+    
+    async def iter_analyze_stock_batch(
+        self,
+        requests: List[Dict],
+        max_concurrency: int = None,
+        timeout: float = None,
+        run: Callable[..., Awaitable[Any]] = None
+    ) -> AsyncIterator[Tuple[int, Dict]]:
+        # Each request holds the keyword arguments of analyze_stock. At most
+        # max_concurrency calls are in flight; (position in requests, result)
+        # pairs are yielded as each finishes. `run` executes the blocking call
+        # off the event loop (a WorkerPools.run_io, or a default thread). A
+        # call exceeding `timeout` seconds yields the default result; its
+        # thread is not interruptible and finishes in the background, so the
+        # slot is released when the call ends rather than when the wait does.
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        timeout = timeout if timeout is not None else self.request_timeout
+        run = run or asyncio.to_thread
+        
+        def release(call: asyncio.Future):
+            semaphore.release()
+            # Mark a late failure as retrieved; nobody awaits a timed-out call.
+            if not call.cancelled():
+                call.exception()
+        
+        async def analyze(position: int, req: Dict) -> Tuple[int, Dict]:
+            await semaphore.acquire()
+            call = asyncio.ensure_future(run(self.analyze_stock, **req))
+            call.add_done_callback(release)
+            try:
+                return position, await asyncio.wait_for(asyncio.shield(call), timeout or None)
+            except asyncio.TimeoutError:
+                logger.warning(f"Tongyi analysis of {req['code']} timed out after {timeout}s")
+            except Exception as e:
+                logger.error(f"Failed to analyze {req['code']}: {e}")
+            return position, self._get_default_result(req['code'], req.get('name', ''), req.get('current_price', 0))
+        
+        tasks = [asyncio.ensure_future(analyze(i, req)) for i, req in enumerate(requests)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def analyze_stock_batch(
+        self,
+        requests: List[Dict],
+        max_concurrency: int = None,
+        timeout: float = None,
+        run: Callable[..., Awaitable[Any]] = None,
+        ordered: bool = True
+    ) -> List[Dict]:
+        # Wall time approaches the slowest single call instead of the sum.
+        # Results follow the input order, or completion order with ordered=False.
+        results = []
+        async for position, result in self.iter_analyze_stock_batch(requests, max_concurrency, timeout, run):
+            results.append((position, result))
+        if ordered:
+            results.sort(key=lambda item: item[0])
+        return [result for _, result in results]
+    
+    def stream_analyze_stock(
+        self,
+        code: str,
+        name: str,
+        current_price: float,
+        tech_indicators: Dict,
+        news_sentiment: Dict,
+        historical_summary: str = None,
+        sections: List[str] = None,
+        compact: bool = None
+    ) -> Iterator[Tuple[str, Any]]:
+        # analyze_stock with incremental output: yields ('delta', text) as the
+        # model writes, then ('result', parsed result) exactly once.
+        cache_key, request = self._analysis_request(
+            code, name, current_price, tech_indicators, news_sentiment, historical_summary, sections, compact
+        )
+        cached = self.cache.get('analysis', cache_key)
+        if cached is not None:
+            yield 'result', cached
+            return
+        
+        chunks = []
+        try:
+            for text in self._stream('analysis', **request):
+                chunks.append(text)
+                yield 'delta', text
+        except Exception as e:
+            logger.error(f"Failed to stream Tongyi analysis: {e}")
+            yield 'result', self._get_default_result(code, name, current_price)
+            return
+        
+        result = self._parse_analysis_result(''.join(chunks), code, name, current_price)
+        if result['source'] == 'tongyi_qwen':
+            self.cache.put('analysis', cache_key, result)
+        yield 'result', result
+    
+    def _call(self, kind: str, **kwargs):
+        # Identical prompts in flight at the same time share one LLM call.
+        fingerprint = hashlib.sha1(
+            json.dumps(kwargs, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        return singleflight.do(f"llm:{kwargs.get('model')}:{fingerprint}", self._call_upstream, kind, **kwargs)
+    
+    def _call_upstream(self, kind: str, **kwargs):
+        with get_rate_limiter('dashscope'):
+            start = time.perf_counter()
+            response = Generation.call(**kwargs)
+        if response.status_code == 200:
+            self.usage.record(kind, kwargs.get('model'), getattr(response, 'usage', None),
+                              time.perf_counter() - start, self._prompt_mode_of(kwargs))
+        return response
+    
+    @staticmethod
+    def _prompt_mode_of(kwargs: Dict) -> str:
+        return 'compact' if 'messages' in kwargs else 'full'
+    
+    def _stream(self, kind: str, **kwargs) -> Iterator[str]:
+        # Streamed calls are not shared through singleflight: each caller
+        # consumes its own response. With incremental_output every chunk
+        # carries only the newly generated text; usage arrives with the chunks
+        # and is recorded once the stream ends.
+        get_rate_limiter('dashscope').acquire()
+        start = time.perf_counter()
+        usage = None
+        for response in Generation.call(stream=True, incremental_output=True, **kwargs):
+            if response.status_code != 200:
+                raise RuntimeError(f"Tongyi API error: {response.code} - {response.message}")
+            usage = getattr(response, 'usage', None) or usage
+            if response.output.text:
+                yield response.output.text
+        self.usage.record(kind, kwargs.get('model'), usage, time.perf_counter() - start, self._prompt_mode_of(kwargs))
+    
     def _build_analysis_prompt(
         self,
         code: str,
@@ -194,6 +435,52 @@ class TongyiAnalysisService:
         
         return prompt
     
+    def _build_compact_analysis_prompt(
+        self,
+        code: str,
+        name: str,
+        current_price: float,
+        tech_indicators: Dict,
+        news_sentiment: Dict,
+        historical_summary: str,
+        sections: List[str]
+    ) -> str:
+        
+        schema = ','.join([COMPACT_CORE_SCHEMA] + [COMPACT_SECTION_SCHEMAS[s] for s in sections])
+        history = ' '.join((historical_summary or '暂无').split())
+        
+        return (
+            f"股票{code}({name}) 现价{current_price}元\n"
+            f"指标: {self._format_indicators_compact(tech_indicators)}\n"
+            f"新闻情绪: {self._format_sentiment_compact(news_sentiment)}\n"
+            f"走势: {history}\n"
+            f"输出JSON: {{{schema}}}"
+        )
+    
+    def _format_indicators_compact(self, tech_indicators: Dict) -> str:
+        if not tech_indicators:
+            return "暂无"
+        
+        values = []
+        for group in ('trend_indicators', 'momentum_indicators'):
+            for key, value in (tech_indicators.get(group) or {}).items():
+                if value is not None:
+                    values.append(f"{key}={value:.2f}")
+        
+        signals = tech_indicators.get('signals') or {}
+        if signals:
+            buy_signals = sum(1 for v in signals.values() if v > 0)
+            sell_signals = sum(1 for v in signals.values() if v < 0)
+            values.append(f"买入信号{buy_signals}个 卖出信号{sell_signals}个")
+        
+        return ' '.join(values) or "暂无"
+    
+    def _format_sentiment_compact(self, news_sentiment: Dict) -> str:
+        if not news_sentiment:
+            return "暂无"
+        return (f"{news_sentiment.get('sentiment', '中性')} 得分{news_sentiment.get('score', 0.5):.2f} "
+                f"新闻{news_sentiment.get('news_count', 0)}条")
+    
     def _format_indicators(self, tech_indicators: Dict) -> str:
         if not tech_indicators:
             return "暂无技术指标数据"
@@ -461,6 +748,11 @@ class TongyiAnalysisService:
         }
     
     def generate_market_summary(self, market_data: Dict) -> str:
+        cache_key = fingerprint('market_summary', self.model, market_data)
+        cached = self.cache.get('market_summary', cache_key)
+        if cached is not None:
+            return cached
+        
         prompt = f"""请根据以下A股市场数据，生成一段简短的市场概况分析（100字以内），用大白话解释：
 
 市场数据：
@@ -469,7 +761,8 @@ class TongyiAnalysisService:
 请直接输出分析文本，用简单易懂的语言，不要有其他内容。"""
         
         try:
-            response = Generation.call(
+            response = self._call(
+                'market_summary',
                 model=self.model,
                 prompt=prompt,
                 max_tokens=200,
@@ -477,13 +770,20 @@ class TongyiAnalysisService:
             )
             
             if response.status_code == 200:
-                return response.output.text.strip()
+                summary = response.output.text.strip()
+                self.cache.put('market_summary', cache_key, summary)
+                return summary
         except Exception as e:
             logger.error(f"Failed to generate market summary: {e}")
         
         return "今日A股市场整体表现平稳，建议关注市场热点板块。"
     
     def analyze_news_impact(self, news_title: str, news_content: str = None) -> Dict:
+        cache_key = fingerprint('news_impact', self.model, {'title': news_title, 'content': news_content})
+        cached = self.cache.get('news_impact', cache_key)
+        if cached is not None:
+            return cached
+        
         prompt = f"""请分析以下财经新闻对股市的影响，用简单语言解释：
 
 新闻标题：{news_title}
@@ -499,7 +799,8 @@ class TongyiAnalysisService:
 }}"""
         
         try:
-            response = Generation.call(
+            response = self._call(
+                'news_impact',
                 model=self.model,
                 prompt=prompt,
                 max_tokens=300,
@@ -512,7 +813,9 @@ class TongyiAnalysisService:
                 json_end = result_text.rfind('}') + 1
                 
                 if json_start >= 0 and json_end > json_start:
-                    return json.loads(result_text[json_start:json_end])
+                    impact = json.loads(result_text[json_start:json_end])
+                    self.cache.put('news_impact', cache_key, impact)
+                    return impact
         except Exception as e:
             logger.error(f"Failed to analyze news impact: {e}")
         
@@ -524,15 +827,19 @@ class TongyiAnalysisService:
             'beginner_advice': '建议观望，等待更多信息'
         }
     
-    def chat(self, question: str, context: str = None) -> str:
+    def _build_chat_prompt(self, question: str, context: str = None) -> str:
         prompt = question
         if context:
             prompt = f"背景信息：\n{context}\n\n问题：{question}"
         
-        prompt += "\n\n请用简单易懂的语言回答，避免专业术语，给新手也能听懂的建议。"
+        return prompt + "\n\n请用简单易懂的语言回答，避免专业术语，给新手也能听懂的建议。"
+    
+    def chat(self, question: str, context: str = None) -> str:
+        prompt = self._build_chat_prompt(question, context)
         
         try:
-            response = Generation.call(
+            response = self._call(
+                'chat',
                 model=self.model,
                 prompt=prompt,
                 max_tokens=500,
@@ -545,3 +852,16 @@ class TongyiAnalysisService:
             logger.error(f"Chat failed: {e}")
         
         return "抱歉，我暂时无法回答这个问题。"
+    
+    def stream_chat(self, question: str, context: str = None) -> Iterator[str]:
+        answered = False
+        try:
+            prompt = self._build_chat_prompt(question, context)
+            for text in self._stream('chat', model=self.model, prompt=prompt, max_tokens=500, temperature=0.7):
+                answered = True
+                yield text
+        except Exception as e:
+            logger.error(f"Chat stream failed: {e}")
+        
+        if not answered:
+            yield "抱歉，我暂时无法回答这个问题。"
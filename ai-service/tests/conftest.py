@@ -0,0 +1,27 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _tied_prices(n: int, seed: int, decimals: int) -> pd.DataFrame:
+    # Prices rounded to the tick with flat stretches, so rolling sums hit the
+    # exact ties where summation order decides crossovers.
+    rng = np.random.default_rng(seed)
+    close = np.round(10 * np.exp(np.cumsum(rng.normal(0, 0.01, n))), decimals)
+    close[n // 3:n // 3 + 25] = close[n // 3]
+    high = np.round(close * (1 + rng.uniform(0, 0.01, n)), decimals)
+    low = np.round(close * (1 - rng.uniform(0, 0.01, n)), decimals)
+    open_ = np.round(close * (1 + rng.normal(0, 0.003, n)), decimals)
+    volume = rng.integers(1000, 100000, n).astype(float) * 100
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume},
+                        index=pd.bdate_range('2024-01-01', periods=n))
+
+
+@pytest.fixture
+def tied_prices():
+    return _tied_prices
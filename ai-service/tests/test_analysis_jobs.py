@@ -0,0 +1,83 @@
+import asyncio
+
+from services.analysis_jobs import AnalysisJobStore
+
+
+def test_job_completes_and_same_key_is_shared():
+    async def main():
+        store = AnalysisJobStore()
+        release = asyncio.Event()
+        calls = []
+
+        async def run():
+            calls.append(1)
+            await release.wait()
+            return {'text': 'done'}
+
+        first = store.submit('000001', run)
+        second = store.submit('000001', run)
+        assert first['status'] == 'pending'
+        assert second['id'] == first['id']
+
+        release.set()
+        job = await store.get(first['id'], wait=1)
+        return calls, job, store.get_stats()
+
+    calls, job, stats = asyncio.run(main())
+    assert len(calls) == 1
+    assert job['status'] == 'done'
+    assert job['result'] == {'text': 'done'}
+    assert job['finished_at'] is not None
+    assert stats['submitted'] == 1 and stats['shared'] == 1 and stats['completed'] == 1
+
+
+def test_failed_job_reports_its_error():
+    async def main():
+        store = AnalysisJobStore()
+
+        async def run():
+            raise RuntimeError('upstream down')
+
+        job = store.submit('000001', run)
+        return await store.get(job['id'], wait=1)
+
+    job = asyncio.run(main())
+    assert job['status'] == 'failed'
+    assert job['error'] == 'upstream down'
+
+
+def test_finished_jobs_expire_and_unknown_ids_are_none():
+    async def main():
+        store = AnalysisJobStore(ttl=0.05)
+
+        async def run():
+            return 'ok'
+
+        job = store.submit('000001', run)
+        assert (await store.get(job['id'], wait=1))['status'] == 'done'
+        await asyncio.sleep(0.1)
+        return await store.get(job['id']), await store.get('missing'), store.get_stats()
+
+    expired, unknown, stats = asyncio.run(main())
+    assert expired is None
+    assert unknown is None
+    assert stats['expired'] == 1 and stats['jobs'] == 0
+
+
+def test_long_poll_returns_pending_state_after_wait():
+    async def main():
+        store = AnalysisJobStore()
+        release = asyncio.Event()
+
+        async def run():
+            await release.wait()
+            return 'ok'
+
+        job = store.submit('000001', run)
+        pending = await store.get(job['id'], wait=0.05)
+        release.set()
+        return pending, await store.get(job['id'], wait=1)
+
+    pending, done = asyncio.run(main())
+    assert pending['status'] == 'pending'
+    assert done['status'] == 'done'
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from services.bar_store import BarStore
+
+
+class FakeProvider:
+
+    def __init__(self, days=120):
+        dates = pd.bdate_range(end=datetime.now().date(), periods=days)
+        close = 10 + np.arange(days) * 0.1
+        self.bars = pd.DataFrame({
+            '日期': dates.strftime('%Y-%m-%d'),
+            '开盘': close, '最高': close + 0.2, '最低': close - 0.2, '收盘': close,
+            '成交量': np.full(days, 1000.0), '成交额': close * 1000, '涨跌幅': np.zeros(days),
+        })
+        self.calls = []
+
+    def get_history(self, code, start_date, end_date, adjust="qfq"):
+        self.calls.append((code, start_date, end_date))
+        dates = pd.to_datetime(self.bars['日期'])
+        return self.bars[(dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))].copy()
+
+
+def make_store(tmp_path, provider, **kwargs):
+    return BarStore(base_dir=str(tmp_path), provider=provider, **kwargs)
+
+
+def test_first_fetch_stores_bars(tmp_path):
+    provider = FakeProvider()
+    store = make_store(tmp_path, provider)
+
+    df = store.get_bars('000001', 30)
+
+    assert len(df) == 30
+    assert len(provider.calls) == 1
+    assert df['收盘'].iloc[-1] == provider.bars['收盘'].iloc[-1]
+    stored = make_store(tmp_path, provider)._read('000001')
+    assert stored is not None and len(stored) >= 30
+
+
+def test_incremental_sync_only_fetches_from_the_anchor(tmp_path):
+    provider = FakeProvider()
+    make_store(tmp_path, provider).get_bars('000001', 30)
+    # Upstream gains a new bar after the first load.
+    last = pd.Timestamp(provider.bars['日期'].iloc[-1])
+    new_day = (last + timedelta(days=1)).strftime('%Y-%m-%d')
+    provider.bars = pd.concat([provider.bars, provider.bars.tail(1).assign(日期=new_day, 收盘=99.0)],
+                              ignore_index=True)
+    provider.calls.clear()
+
+    df = make_store(tmp_path, provider).get_bars('000001', 30, force_sync=True)
+
+    assert len(provider.calls) == 1
+    anchor = pd.Timestamp(provider.bars['日期'].iloc[-3]).strftime('%Y%m%d')
+    assert provider.calls[0][1] == anchor
+    assert df['收盘'].iloc[-1] == 99.0
+    assert df['日期'].is_unique
+
+
+def test_adjustment_change_reloads_stored_bars(tmp_path):
+    provider = FakeProvider()
+    store = make_store(tmp_path, provider)
+    store.get_bars('000001', 30)
+    first_stored = store._cached('000001')['日期'].iloc[0].strftime('%Y%m%d')
+    # An ex-dividend day rescales every qfq close upstream.
+    provider.bars['收盘'] = provider.bars['收盘'] * 0.9
+    provider.calls.clear()
+
+    df = store.get_bars('000001', 30, force_sync=True)
+
+    assert len(provider.calls) == 2
+    assert provider.calls[1][1] == first_stored
+    expected = provider.bars['收盘'].tail(30).to_numpy()
+    np.testing.assert_allclose(df['收盘'].to_numpy(), expected)
+
+
+def test_corrupt_file_is_refetched(tmp_path):
+    provider = FakeProvider()
+    store = make_store(tmp_path, provider)
+    with open(store._path('000001'), 'wb') as f:
+        f.write(b'not a bar file')
+
+    df = store.get_bars('000001', 30)
+
+    assert len(df) == 30
+    assert len(provider.calls) == 1
+    assert len(make_store(tmp_path, provider)._read('000001')) >= 30
+
+
+def test_frames_in_memory_are_bounded(tmp_path):
+    provider = FakeProvider()
+    store = make_store(tmp_path, provider, max_frames=2)
+    for code in ('000001', '000002', '000003'):
+        store.get_bars(code, 30)
+
+    assert list(store._frames) == ['000002', '000003']
+    provider.calls.clear()
+    # An evicted symbol is served from its file without going upstream.
+    df = store.get_bars('000001', 30)
+    assert len(df) == 30
+    assert provider.calls == []
+    assert list(store._frames) == ['000003', '000001']
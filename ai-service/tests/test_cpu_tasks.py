@@ -0,0 +1,38 @@
+import os
+import sys
+import asyncio
+import subprocess
+
+import pandas as pd
+
+from services import cpu_tasks
+from services.executor import WorkerPools
+from services.feature_engineering.technical_indicators import TechnicalIndicators
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_cpu_tasks_import_no_services():
+    # What a spawned worker imports to unpickle a task: no data, news or LLM
+    # service modules, and none of their clients.
+    code = "import sys, services.cpu_tasks; print('\\n'.join(sys.modules))"
+    modules = subprocess.run([sys.executable, '-c', code], cwd=SERVICE_DIR, capture_output=True,
+                             text=True, check=True).stdout.split()
+    for name in ('main', 'services.stock_data', 'services.news_service', 'services.tongyi_service',
+                 'services.history_provider', 'akshare', 'dashscope'):
+        assert name not in modules
+
+
+def test_indicator_frame_in_spawned_worker(tied_prices):
+    df = tied_prices(120, 0, 2)
+
+    async def main():
+        pools = WorkerPools(io_workers=1, cpu_workers=1)
+        try:
+            return await pools.run_cpu(cpu_tasks.indicator_frame, df, ['MA5', 'RSI'])
+        finally:
+            pools.shutdown()
+
+    result = asyncio.run(main())
+    expected = TechnicalIndicators().add_indicators(df, ['MA5', 'RSI'])
+    pd.testing.assert_frame_equal(result, expected)
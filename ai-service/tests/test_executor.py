@@ -0,0 +1,48 @@
+import time
+import asyncio
+
+import pytest
+
+from services.executor import WorkerPools
+
+
+def test_iterate_io_cancelled_mid_next_closes_generator():
+    events = []
+
+    def slow_items():
+        try:
+            for i in range(100):
+                time.sleep(0.2)
+                yield i
+        finally:
+            events.append('closed')
+
+    async def consume(pools, received):
+        async for item in pools.iterate_io(slow_items):
+            received.append(item)
+
+    async def main():
+        pools = WorkerPools(io_workers=4, cpu_workers=0)
+        received = []
+        task = asyncio.ensure_future(consume(pools, received))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        pools.shutdown()
+        return received
+
+    received = asyncio.run(main())
+    assert received == [0, 1]
+    assert events == ['closed']
+
+
+def test_iterate_io_yields_all_items():
+    async def main():
+        pools = WorkerPools(io_workers=2, cpu_workers=0)
+        try:
+            return [item async for item in pools.iterate_io(range, 5)]
+        finally:
+            pools.shutdown()
+
+    assert asyncio.run(main()) == [0, 1, 2, 3, 4]
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from services.indicator_cache import IndicatorCache
+
+
+def test_follower_recomputes_when_leader_is_cancelled(tied_prices):
+    history = tied_prices(30, 0, 2)
+    cache = IndicatorCache()
+    calls = []
+
+    async def compute():
+        calls.append(len(calls))
+        await asyncio.sleep(0.2 if len(calls) == 1 else 0)
+        return {'call': len(calls)}
+
+    async def main():
+        leader = asyncio.ensure_future(cache.get_summary('X', history, compute))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(cache.get_summary('X', history, compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == {'call': 2}
+    assert len(calls) == 2
+
+
+def test_bar_states_bounded_by_capacity(tied_prices):
+    history = tied_prices(30, 0, 2)
+    cache = IndicatorCache(max_entries=8)
+
+    async def compute():
+        return {'ok': True}
+
+    async def main():
+        for i in range(50):
+            await cache.get_summary(f'S{i}', history, compute)
+
+    asyncio.run(main())
+    assert len(cache._bar_states) == 8
+    assert cache.get_stats()['entries'] == 8
+    assert all(key[0] in cache._bar_states for key in cache._entries)
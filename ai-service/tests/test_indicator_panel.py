@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from services.feature_engineering.indicator_panel import compute_panel, panel_fields_from_histories
+from services.feature_engineering.technical_indicators import TechnicalIndicators
+
+
+def _assert_panel_matches(histories):
+    indicators = TechnicalIndicators()
+    panel = compute_panel(panel_fields_from_histories(histories), indicators=indicators)
+    for code, history in histories.items():
+        expected = indicators.add_all_indicators(history)
+        actual = panel.symbol(code)
+        assert actual.index.equals(expected.index), code
+        for col in panel.indicators:
+            # Same helpers over the same bars, so values match to the bit.
+            np.testing.assert_array_equal(actual[col].to_numpy(dtype=np.float64),
+                                          expected[col].to_numpy(dtype=np.float64), err_msg=f"{code} {col}")
+
+
+def test_panel_matches_per_symbol_on_ragged_histories(tied_prices):
+    full = tied_prices(200, 0, 2)
+    # Listed later, so its history starts 80 bars into the shared axis.
+    late = tied_prices(120, 1, 2)
+    late.index = full.index[80:]
+    _assert_panel_matches({'000001': full, '000002': late})
+
+
+def test_panel_matches_per_symbol_with_suspended_symbol(tied_prices):
+    full = tied_prices(200, 2, 2)
+    suspended = tied_prices(200, 3, 2)
+    # No bars while suspended, including the last day.
+    suspended = suspended.drop(suspended.index[60:75]).drop(suspended.index[-1])
+    _assert_panel_matches({'000001': full, '000002': suspended})
+
+
+def test_panel_symbol_drops_padding_dates(tied_prices):
+    full = tied_prices(100, 4, 2)
+    late = tied_prices(40, 5, 2)
+    late.index = full.index[60:]
+    panel = compute_panel(panel_fields_from_histories({'000001': full, '000002': late}))
+
+    assert len(panel.dates) == 100
+    assert len(panel.symbol('000002')) == 40
+    assert panel['MA5']['000002'].iloc[:60].isna().all()
+    assert pd.isna(panel.latest().loc['000002', 'MA60'])
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from services.feature_engineering.technical_indicators import TechnicalIndicators
+from services.feature_engineering.latest_indicators import latest_indicator_summary
+
+
+@pytest.mark.parametrize('decimals', [1, 2])
+@pytest.mark.parametrize('seed', range(10))
+def test_latest_summary_matches_full_pipeline_on_tied_prices(tied_prices, seed, decimals):
+    df = tied_prices(160, seed, decimals)
+    indicators = TechnicalIndicators()
+    full = indicators.add_all_indicators(df)
+    for end in range(2, len(df) + 1):
+        expected = indicators.get_indicator_summary(full.iloc[:end])
+        actual = latest_indicator_summary(df.iloc[:end])
+        assert actual['signals'] == expected['signals'], end
+        for group, values in expected.items():
+            if group == 'signals':
+                continue
+            for col, y in values.items():
+                x = actual[group][col]
+                if y is None or x is None:
+                    assert x is None and y is None, (end, col, x, y)
+                else:
+                    assert abs(x - y) <= 1e-9 * max(1.0, abs(y)), (end, col, x, y)
@@ -0,0 +1,28 @@
+import os
+import sys
+import subprocess
+
+import numpy as np
+
+from services.llm_cache import fingerprint
+
+
+def test_fingerprint_keeps_numeric_looking_strings():
+    assert fingerprint('analysis', 'm', {'code': '000001'}) != fingerprint('analysis', 'm', {'code': '1'})
+    assert fingerprint('analysis', 'm', {'code': '600519'}) != fingerprint('analysis', 'm', {'code': 600519})
+    assert fingerprint('analysis', 'm', {'note': '1.23456'}) != fingerprint('analysis', 'm', {'note': '1.23457'})
+
+
+def test_fingerprint_rounds_numbers():
+    assert fingerprint('analysis', 'm', {'price': 10.00001}) == fingerprint('analysis', 'm', {'price': 10.0})
+    assert fingerprint('analysis', 'm', {'price': np.float32(10.00001)}) == \
+        fingerprint('analysis', 'm', {'price': 10.0})
+    assert fingerprint('analysis', 'm', {'volume': np.int64(5)}) == fingerprint('analysis', 'm', {'volume': 5})
+    assert fingerprint('analysis', 'm', {'price': 10.0}) != fingerprint('analysis', 'm', {'price': 10.01})
+
+
+def test_llm_cache_does_not_import_the_data_layer():
+    code = "import sys, services.llm_cache; print('\\n'.join(sys.modules))"
+    modules = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.split()
+    assert sorted(m for m in modules if m.startswith('services.')) == ['services.llm_cache', 'services.market_calendar']
@@ -0,0 +1,77 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('httpx')
+pytest.importorskip('dashscope')
+pytest.importorskip('akshare')
+
+from fastapi.testclient import TestClient
+
+import main
+from services.analysis_jobs import AnalysisJobStore
+from services.executor import WorkerPools
+from services.indicator_cache import IndicatorCache
+
+
+def _history(n=120):
+    close = 10 + np.sin(np.arange(n) / 5)
+    return pd.DataFrame({'open': close, 'high': close + 0.1, 'low': close - 0.1, 'close': close,
+                         'volume': np.full(n, 1e6)}, index=pd.bdate_range('2024-01-01', periods=n))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    release = threading.Event()
+    history = _history()
+
+    def analyze_stock(code, **kwargs):
+        release.wait(5)
+        return {'code': code, 'analysis': 'llm', 'source': 'tongyi'}
+
+    monkeypatch.setenv('BACKGROUND_REFRESH', 'false')
+    monkeypatch.setattr(main, 'pools', WorkerPools(io_workers=4, cpu_workers=0))
+    monkeypatch.setattr(main, 'analysis_jobs', AnalysisJobStore())
+    monkeypatch.setattr(main, 'indicator_cache', IndicatorCache())
+    monkeypatch.setattr(main.stock_service, 'get_stock_quote',
+                        lambda code: {'code': code, 'name': '平安银行', 'currentPrice': 10.5})
+    monkeypatch.setattr(main.stock_service, 'get_history', lambda code, days: history.tail(days))
+    monkeypatch.setattr(main.news_service, 'get_cached_stock_sentiment', lambda code: None)
+    monkeypatch.setattr(main.news_service, 'get_stock_sentiment',
+                        lambda code: {'sentiment': '积极', 'score': 0.8, 'news_count': 3})
+    monkeypatch.setattr(main.tongyi_service, 'analyze_stock', analyze_stock)
+    with TestClient(main.app) as test_client:
+        yield test_client, release
+    release.set()
+
+
+def test_fast_mode_answers_with_rule_verdict_and_job(client):
+    test_client, release = client
+    response = test_client.get('/api/analyze/stock/000001', params={'mode': 'fast'})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body['source'] == 'rule_based'
+    assert body['sentimentSource'] == 'neutral'
+    assert body['recommendation'] and body['indicators']
+    assert body['job']['status'] == 'pending'
+    assert body['job']['poll'] == f"/api/analyze/jobs/{body['job']['id']}"
+
+    # A second load of the same bars shares the pending job.
+    again = test_client.get('/api/analyze/stock/000001', params={'mode': 'fast'}).json()
+    assert again['job']['id'] == body['job']['id']
+
+    release.set()
+    job = test_client.get(body['job']['poll'], params={'wait': 5}).json()
+    assert job['status'] == 'done'
+    assert job['result']['analysis'] == 'llm'
+    assert job['result']['indicators'] == body['indicators']
+
+
+def test_unknown_job_is_404(client):
+    test_client, _ = client
+    response = test_client.get('/api/analyze/jobs/missing')
+    assert response.status_code == 404
@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from services.market_calendar import MARKET_TZ
+from services.refresher import BackgroundRefresher
+
+
+class RecordingService:
+
+    def __init__(self):
+        self.calls = []
+
+    def refresh_spot_snapshot(self):
+        self.calls.append('spot')
+
+    def refresh(self, code, force_sync=False):
+        self.calls.append((code, force_sync))
+
+
+def test_trading_history_refreshes_sync_the_bar_store():
+    stocks, histories = RecordingService(), RecordingService()
+    refresher = BackgroundRefresher(stocks, histories, watchlist=['000001'], history_interval=240)
+    start = datetime(2024, 6, 3, 10, 0, tzinfo=MARKET_TZ)
+
+    for seconds in range(0, 600, 5):
+        refresher._refresh_due(start + timedelta(seconds=seconds))
+
+    # Every pass reaches upstream, not only those the store's own 300s interval allows.
+    assert histories.calls == [('000001', True)] * 3
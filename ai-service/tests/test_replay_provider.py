@@ -0,0 +1,48 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from services.providers.base import MarketDataProvider
+from services.providers.replay_provider import RecordingProvider, ReplayProvider
+
+
+class FakeUpstream(MarketDataProvider):
+    name = 'fake'
+
+    def get_spot(self):
+        return pd.DataFrame()
+
+    def get_history(self, code, start_date, end_date, adjust='qfq'):
+        dates = pd.bdate_range(start_date, end_date)
+        return pd.DataFrame({'日期': dates.strftime('%Y-%m-%d'), '收盘': range(len(dates))})
+
+    def get_news(self, symbol):
+        return pd.DataFrame()
+
+
+def test_concurrent_recordings_keep_both_ranges(tmp_path, monkeypatch):
+    recorder = RecordingProvider(FakeUpstream(), str(tmp_path))
+    recorder.get_history('000001', '20240101', '20240105')
+    read_csv = pd.read_csv
+
+    def slow_read_csv(*args, **kwargs):
+        time.sleep(0.05)
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(pd, 'read_csv', slow_read_csv)
+    ranges = [('20240108', '20240112'), ('20240115', '20240119')]
+    with ThreadPoolExecutor(2) as pool:
+        list(pool.map(lambda r: recorder.get_history('000001', *r), ranges))
+    monkeypatch.undo()
+
+    replayed = ReplayProvider(str(tmp_path)).get_history('000001', '20240101', '20240131')
+    assert len(replayed) == 15
+
+
+def test_unreadable_recording_does_not_fail_live_call(tmp_path):
+    os.makedirs(tmp_path / 'bars' / '000001.csv')
+    recorder = RecordingProvider(FakeUpstream(), str(tmp_path))
+    df = recorder.get_history('000001', '20240101', '20240105')
+    assert len(df) == 5
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.feature_engineering.rolling_kernels import HAS_NUMBA, rolling_extreme
+
+BACKENDS = ['numpy'] + (['numba'] if HAS_NUMBA else [])
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('window', [1, 9, 26, 60])
+@pytest.mark.parametrize('is_max', [True, False])
+def test_rolling_extreme_matches_argmax(backend, window, is_max):
+    # Rounded prices give ties, which must resolve to the earliest bar as
+    # np.argmax/argmin do; NaN bars blank every window that contains them.
+    rng = np.random.default_rng(window)
+    values = np.round(10 * np.exp(np.cumsum(rng.normal(0, 0.01, (300, 3)), axis=0)), 1)
+    values[rng.random(values.shape) < 0.02] = np.nan
+    extremes, positions = rolling_extreme(values, window, is_max=is_max, backend=backend)
+
+    frame = pd.DataFrame(values).rolling(window)
+    expected = (frame.max() if is_max else frame.min()).to_numpy()
+    expected_pos = frame.apply(lambda x: x.argmax() if is_max else x.argmin(), raw=True).to_numpy()
+    assert np.array_equal(extremes, expected, equal_nan=True)
+    assert np.array_equal(positions, expected_pos, equal_nan=True)
@@ -0,0 +1,62 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from services.bar_store import BarStore
+from services.history_provider import HistoryProvider
+from services.providers.base import MarketDataProvider
+from services.stock_data import StockDataService
+
+
+class SlowProvider(MarketDataProvider):
+    name = 'test'
+
+    def __init__(self, gate: threading.Event):
+        self.gate = gate
+        self.calls = 0
+
+    def get_spot(self) -> pd.DataFrame:
+        self.calls += 1
+        self.gate.wait(5)
+        return pd.DataFrame({'代码': ['000001'], '名称': ['平安银行'], '最新价': [10.5],
+                             '成交量': [123456789], '成交额': [1.3e9]})
+
+    def get_history(self, code, start_date, end_date, adjust='qfq'):
+        self.calls += 1
+        self.gate.wait(5)
+        dates = pd.bdate_range(end=pd.Timestamp(end_date), periods=200)
+        return pd.DataFrame({'日期': dates, '开盘': 10.0, '最高': 10.5, '最低': 9.5, '收盘': 10.0,
+                             '成交量': 1000.0, '成交额': 1e4, '涨跌幅': 0.0})
+
+    def get_news(self, symbol):
+        return pd.DataFrame()
+
+
+def test_instances_do_not_share_spot_downloads(tmp_path):
+    gate = threading.Event()
+    first, second = SlowProvider(gate), SlowProvider(gate)
+    services = [
+        StockDataService(HistoryProvider(BarStore(str(tmp_path / str(i)), provider=provider)), provider)
+        for i, provider in enumerate((first, second))
+    ]
+    with ThreadPoolExecutor(2) as pool:
+        futures = [pool.submit(service.get_realtime_quotes, ['000001']) for service in services]
+        gate.set()
+        results = [future.result() for future in futures]
+    assert [len(quotes) for quotes in results] == [1, 1]
+    assert results[0][0]['volume'] == 123456789
+    assert first.calls == second.calls == 1
+
+
+def test_instances_do_not_share_history_loads(tmp_path):
+    gate = threading.Event()
+    first, second = SlowProvider(gate), SlowProvider(gate)
+    providers = [HistoryProvider(BarStore(str(tmp_path / str(i)), provider=provider))
+                 for i, provider in enumerate((first, second))]
+    with ThreadPoolExecutor(2) as pool:
+        futures = [pool.submit(provider.get_history_df, '000001', 120) for provider in providers]
+        gate.set()
+        frames = [future.result() for future in futures]
+    assert [len(df) for df in frames] == [120, 120]
+    assert all(provider.get_cache_age('000001') is not None for provider in providers)
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.feature_engineering.technical_indicators import ALL_OUTPUTS, TechnicalIndicators
+from services.feature_engineering.streaming_indicators import StreamingIndicatorEngine
+
+# Rolling std follows pandas' compensated Welford update, which can still
+# leave a different ~1e-15 variance residue on a flat window; its square root
+# reaches ~1e-7 in the Bollinger columns, and decides whether BB_PERCENT is
+# NaN (zero width) or finite there.
+STD_COLUMNS = {'BB_UPPER', 'BB_LOWER', 'BB_WIDTH', 'BB_PERCENT'}
+
+
+@pytest.mark.parametrize('decimals', [1, 2])
+@pytest.mark.parametrize('seed', range(15))
+def test_streaming_matches_batch_on_tied_prices(tied_prices, seed, decimals):
+    df = tied_prices(300, seed, decimals)
+    batch = TechnicalIndicators().add_all_indicators(df)
+    engine = StreamingIndicatorEngine()
+    for i, (date, row) in enumerate(df.iterrows()):
+        # An intraday revision first, then the final bar for the same date.
+        engine.update('X', {**row.to_dict(), 'close': row['close'] + 0.1}, date=date)
+        out = engine.update('X', row.to_dict(), date=date)
+        expected = batch.iloc[i]
+        for col in ALL_OUTPUTS:
+            if col == 'ICHIMOKU_CHIKOU':
+                continue
+            x, y = out[col], expected[col]
+            flat = abs(expected['BB_UPPER'] - expected['BB_LOWER']) <= 1e-6
+            if col == 'BB_PERCENT' and flat:
+                continue
+            if col.endswith('_SIGNAL') and col != 'MACD_SIGNAL':
+                assert x == y, (i, col, x, y)
+            elif pd.isna(y) or np.isinf(y):
+                assert (pd.isna(x) and pd.isna(y)) or x == y, (i, col, x, y)
+            elif col in STD_COLUMNS:
+                assert abs(x - y) <= 1e-6, (i, col, x, y)
+            else:
+                assert abs(x - y) <= 1e-9 * max(1.0, abs(y)), (i, col, x, y)
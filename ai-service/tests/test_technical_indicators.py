@@ -0,0 +1,35 @@
+import numpy as np
+
+from services.feature_engineering.technical_indicators import TechnicalIndicators
+
+
+def _frames(tied_prices):
+    df = tied_prices(250, 0, 2)
+    reference = TechnicalIndicators().add_all_indicators(df)
+    reduced = TechnicalIndicators(precision='float32').add_all_indicators(df)
+    return reference, reduced
+
+
+def test_float32_frame_is_within_tolerance(tied_prices):
+    reference, reduced = _frames(tied_prices)
+    assert reduced['MA20'].dtype == np.float32
+    assert reduced['MACD_SIGNAL_TYPE'].dtype == np.int8
+
+    report = TechnicalIndicators().check_precision(reference, reduced)
+
+    assert report['ok'], report['failures']
+    assert report['max_rel_error']['RSI'] <= report['rtol']
+    assert report['max_rel_error']['KDJ_SIGNAL'] == 0.0
+
+
+def test_perturbed_frame_fails(tied_prices):
+    reference, reduced = _frames(tied_prices)
+    reduced['MA20'] = reduced['MA20'].astype(np.float64) * (1 + 1e-5)
+    reduced.iloc[-1, reduced.columns.get_loc('RSI_SIGNAL')] = 2
+    reduced.iloc[-1, reduced.columns.get_loc('ATR')] = np.nan
+
+    report = TechnicalIndicators().check_precision(reference, reduced)
+
+    assert not report['ok']
+    assert set(report['failures']) == {'MA20', 'RSI_SIGNAL', 'ATR'}
+    assert report['max_rel_error']['ATR'] == float('inf')
@@ -0,0 +1,47 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip('dashscope')
+
+from services.llm_cache import LLMCache
+from services.tongyi_service import TongyiAnalysisService
+
+
+def test_timed_out_call_keeps_its_concurrency_slot(tmp_path):
+    service = TongyiAnalysisService(api_key='test', cache=LLMCache(path=str(tmp_path / 'cache.sqlite3')))
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def analyze_stock(code, **kwargs):
+        with lock:
+            running.append(code)
+            peak.append(len(running))
+        time.sleep(0.3 if code == 'slow' else 0.01)
+        with lock:
+            running.remove(code)
+        return {'code': code, 'source': 'test'}
+
+    service.analyze_stock = analyze_stock
+    requests = [{'code': 'slow', 'name': '', 'current_price': 1.0},
+                {'code': 'fast', 'name': '', 'current_price': 1.0}]
+
+    async def main():
+        start = time.perf_counter()
+        results = [(position, result, time.perf_counter() - start) async for position, result
+                   in service.iter_analyze_stock_batch(requests, max_concurrency=1, timeout=0.05)]
+        return results
+
+    results = asyncio.run(main())
+    assert max(peak) == 1
+    slow = next(r for r in results if r[0] == 0)
+    fast = next(r for r in results if r[0] == 1)
+    assert slow[1]['source'] != 'test'
+    assert fast[1]['source'] == 'test'
+    # The timed-out call yields its default at once, but the next request only
+    # starts once its thread has returned.
+    assert slow[2] < 0.2
+    assert fast[2] >= 0.3